@@ -1,7 +1,9 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, session, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+from flask.wrappers import Request
 from flask_cors import CORS
 import pymongo
-from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 # Optional Firebase import
 try:
     import firebase_admin
@@ -12,33 +14,83 @@ except ImportError:
     print("Firebase not available - running in demo mode")
 from datetime import datetime, timedelta
 import os
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 import json
 from bson import ObjectId
 import base64
+import re
+from concurrent.futures import ThreadPoolExecutor
+from config import Config, config
+from database import MongoConnection
+from indexes import ensure_indexes, ensure_required_indexes
+from ingest import NDJSON_MIMETYPES, bulk_insert, iter_json_array, iter_ndjson
+from export import EXPORTABLE, FORMATS, export_query, iter_export, json_serial, parse_date
+from vote_buffer import VoteBuffer
+from response_cache import ResponseCache, cached
+from metrics import Metrics
+from slow_queries import SlowQueryLog
+from search_index import SEARCH_FIELDS, InvertedIndex
+from room_index import DAYS, DEFAULT_DURATION, RoomIndex, format_time, normalize_day, parse_time
+from complaint_queue import (COMPLAINT_STATUSES, COUNTERS_COLLECTION, COUNTERS_ID, OPEN_STATUSES, QUEUE_SORT,
+                             counter_inc, priority_rank, queue_query, status_change_inc, summarize_counts)
+from events import EventBroker
+from lost_found_matcher import MatchIndex, match_updates
+from skills_search import FACETS, FacetCache, facet_counts, facet_pipeline, skill_bands
+from rollups import BUCKETS, ROLLUP_DIMENSIONS, ROLLUPS_COLLECTION, bucket_count, rollup_updates, series
 
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'  # Change this in production
-CORS(app)
+# Every route is registered on this blueprint; create_app() builds the app
+bp = Blueprint('campuslink', __name__)
 
 # MongoDB Configuration
-try:
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client['campuslink']
-    
-    # Collections
-    announcements_collection = db['announcements']
-    lost_found_collection = db['lost_found']
-    timetables_collection = db['timetables']
-    complaints_collection = db['complaints']
-    users_collection = db['users']
-    skills_collection = db['skills']
-    news_collection = db['news']
-    polls_collection = db['polls']
-    
-    print("MongoDB connected successfully!")
-except Exception as e:
-    print(f"MongoDB connection error: {e}")
+# Each app owns a MongoConnection that builds its MongoClient lazily in every
+# process, so nothing connects at import time or before a fork.
+def get_db():
+    """Database of the current app"""
+    return current_app.extensions['mongo'].db
+
+def prepare_db(db):
+    """Create the indexes the app relies on; runs once per process on first connect"""
+    errors = ensure_required_indexes(db)
+    for name, error in errors.items():
+        print(f"❌ Required index on {name} could not be created: {error}")
+    return errors
+
+def index_missing(name):
+    """Whether a required index on collection name failed to build in this process"""
+    return name in current_app.extensions['mongo'].setup
+
+def _collection(name):
+    return LocalProxy(lambda: get_db()[name])
+
+def _extension(name):
+    return LocalProxy(lambda: current_app.extensions[name])
+
+# Collections
+announcements_collection = _collection('announcements')
+lost_found_collection = _collection('lost_found')
+timetables_collection = _collection('timetables')
+complaints_collection = _collection('complaints')
+users_collection = _collection('users')
+skills_collection = _collection('skills')
+news_collection = _collection('news')
+polls_collection = _collection('polls')
+poll_votes_collection = _collection('poll_votes')
+counters_collection = _collection(COUNTERS_COLLECTION)
+rollups_collection = _collection(ROLLUPS_COLLECTION)
+lost_found_matches_collection = _collection('lost_found_matches')
+
+# Per-app caches, indexes and registries, built by create_app()
+response_cache = _extension('response_cache')
+metrics = _extension('metrics')
+slow_queries = _extension('slow_queries')
+# In-memory search index, used when SEARCH_BACKEND is 'memory'
+search_index = _extension('search_index')
+room_index = _extension('room_index')
+match_index = _extension('match_index')
+skills_facets = _extension('skills_facets')
+# In-process pub/sub behind /api/events
+event_broker = _extension('event_broker')
 
 # Firebase Configuration (Optional)
 if FIREBASE_AVAILABLE:
@@ -54,64 +106,526 @@ if FIREBASE_AVAILABLE:
 # Upload configuration
 UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def json_serial(obj):
-    """JSON serializer for objects not serializable by default json code"""
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError("Type %s not serializable" % type(obj))
+class MongoJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes ObjectId and datetime values natively"""
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, (ObjectId, datetime)):
+            return json_serial(obj)
+        return DefaultJSONProvider.default(obj)
+
+class CampusLinkRequest(Request):
+    """Bulk ingestion bodies are streamed, so they get their own size limit"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint and self.endpoint.endswith('_bulk'):
+            return current_app.config['BULK_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
+def create_app(config_name='default'):
+    """Build the CampusLink app for one of the configurations in config.py"""
+    app = Flask(__name__)
+    app.request_class = CampusLinkRequest
+    app.config.from_object(config[config_name])
+    app.json = MongoJSONProvider(app)
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+    
+    metrics, slow_queries = Metrics(), SlowQueryLog()
+    app.extensions['mongo'] = MongoConnection(app.config, listeners=[metrics.command_listener, slow_queries],
+                                              on_connect=prepare_db)
+    app.extensions['metrics'] = metrics
+    app.extensions['slow_queries'] = slow_queries
+    app.extensions['response_cache'] = ResponseCache()
+    app.extensions['event_broker'] = EventBroker()
+    app.extensions['search_index'] = InvertedIndex()
+    app.extensions['room_index'] = RoomIndex()
+    app.extensions['match_index'] = MatchIndex()
+    app.extensions['skills_facets'] = FacetCache()
+    metrics.init_app(app)
+    slow_queries.init_app(app)
+    app.extensions['response_cache'].init_app(app)
+    app.extensions['event_broker'].init_app(app)
+    app.extensions['match_index'].init_app(app)
+    app.extensions['skills_facets'].init_app(app)
+    
+    # Bounded pool for the dashboard fan-out; its threads share the one MongoClient
+    app.extensions['dashboard_executor'] = ThreadPoolExecutor(
+        max_workers=app.config['DASHBOARD_WORKERS'], thread_name_prefix='dashboard')
+    
+    # Optional write-behind buffer for poll tallies
+    app.extensions['vote_buffer'] = None
+    if app.config['VOTE_BUFFER_ENABLED']:
+        polls = app.extensions['mongo'].collection('polls')
+        
+        def on_flush(poll_ids):
+            # Runs on the buffer's flush thread
+            with app.app_context():
+                response_cache.invalidate('polls')
+                publish_tallies(polls.find({'_id': {'$in': poll_ids}}, {'votes': 1}))
+        
+        app.extensions['vote_buffer'] = VoteBuffer(
+            polls,
+            flush_interval_ms=app.config['VOTE_BUFFER_FLUSH_INTERVAL_MS'],
+            flush_size=app.config['VOTE_BUFFER_FLUSH_SIZE'],
+            max_pending=app.config['VOTE_BUFFER_MAX_PENDING'],
+            on_flush=on_flush
+        )
+    
+    app.register_blueprint(bp)
+    return app
+
+# Keyset pagination
+# List endpoints page through results ordered by (date, _id) descending. The
+# client gets an opaque next_cursor token encoding the last document's sort key
+# and passes it back as ?cursor= to continue, so each page is an indexed range
+# scan instead of a skip over everything already seen.
+PAGE_SORT = [('date', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)]
+
+# Fields a cursor can be keyed on (the complaints queue also pages by
+# priority_rank): short name in the token, encoder, decoder
+CURSOR_FIELDS = {
+    'priority_rank': ('r', int, int),
+    'date': ('d', datetime.isoformat, datetime.fromisoformat),
+    '_id': ('i', str, ObjectId)
+}
+
+def encode_cursor(doc, sort=PAGE_SORT):
+    """Encode the sort key of the last document on a page as an opaque token"""
+    key = {CURSOR_FIELDS[field][0]: CURSOR_FIELDS[field][1](doc[field]) for field, _ in sort}
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor token cannot be decoded"""
+
+def decode_cursor(token, sort=PAGE_SORT):
+    """Decode a cursor token back into its sort key values, in sort order"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return tuple(CURSOR_FIELDS[field][2](key[CURSOR_FIELDS[field][0]]) for field, _ in sort)
+    except Exception:
+        raise InvalidCursor(token)
+
+def page_args(args, max_limit, sort=PAGE_SORT):
+    """Read limit and cursor from the query string"""
+    limit = args.get('limit', type=int) or Config.ITEMS_PER_PAGE
+    limit = max(1, min(limit, max_limit))
+    cursor = args.get('cursor', '')
+    return limit, (decode_cursor(cursor, sort) if cursor else None)
+
+# Field projection
+# List endpoints return a summary of each document (no long bodies or
+# embedded arrays) plus a short snippet of its body text. ?fields=a,b picks
+# other fields and ?fields=all returns whole documents; the detail routes
+# always return the full document.
+SUMMARY_FIELDS = {
+    'announcements': ['title', 'category', 'author', 'priority'],
+    'lost_found': ['title', 'category', 'type', 'location', 'contact', 'status'],
+    'complaints': ['title', 'category', 'room_number', 'priority', 'status', 'student_name'],
+    'skills': ['title', 'category', 'instructor', 'contact', 'duration', 'price', 'status'],
+    'news': ['title', 'category', 'url', 'author'],
+    'polls': ['question', 'options', 'votes', 'status', 'author']
+}
+SNIPPET_FIELDS = {
+    'announcements': 'content',
+    'lost_found': 'description',
+    'complaints': 'description',
+    'skills': 'description',
+    'news': 'content'
+}
+SNIPPET_LENGTH = 200
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names something that is not a plain document field"""
+
+def summary_projection(collection_name):
+    """Projection for a collection's summary fields plus a body snippet"""
+    projection = {name: 1 for name in SUMMARY_FIELDS[collection_name]}
+    body = SNIPPET_FIELDS.get(collection_name)
+    if body:
+        projection['snippet'] = {'$substrCP': [{'$ifNull': ['$' + body, '']}, 0, SNIPPET_LENGTH]}
+    projection['date'] = 1
+    return projection
+
+def list_projection(collection_name, fields):
+    """Build the MongoDB projection for a list request's ?fields= value"""
+    if fields == 'all':
+        return None
+    if fields:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        for name in names:
+            if not FIELD_NAME.match(name):
+                raise InvalidFields(name)
+        projection = {name: 1 for name in names}
+    else:
+        projection = summary_projection(collection_name)
+    # The page cursor is built from date and _id
+    projection['date'] = 1
+    return projection
+
+def after_filter(after):
+    """Filter for the documents that come after a (date, _id) cursor, newest first"""
+    date, oid = after
+    return {'$or': [
+        {'date': {'$lt': date}},
+        {'date': date, '_id': {'$lt': oid}}
+    ]}
+
+# The cursor builders only call find/sort/limit, so the ASGI app hands them Motor collections
+def page_cursor(collection, query, args, max_limit):
+    """Build the cursor for one page of documents, newest first"""
+    limit, after = page_args(args, max_limit)
+    projection = list_projection(collection.name, args.get('fields', ''))
+    if after:
+        query = {'$and': [query, after_filter(after)]}
+    # Fetch one extra document to learn whether another page exists
+    cursor = collection.find(query, projection).sort(PAGE_SORT).limit(limit + 1)
+    return cursor, limit
+
+def queue_statuses(args):
+    """Statuses named by ?status= (default: the open ones), or None if one is unknown"""
+    statuses = [name.strip() for name in args.get('status', '').split(',') if name.strip()]
+    if any(status not in COMPLAINT_STATUSES for status in statuses):
+        return None
+    return statuses or OPEN_STATUSES
+
+def queue_cursor(collection, statuses, args, max_limit):
+    """Build the cursor for one page of the complaints triage queue"""
+    limit, after = page_args(args, max_limit, QUEUE_SORT)
+    query = queue_query(statuses, args.get('category', ''), args.get('room_number', ''), after)
+    projection = list_projection(collection.name, args.get('fields', ''))
+    if projection is not None:
+        # The queue cursor is built from priority_rank, date and _id
+        projection['priority_rank'] = 1
+    cursor = collection.find(query, projection).sort(QUEUE_SORT).limit(limit + 1)
+    return cursor, limit
+
+def split_page(docs, limit, sort=PAGE_SORT):
+    """(page, next_cursor) from the limit + 1 documents fetched for a page"""
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1], sort)
+    return docs, None
+
+def paginate(collection, query):
+    """Fetch one page of documents matching query"""
+    cursor, limit = page_cursor(collection, query, request.args, Config.MAX_ITEMS_PER_PAGE)
+    return split_page(list(cursor), limit)
+
+_stream_encoder = json.JSONEncoder(default=json_serial)
+
+class PageStream:
+    """Encodes one page of documents as an {items, next_cursor} body, chunk_size at a time.
+
+    Documents are fed in one by one, so the same encoder serves the Flask
+    generator below and the ASGI app's async one.
+    """
+
+    HEAD = '{"items":['
+
+    def __init__(self, limit, chunk_size=Config.STREAM_CHUNK_SIZE):
+        self.limit = limit
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.last = None
+        self.next_cursor = None
+        self._chunk = []
+        self._sep = ''
+
+    def add(self, doc):
+        """Encode doc; returns False, once the page is full, for the extra document after it"""
+        if self.count == self.limit:
+            self.next_cursor = encode_cursor(self.last)
+            return False
+        self._chunk.append(_stream_encoder.encode(doc))
+        self.last = doc
+        self.count += 1
+        return True
+
+    def ready(self):
+        return len(self._chunk) >= self.chunk_size
+
+    def flush(self):
+        """The documents encoded since the last flush"""
+        text = self._sep + ','.join(self._chunk) if self._chunk else ''
+        if self._chunk:
+            self._sep = ','
+            self._chunk = []
+        return text
+
+    def tail(self):
+        return self.flush() + '],"next_cursor":%s}' % json.dumps(self.next_cursor)
+
+def iter_page_json(docs, limit, chunk_size=Config.STREAM_CHUNK_SIZE):
+    """Encode documents as an {items, next_cursor} body, chunk_size at a time"""
+    page = PageStream(limit, chunk_size)
+    yield page.HEAD
+    for doc in docs:
+        if not page.add(doc):
+            break
+        if page.ready():
+            yield page.flush()
+    yield page.tail()
+
+def list_response(collection, query):
+    """Respond with one page of documents; ?stream=1 streams it from the cursor"""
+    if request.args.get('stream') == '1':
+        cursor, limit = page_cursor(collection, query, request.args, Config.STREAM_MAX_ITEMS_PER_PAGE)
+        cursor = cursor.batch_size(Config.STREAM_CHUNK_SIZE)
+        return Response(iter_page_json(cursor, limit), mimetype='application/json')
+    docs, next_cursor = paginate(collection, query)
+    return jsonify({'items': docs, 'next_cursor': next_cursor})
+
+def detail_response(collection, item_id):
+    """Respond with one full document, or 404"""
+    doc = collection.find_one({'_id': ObjectId(item_id)}) if ObjectId.is_valid(item_id) else None
+    if doc is None:
+        return jsonify({'success': False, 'message': 'Not found'}), 404
+    return jsonify(doc)
+
+def bulk_response(collection, build):
+    """Insert the records of a JSON array or NDJSON body in batches"""
+    max_record_bytes = current_app.config['BULK_MAX_RECORD_BYTES']
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = iter_ndjson(request.stream, max_record_bytes)
+    else:
+        records = iter_json_array(request.stream, max_record_bytes)
+    
+    def on_insert(docs):
+        for doc in docs:
+            index_for_search(collection.name, doc['_id'], doc)
+        record_activity(collection.name, *docs)
+        if collection.name in EVENT_TYPES:
+            # Too many to send one by one; subscribers reload the list instead
+            event_broker.publish('refresh', {'collection': collection.name}, key=collection.name)
+    
+    summary = bulk_insert(collection, records, build,
+                          batch_size=current_app.config['BULK_BATCH_SIZE'],
+                          max_errors=current_app.config['BULK_MAX_ERRORS'],
+                          on_insert=on_insert)
+    if 'error' in summary:
+        # The body could not be parsed; records before the fault were still inserted
+        return jsonify(dict(summary, message=summary['error'])), 400
+    return jsonify(summary)
+
+def record_activity(collection_name, *docs):
+    """Count new documents into their hourly and daily activity rollups"""
+    updates = rollup_updates(collection_name, docs)
+    if updates:
+        rollups_collection.bulk_write(updates, ordered=False)
+
+# Events sent to /api/events subscribers when a document is created
+EVENT_TYPES = {
+    'announcements': 'announcement',
+    'news': 'news',
+    'lost_found': 'lost_found',
+    'polls': 'poll'
+}
+
+def publish_created(collection_name, doc):
+    """Publish the summary of a new document, as the list endpoints would return it"""
+    summary = {name: doc[name] for name in SUMMARY_FIELDS[collection_name] if name in doc}
+    body = SNIPPET_FIELDS.get(collection_name)
+    if body:
+        summary['snippet'] = (doc.get(body) or '')[:SNIPPET_LENGTH]
+    summary['_id'] = doc['_id']
+    summary['date'] = doc['date']
+    event_broker.publish(EVENT_TYPES[collection_name], summary)
+
+def publish_tallies(polls):
+    """Publish the current vote counts of polls; a newer count replaces an undelivered one"""
+    for poll in polls:
+        event_broker.publish('poll_votes', {'_id': poll['_id'], 'votes': poll.get('votes', {})},
+                             key=str(poll['_id']))
+
+def index_for_search(collection_name, doc_id, doc):
+    """Keep the in-memory search index current when it is in use"""
+    if current_app.config['SEARCH_BACKEND'] == 'memory':
+        search_index.add(collection_name, doc_id, doc)
+
+@bp.app_errorhandler(InvalidCursor)
+def handle_invalid_cursor(e):
+    return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+
+@bp.app_errorhandler(InvalidFields)
+def handle_invalid_fields(e):
+    return jsonify({'success': False, 'message': f'Invalid field: {e}'}), 400
+
+# Document builders
+# Shared by the Flask routes, the ASGI app and anything else that creates documents.
+def new_announcement(data):
+    """Build an announcement document from request data"""
+    return {
+        'title': data['title'],
+        'content': data['content'],
+        'category': data['category'],
+        'date': datetime.now(),
+        'author': data.get('author', 'Admin')
+    }
+
+def new_lost_found_item(data):
+    """Build a lost & found item document from request data"""
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'category': data['category'],
+        'type': data['type'],  # 'lost' or 'found'
+        'location': data['location'],
+        'contact': data['contact'],
+        'date': datetime.now(),
+        'status': 'active'
+    }
+
+def new_complaint(data):
+    """Build a complaint document from request data"""
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'category': data['category'],
+        'room_number': data.get('room_number', ''),
+        'priority': data.get('priority', 'medium'),
+        'priority_rank': priority_rank(data.get('priority', 'medium')),
+        'status': 'pending',
+        'date': datetime.now(),
+        'student_name': data.get('student_name', ''),
+        'contact': data.get('contact', '')
+    }
+
+def new_skill(data):
+    """Build a skill listing document from request data"""
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'category': data['category'],
+        'instructor': data['instructor'],
+        'contact': data['contact'],
+        'duration': data.get('duration', '1 hour'),
+        'price': data.get('price', 'Free'),
+        **skill_bands({'price': data.get('price', 'Free'), 'duration': data.get('duration', '1 hour')}),
+        'date': datetime.now(),
+        'status': 'available'
+    }
+
+def new_news_item(data):
+    """Build a news document from request data"""
+    return {
+        'title': data['title'],
+        'content': data['content'],
+        'category': data['category'],
+        'url': data.get('url', ''),
+        'date': datetime.now(),
+        'author': data.get('author', 'Admin')
+    }
+
+def new_poll(data):
+    """Build a poll document from request data"""
+    return {
+        'question': data['question'],
+        'options': data['options'],
+        'votes': {option: 0 for option in data['options']},
+        'date': datetime.now(),
+        'status': 'active',
+        'author': data.get('author', 'Admin')
+    }
+
+def new_schedule_item(data):
+    """Build one timetable schedule entry from request data"""
+    return {
+        'day': data['day'],
+        'time': data['time'],
+        'subject': data['subject'],
+        'room': data['room'],
+        'professor': data.get('professor', ''),
+        'duration': data.get('duration', '60'),
+        'notes': data.get('notes', ''),
+        'slot_id': ObjectId(),
+        'created_at': datetime.now()
+    }
+
+SLOT_FIELDS = ['day', 'time', 'subject', 'room', 'professor', 'duration', 'notes']
+
+def with_slot_ids(schedule):
+    """Copy of a whole uploaded schedule in which every slot has a slot_id, keeping valid ones"""
+    slots = []
+    for slot in schedule:
+        slot = dict(slot)
+        slot_id = slot.get('slot_id')
+        slot['slot_id'] = ObjectId(slot_id) if ObjectId.is_valid(slot_id or '') else ObjectId()
+        slots.append(slot)
+    return slots
+
+def slot_changes(data):
+    """$set document for the editable fields of the slot matched by the update filter"""
+    changes = {f'schedule.$.{name}': data[name] for name in SLOT_FIELDS if name in data}
+    if changes:
+        changes['updated_at'] = datetime.now()
+    return changes
+
+def day_projection(day):
+    """Timetable projection that keeps only the slots of one day"""
+    return {
+        'user_id': 1,
+        'updated_at': 1,
+        'schedule': {'$filter': {
+            'input': {'$ifNull': ['$schedule', []]},
+            'as': 'slot',
+            'cond': {'$eq': ['$$slot.day', day]}
+        }}
+    }
 
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/login')
+@bp.route('/login')
 def login():
     return render_template('login.html')
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     return render_template('dashboard.html')
 
-@app.route('/announcements')
+@bp.route('/announcements')
 def announcements():
     return render_template('announcements.html')
 
-@app.route('/lost-found')
+@bp.route('/lost-found')
 def lost_found():
     return render_template('lost_found.html')
 
-@app.route('/timetable')
+@bp.route('/timetable')
 def timetable():
     return render_template('timetable.html')
 
-@app.route('/complaints')
+@bp.route('/complaints')
 def complaints():
     return render_template('complaints.html')
 
-@app.route('/skills')
+@bp.route('/skills')
 def skills():
     return render_template('skills.html')
 
-@app.route('/news')
+@bp.route('/news')
 def news():
     return render_template('news.html')
 
-@app.route('/polls')
+@bp.route('/polls')
 def polls():
     return render_template('polls.html')
 
 # API Routes
 
 # Announcements API
-@app.route('/api/announcements', methods=['GET', 'POST'])
+@bp.route('/api/announcements', methods=['GET', 'POST'])
+@cached('announcements')
 def api_announcements():
     if request.method == 'GET':
         category = request.args.get('category', '')
@@ -119,23 +633,29 @@ def api_announcements():
         if category:
             query['category'] = category
         
-        announcements = list(announcements_collection.find(query).sort('date', -1))
-        return jsonify(json.loads(json.dumps(announcements, default=json_serial)))
+        return list_response(announcements_collection, query)
     
     elif request.method == 'POST':
-        data = request.json
-        announcement = {
-            'title': data['title'],
-            'content': data['content'],
-            'category': data['category'],
-            'date': datetime.now(),
-            'author': data.get('author', 'Admin')
-        }
+        announcement = new_announcement(request.json)
         result = announcements_collection.insert_one(announcement)
+        index_for_search('announcements', result.inserted_id, announcement)
+        record_activity('announcements', announcement)
+        publish_created('announcements', announcement)
         return jsonify({'success': True, 'id': str(result.inserted_id)})
 
+@bp.route('/api/announcements/<item_id>')
+@cached('announcements')
+def api_announcement_detail(item_id):
+    return detail_response(announcements_collection, item_id)
+
+@bp.route('/api/announcements/bulk', methods=['POST'])
+@cached('announcements')
+def api_announcements_bulk():
+    return bulk_response(announcements_collection, new_announcement)
+
 # Lost & Found API
-@app.route('/api/lost-found', methods=['GET', 'POST'])
+@bp.route('/api/lost-found', methods=['GET', 'POST'])
+@cached('lost_found')
 def api_lost_found():
     if request.method == 'GET':
         category = request.args.get('category', '')
@@ -147,32 +667,73 @@ def api_lost_found():
         if type_filter:
             query['type'] = type_filter
             
-        items = list(lost_found_collection.find(query).sort('date', -1))
-        return jsonify(json.loads(json.dumps(items, default=json_serial)))
+        return list_response(lost_found_collection, query)
     
     elif request.method == 'POST':
-        data = request.json
-        item = {
-            'title': data['title'],
-            'description': data['description'],
-            'category': data['category'],
-            'type': data['type'],  # 'lost' or 'found'
-            'location': data['location'],
-            'contact': data['contact'],
-            'date': datetime.now(),
-            'status': 'active'
-        }
+        item = new_lost_found_item(request.json)
         result = lost_found_collection.insert_one(item)
+        index_for_search('lost_found', result.inserted_id, item)
+        record_activity('lost_found', item)
+        publish_created('lost_found', item)
+        match_lost_found(item)
         return jsonify({'success': True, 'id': str(result.inserted_id)})
 
+@bp.route('/api/lost-found/<item_id>')
+@cached('lost_found')
+def api_lost_found_detail(item_id):
+    return detail_response(lost_found_collection, item_id)
+
+@bp.route('/api/lost-found/<item_id>/matches', methods=['GET', 'POST'])
+@cached('lost_found')
+def api_lost_found_matches(item_id):
+    """Best-scoring active reports of the other type, read from the persisted matches.
+
+    GET only reads; POST (re)computes and persists the report's matches
+    first, e.g. for reports stored before matching existed.
+    """
+    if not ObjectId.is_valid(item_id):
+        return jsonify({'success': False, 'message': 'Not found'}), 404
+    if request.method == 'POST':
+        item = lost_found_collection.find_one({'_id': ObjectId(item_id)})
+        if item is None:
+            return jsonify({'success': False, 'message': 'Not found'}), 404
+        doc = {'matches': match_lost_found(item)}
+    else:
+        doc = lost_found_matches_collection.find_one({'_id': ObjectId(item_id)})
+        if doc is None:
+            if not lost_found_collection.count_documents({'_id': ObjectId(item_id)}, limit=1):
+                return jsonify({'success': False, 'message': 'Not found'}), 404
+            # Not matched yet: POST here or run.py --rebuild-lost-found-matches
+            doc = {'matches': []}
+    
+    scores = {match['_id']: match['score'] for match in doc.get('matches', [])}
+    items = lost_found_collection.find({'_id': {'$in': list(scores)}, 'status': 'active'},
+                                       summary_projection('lost_found'))
+    matches = sorted((dict(match, score=scores[match['_id']]) for match in items),
+                     key=lambda match: match['score'], reverse=True)
+    return jsonify({'_id': item_id, 'matches': matches})
+
+def match_lost_found(item):
+    """Score a report against the other type and persist its matches; returns them"""
+    match_index.build(get_db(), current_app.config['MATCH_INDEX_MAX_AGE_S'])
+    # Reports posted through other processes since the last match
+    match_index.sync(get_db())
+    if not match_index.add(item):
+        return []
+    operations = match_updates(match_index, item['_id'], match_index.match(item['_id']))
+    lost_found_matches_collection.bulk_write(operations, ordered=False)
+    return [{'_id': other_id, 'score': score} for score, other_id in match_index.top(item['_id'])]
+
 # Timetable API
-@app.route('/api/timetable', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@bp.route('/api/timetable', methods=['GET', 'POST', 'PUT', 'DELETE'])
+@cached('timetables')
 def api_timetable():
     if request.method == 'GET':
         user_id = request.args.get('user_id', 'default')
-        timetable = timetables_collection.find_one({'user_id': user_id})
+        day = request.args.get('day', '')
+        timetable = timetables_collection.find_one({'user_id': user_id}, day_projection(day) if day else None)
         if timetable:
-            return jsonify(json.loads(json.dumps(timetable, default=json_serial)))
+            return jsonify(timetable)
         return jsonify({'schedule': []})
     
     elif request.method == 'POST':
@@ -183,7 +744,7 @@ def api_timetable():
         if 'schedule' in data:
             timetable_doc = {
                 'user_id': user_id,
-                'schedule': data['schedule'],
+                'schedule': with_slot_ids(data['schedule']),
                 'updated_at': datetime.now()
             }
             timetables_collection.replace_one(
@@ -191,146 +752,512 @@ def api_timetable():
                 timetable_doc,
                 upsert=True
             )
+            room_index.set_user(user_id, timetable_doc['schedule'])
+            return jsonify({'success': True,
+                            'slot_ids': [slot['slot_id'] for slot in timetable_doc['schedule']]})
         else:
             # Add single schedule item (legacy support)
-            schedule_item = {
-                'day': data['day'],
-                'time': data['time'],
-                'subject': data['subject'],
-                'room': data['room'],
-                'professor': data.get('professor', ''),
-                'duration': data.get('duration', '60'),
-                'notes': data.get('notes', ''),
-                'created_at': datetime.now()
-            }
+            schedule_item = new_schedule_item(data)
             
             timetables_collection.update_one(
                 {'user_id': user_id},
-                {'$push': {'schedule': schedule_item}},
+                {'$push': {'schedule': schedule_item}, '$set': {'updated_at': datetime.now()}},
                 upsert=True
             )
-        
-        return jsonify({'success': True})
+            room_index.set_slot(user_id, schedule_item)
+            return jsonify({'success': True, 'slot_id': schedule_item['slot_id']})
+    
+    elif request.method == 'PUT':
+        # Edit one slot, named by slot_id in the body
+        data = request.json
+        return update_slot(data.get('user_id', 'default'), data.get('slot_id', ''), data)
+    
+    elif request.method == 'DELETE':
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id') or request.args.get('user_id', 'default')
+        return delete_slot(user_id, data.get('slot_id') or request.args.get('slot_id', ''))
+
+@bp.route('/api/timetable/slots/<slot_id>', methods=['PATCH', 'DELETE'])
+@cached('timetables')
+def api_timetable_slot(slot_id):
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('user_id') or request.args.get('user_id', 'default')
+    if request.method == 'PATCH':
+        return update_slot(user_id, slot_id, data)
+    return delete_slot(user_id, slot_id)
+
+def update_slot(user_id, slot_id, data):
+    """Set the given fields of one slot in place with the positional $ operator"""
+    if not ObjectId.is_valid(slot_id):
+        return jsonify({'success': False, 'message': 'Slot not found'}), 404
+    changes = slot_changes(data)
+    if not changes:
+        return jsonify({'success': False, 'message': 'Nothing to update'}), 400
+    # Only the edited slot comes back, for the room index
+    timetable = timetables_collection.find_one_and_update(
+        {'user_id': user_id, 'schedule.slot_id': ObjectId(slot_id)},
+        {'$set': changes},
+        projection={'schedule': {'$elemMatch': {'slot_id': ObjectId(slot_id)}}},
+        return_document=pymongo.ReturnDocument.AFTER
+    )
+    if timetable is None:
+        return jsonify({'success': False, 'message': 'Slot not found'}), 404
+    room_index.set_slot(user_id, timetable['schedule'][0])
+    return jsonify({'success': True})
+
+def delete_slot(user_id, slot_id):
+    """Remove one slot from a user's schedule"""
+    if not ObjectId.is_valid(slot_id):
+        return jsonify({'success': False, 'message': 'Slot not found'}), 404
+    result = timetables_collection.update_one(
+        {'user_id': user_id, 'schedule.slot_id': ObjectId(slot_id)},
+        {'$pull': {'schedule': {'slot_id': ObjectId(slot_id)}}, '$set': {'updated_at': datetime.now()}}
+    )
+    if result.matched_count == 0:
+        return jsonify({'success': False, 'message': 'Slot not found'}), 404
+    room_index.remove_slot(user_id, ObjectId(slot_id))
+    return jsonify({'success': True})
 
 # Complaints API
-@app.route('/api/complaints', methods=['GET', 'POST', 'PUT'])
+@bp.route('/api/complaints', methods=['GET', 'POST', 'PUT'])
+@cached('complaints')
 def api_complaints():
     if request.method == 'GET':
-        complaints = list(complaints_collection.find().sort('date', -1))
-        return jsonify(json.loads(json.dumps(complaints, default=json_serial)))
+        return list_response(complaints_collection, {})
     
     elif request.method == 'POST':
-        data = request.json
-        complaint = {
-            'title': data['title'],
-            'description': data['description'],
-            'category': data['category'],
-            'room_number': data.get('room_number', ''),
-            'priority': data.get('priority', 'medium'),
-            'status': 'pending',
-            'date': datetime.now(),
-            'student_name': data.get('student_name', ''),
-            'contact': data.get('contact', '')
-        }
+        complaint = new_complaint(request.json)
         result = complaints_collection.insert_one(complaint)
+        counters_collection.update_one({'_id': COUNTERS_ID},
+                                       counter_inc(complaint['priority'], complaint['status']), upsert=True)
+        record_activity('complaints', complaint)
         return jsonify({'success': True, 'id': str(result.inserted_id)})
     
     elif request.method == 'PUT':
         data = request.json
         complaint_id = data['id']
         new_status = data['status']
+        if new_status not in COMPLAINT_STATUSES:
+            return jsonify({'success': False, 'message': 'Invalid status'}), 400
+        if not ObjectId.is_valid(complaint_id):
+            return jsonify({'success': False, 'message': 'Not found'}), 404
         
-        complaints_collection.update_one(
+        # The old status comes back atomically, so concurrent updates count each change once
+        previous = complaints_collection.find_one_and_update(
             {'_id': ObjectId(complaint_id)},
-            {'$set': {'status': new_status, 'updated_at': datetime.now()}}
+            {'$set': {'status': new_status, 'updated_at': datetime.now()}},
+            projection={'status': 1, 'priority': 1}
         )
+        if previous is None:
+            return jsonify({'success': False, 'message': 'Not found'}), 404
+        if previous.get('status') != new_status:
+            counters_collection.update_one(
+                {'_id': COUNTERS_ID},
+                status_change_inc(previous.get('priority'), previous.get('status'), new_status),
+                upsert=True
+            )
+            event_broker.publish('complaint_status', {'_id': previous['_id'], 'status': new_status,
+                                                      'previous_status': previous.get('status')})
         return jsonify({'success': True})
 
+@bp.route('/api/complaints/queue')
+@cached('complaints')
+def api_complaints_queue():
+    """Triage queue: most urgent first, oldest first within a priority"""
+    statuses = queue_statuses(request.args)
+    if statuses is None:
+        return jsonify({'success': False, 'message': 'Invalid status'}), 400
+    cursor, limit = queue_cursor(complaints_collection, statuses, request.args, Config.MAX_ITEMS_PER_PAGE)
+    docs, next_cursor = split_page(list(cursor), limit, QUEUE_SORT)
+    return jsonify({'items': docs, 'next_cursor': next_cursor})
+
+@bp.route('/api/complaints/counts')
+@cached('complaints')
+def api_complaints_counts():
+    return jsonify(summarize_counts(counters_collection.find_one({'_id': COUNTERS_ID})))
+
+@bp.route('/api/complaints/<item_id>')
+@cached('complaints')
+def api_complaint_detail(item_id):
+    return detail_response(complaints_collection, item_id)
+
 # Skills API
-@app.route('/api/skills', methods=['GET', 'POST'])
+@bp.route('/api/skills', methods=['GET', 'POST'])
+@cached('skills')
 def api_skills():
     if request.method == 'GET':
-        skills = list(skills_collection.find().sort('date', -1))
-        return jsonify(json.loads(json.dumps(skills, default=json_serial)))
+        return list_response(skills_collection, {})
     
     elif request.method == 'POST':
-        data = request.json
-        skill = {
-            'title': data['title'],
-            'description': data['description'],
-            'category': data['category'],
-            'instructor': data['instructor'],
-            'contact': data['contact'],
-            'duration': data.get('duration', '1 hour'),
-            'price': data.get('price', 'Free'),
-            'date': datetime.now(),
-            'status': 'available'
-        }
+        skill = new_skill(request.json)
         result = skills_collection.insert_one(skill)
+        index_for_search('skills', result.inserted_id, skill)
+        record_activity('skills', skill)
+        skills_facets.clear()
         return jsonify({'success': True, 'id': str(result.inserted_id)})
 
+@bp.route('/api/skills/<item_id>')
+@cached('skills')
+def api_skill_detail(item_id):
+    return detail_response(skills_collection, item_id)
+
+@bp.route('/api/skills/bulk', methods=['POST'])
+@cached('skills')
+def api_skills_bulk():
+    response = bulk_response(skills_collection, new_skill)
+    skills_facets.clear()
+    return response
+
+@bp.route('/api/skills/search')
+@cached('skills')
+def api_skills_search():
+    """One page of matching skills plus counts per category, price band, duration band and status"""
+    query = {facet: request.args[facet] for facet in FACETS if request.args.get(facet)}
+    text = request.args.get('q', '').strip()
+    if text:
+        query['$text'] = {'$search': text}
+    limit, after = page_args(request.args, Config.MAX_ITEMS_PER_PAGE)
+    projection = list_projection('skills', request.args.get('fields', ''))
+    
+    key = json.dumps(query, sort_keys=True)
+    counts = skills_facets.get(key)
+    if counts is None:
+        result = next(skills_collection.aggregate(
+            facet_pipeline(query, PAGE_SORT, after_filter(after) if after else None, limit, projection)))
+        docs = result['items']
+        counts = facet_counts(result)
+        skills_facets.set(key, counts)
+    else:
+        # Same filters as a recent request: only the page is needed
+        page_query = {'$and': [query, after_filter(after)]} if after else query
+        docs = list(skills_collection.find(page_query, projection).sort(PAGE_SORT).limit(limit + 1))
+    
+    docs, next_cursor = split_page(docs, limit)
+    return jsonify({'items': docs, 'next_cursor': next_cursor, 'facets': counts})
+
 # News API
-@app.route('/api/news', methods=['GET', 'POST'])
+@bp.route('/api/news', methods=['GET', 'POST'])
+@cached('news')
 def api_news():
     if request.method == 'GET':
-        news = list(news_collection.find().sort('date', -1))
-        return jsonify(json.loads(json.dumps(news, default=json_serial)))
+        return list_response(news_collection, {})
     
     elif request.method == 'POST':
-        data = request.json
-        news_item = {
-            'title': data['title'],
-            'content': data['content'],
-            'category': data['category'],
-            'url': data.get('url', ''),
-            'date': datetime.now(),
-            'author': data.get('author', 'Admin')
-        }
+        news_item = new_news_item(request.json)
         result = news_collection.insert_one(news_item)
+        index_for_search('news', result.inserted_id, news_item)
+        record_activity('news', news_item)
+        publish_created('news', news_item)
         return jsonify({'success': True, 'id': str(result.inserted_id)})
 
+@bp.route('/api/news/<item_id>')
+@cached('news')
+def api_news_detail(item_id):
+    return detail_response(news_collection, item_id)
+
+@bp.route('/api/news/bulk', methods=['POST'])
+@cached('news')
+def api_news_bulk():
+    return bulk_response(news_collection, new_news_item)
+
 # Polls API
-@app.route('/api/polls', methods=['GET', 'POST', 'PUT'])
+@bp.route('/api/polls', methods=['GET', 'POST', 'PUT'])
+@cached('polls')
 def api_polls():
     if request.method == 'GET':
-        polls = list(polls_collection.find().sort('date', -1))
-        return jsonify(json.loads(json.dumps(polls, default=json_serial)))
+        return list_response(polls_collection, {})
     
     elif request.method == 'POST':
-        data = request.json
-        poll = {
-            'question': data['question'],
-            'options': data['options'],
-            'votes': {option: 0 for option in data['options']},
-            'voters': [],
-            'date': datetime.now(),
-            'status': 'active',
-            'author': data.get('author', 'Admin')
-        }
+        poll = new_poll(request.json)
         result = polls_collection.insert_one(poll)
+        record_activity('polls', poll)
+        publish_created('polls', poll)
         return jsonify({'success': True, 'id': str(result.inserted_id)})
     
     elif request.method == 'PUT':
         data = request.json
-        poll_id = data['poll_id']
+        poll_id = ObjectId(data['poll_id'])
         selected_option = data['option']
         voter_id = data.get('voter_id', 'anonymous')
+        vote_buffer = current_app.extensions['vote_buffer']
         
-        # Check if user already voted
-        poll = polls_collection.find_one({'_id': ObjectId(poll_id)})
-        if voter_id not in poll.get('voters', []):
-            polls_collection.update_one(
-                {'_id': ObjectId(poll_id)},
-                {
-                    '$inc': {f'votes.{selected_option}': 1},
-                    '$push': {'voters': voter_id}
-                }
-            )
-            return jsonify({'success': True})
-        else:
+        # Buffered tallies are written later, so check the option up front
+        if vote_buffer is not None:
+            if not polls_collection.find_one({'_id': poll_id, 'options': selected_option}, {'_id': 1}):
+                return jsonify({'success': False, 'message': 'Poll or option not found'}), 404
+        
+        # The unique (poll_id, voter_id) index rejects a second vote; without
+        # it a second vote would be counted, so voting is refused instead
+        if index_missing('poll_votes'):
+            return jsonify({'success': False, 'message': 'Voting is unavailable'}), 503
+        vote = {
+            'poll_id': poll_id,
+            'voter_id': voter_id,
+            'option': selected_option,
+            'date': datetime.now()
+        }
+        try:
+            poll_votes_collection.insert_one(vote)
+        except DuplicateKeyError:
             return jsonify({'success': False, 'message': 'Already voted'})
+        
+        if vote_buffer is not None and vote_buffer.add(poll_id, selected_option):
+            record_activity('poll_votes', vote)
+            return jsonify({'success': True})
+        
+        # The new tallies come back with the update, for the event feed
+        poll = polls_collection.find_one_and_update(
+            {'_id': poll_id, 'options': selected_option},
+            {'$inc': {f'votes.{selected_option}': 1}},
+            projection={'votes': 1},
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        if poll is None:
+            poll_votes_collection.delete_one({'_id': vote['_id']})
+            return jsonify({'success': False, 'message': 'Poll or option not found'}), 404
+        record_activity('poll_votes', vote)
+        publish_tallies([poll])
+        return jsonify({'success': True})
+
+@bp.route('/api/polls/<item_id>')
+@cached('polls')
+def api_poll_detail(item_id):
+    return detail_response(polls_collection, item_id)
+
+@bp.route('/api/polls/vote-buffer')
+def api_vote_buffer():
+    vote_buffer = current_app.extensions['vote_buffer']
+    if vote_buffer is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **vote_buffer.stats()})
+
+# Search API
+@bp.route('/api/search')
+def api_search():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': False, 'message': 'Missing search query'}), 400
+    
+    names = [name for name in request.args.get('collections', '').split(',') if name]
+    for name in names:
+        if name not in SEARCH_FIELDS:
+            return jsonify({'success': False, 'message': f'Not searchable: {name}'}), 400
+    names = names or list(SEARCH_FIELDS)
+    
+    limit = request.args.get('limit', type=int) or Config.ITEMS_PER_PAGE
+    limit = max(1, min(limit, Config.MAX_ITEMS_PER_PAGE))
+    page = max(1, request.args.get('page', 1, type=int))
+    offset = (page - 1) * limit
+    if offset + limit > Config.SEARCH_MAX_RESULTS:
+        return jsonify({'success': False, 'message': 'Page is beyond the result limit'}), 400
+    
+    # Rank one extra hit to learn whether another page exists
+    if current_app.config['SEARCH_BACKEND'] == 'memory':
+        hits = memory_search(q, names, offset + limit + 1)
+    else:
+        if any(index_missing(name) for name in names):
+            return jsonify({'success': False, 'message': 'Search is unavailable'}), 503
+        hits = text_search(q, names, offset + limit + 1)
+    return jsonify({
+        'items': hits[offset:offset + limit],
+        'page': page,
+        'next_page': page + 1 if len(hits) > offset + limit else None
+    })
+
+def text_search(q, names, limit):
+    """Rank matches with the MongoDB text index of each collection"""
+    hits = []
+    for name in names:
+        projection = summary_projection(name)
+        projection['score'] = {'$meta': 'textScore'}
+        cursor = get_db()[name].find({'$text': {'$search': q}}, projection) \
+            .sort([('score', {'$meta': 'textScore'})]).limit(limit)
+        hits.extend(dict(doc, collection=name) for doc in cursor)
+    hits.sort(key=lambda doc: doc['score'], reverse=True)
+    return hits[:limit]
+
+def memory_search(q, names, limit):
+    """Rank matches with the in-memory inverted index, then fetch the summaries"""
+    search_index.build(get_db(), current_app.config['SEARCH_INDEX_MAX_AGE_S'])
+    ranked = search_index.search(q, set(names), limit)
+    ids = {}
+    for _, name, doc_id in ranked:
+        ids.setdefault(name, []).append(doc_id)
+    docs = {}
+    for name, doc_ids in ids.items():
+        for doc in get_db()[name].find({'_id': {'$in': doc_ids}}, summary_projection(name)):
+            docs[(name, doc['_id'])] = doc
+    return [dict(docs[(name, doc_id)], collection=name, score=score)
+            for score, name, doc_id in ranked if (name, doc_id) in docs]
+
+# Dashboard API
+DASHBOARD_COLLECTIONS = ['announcements', 'news', 'polls', 'complaints', 'lost_found', 'skills']
+
+def dashboard_section(database, name, limit):
+    """Latest documents and the document count of one collection"""
+    collection = database[name]
+    latest = list(collection.find({}, summary_projection(name)).sort(PAGE_SORT).limit(limit))
+    return {'latest': latest, 'count': collection.estimated_document_count()}
+
+@bp.route('/api/dashboard')
+def api_dashboard():
+    limit = request.args.get('limit', type=int) or Config.DASHBOARD_ITEMS
+    limit = max(1, min(limit, Config.MAX_ITEMS_PER_PAGE))
+    # The pool threads have no app context, so hand them the database
+    database = get_db()
+    executor = current_app.extensions['dashboard_executor']
+    futures = {name: executor.submit(dashboard_section, database, name, limit)
+               for name in DASHBOARD_COLLECTIONS}
+    return jsonify({name: future.result() for name, future in futures.items()})
+
+# Rooms API
+@bp.route('/api/rooms/free')
+def api_free_rooms():
+    # Defaults to a one-hour window starting now
+    now = datetime.now()
+    day = normalize_day(request.args.get('day') or DAYS[now.weekday()])
+    if day is None:
+        return jsonify({'success': False, 'message': 'Invalid day'}), 400
+    start = parse_time(request.args.get('time') or now.strftime('%H:%M'))
+    if start is None:
+        return jsonify({'success': False, 'message': 'Invalid time'}), 400
+    duration = request.args.get('duration', DEFAULT_DURATION, type=int)
+    if duration <= 0:
+        return jsonify({'success': False, 'message': 'Invalid duration'}), 400
+    
+    room_index.build(get_db(), current_app.config['ROOM_INDEX_MAX_AGE_S'])
+    return jsonify({
+        'day': day,
+        'time': format_time(start),
+        'duration': duration,
+        'rooms': room_index.free_rooms(day, start, start + duration)
+    })
+
+@bp.route('/api/rooms/<room>/occupancy')
+def api_room_occupancy(room):
+    day = request.args.get('day', '')
+    if day and normalize_day(day) is None:
+        return jsonify({'success': False, 'message': 'Invalid day'}), 400
+    
+    room_index.build(get_db(), current_app.config['ROOM_INDEX_MAX_AGE_S'])
+    if room not in room_index:
+        return jsonify({'success': False, 'message': 'Unknown room'}), 404
+    return jsonify({'room': room, 'occupancy': room_index.occupancy(room, normalize_day(day) if day else None)})
+
+# Activity stats API
+@bp.route('/api/stats/<name>')
+def api_stats(name):
+    """Activity per hour, day, week or month, read from the rollups"""
+    if name not in ROLLUP_DIMENSIONS:
+        return jsonify({'success': False, 'message': f'No stats for {name}'}), 404
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        return jsonify({'success': False, 'message': f'Unknown bucket: {bucket}'}), 400
+    
+    # Defaults to the last 30 days (48 hours for hourly buckets)
+    try:
+        date_to = parse_date(request.args.get('to')) or datetime.now()
+        span = timedelta(hours=48) if bucket == 'hour' else timedelta(days=30)
+        date_from = parse_date(request.args.get('from')) or date_to - span
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date'}), 400
+    max_buckets = current_app.config['STATS_MAX_BUCKETS']
+    if bucket_count(bucket, date_from, date_to, max_buckets) > max_buckets:
+        return jsonify({'success': False, 'message': f'More than {max_buckets} buckets; use a larger bucket'}), 400
+    
+    buckets, totals = series(rollups_collection, name, bucket, date_from, date_to)
+    return jsonify({
+        'collection': name,
+        'bucket': bucket,
+        'from': date_from,
+        'to': date_to,
+        'buckets': buckets,
+        'totals': totals
+    })
+
+# Export API
+@bp.route('/api/export/<name>')
+def api_export(name):
+    if name not in EXPORTABLE:
+        return jsonify({'success': False, 'message': f'Not exportable: {name}'}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'message': f'Unknown format: {fmt}'}), 400
+    
+    try:
+        date_from = parse_date(request.args.get('from'))
+        date_to = parse_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date'}), 400
+    after = request.args.get('after')
+    if after and not ObjectId.is_valid(after):
+        return jsonify({'success': False, 'message': 'Invalid after id'}), 400
+    
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    for field in fields:
+        if not FIELD_NAME.match(field):
+            raise InvalidFields(field)
+    
+    chunks = iter_export(get_db()[name], fmt, export_query(date_from, date_to, after),
+                         fields=fields, batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+    response = Response(chunks, mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{fmt}'
+    return response
+
+# Event feed
+@bp.route('/api/events')
+def api_events():
+    """Server-sent events for new documents, complaint status changes and poll tallies"""
+    types = None
+    if request.args.get('types'):
+        types = {name.strip() for name in request.args['types'].split(',') if name.strip()}
+        unknown = types - set(EVENT_TYPES.values()) - {'complaint_status', 'poll_votes'}
+        if unknown:
+            return jsonify({'success': False, 'message': f"Unknown event type: {', '.join(sorted(unknown))}"}), 400
+        # Every stream gets the events that tell it to reload
+        types |= {'refresh', 'reset'}
+    
+    # EventSource sends Last-Event-ID when it reconnects; first connections can pass it in the URL
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    broker = current_app.extensions['event_broker']
+    subscriber = broker.subscribe(last_event_id, types)
+    if subscriber is None:
+        return jsonify({'success': False, 'message': 'Too many event streams'}), 503
+    response = Response(broker.stream(subscriber), mimetype='text/event-stream')
+    # A stream closed before its first chunk never runs the generator's cleanup
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/api/events/stats')
+def api_event_stats():
+    return jsonify(event_broker.stats())
+
+@bp.route('/api/cache/stats')
+def api_cache_stats():
+    return jsonify(response_cache.stats())
+
+@bp.route('/api/pool/stats')
+def api_pool_stats():
+    return jsonify(current_app.extensions['mongo'].pool_stats.stats())
+
+@bp.route('/api/slow-queries')
+def api_slow_queries():
+    return jsonify(slow_queries.stats())
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return jsonify({'success': False, 'message': 'Metrics are disabled'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# gunicorn and run.py serve this module-level app; FLASK_CONFIG picks the configuration
+app = create_app(os.environ.get('FLASK_CONFIG', 'default'))
 
 if __name__ == '__main__':
     # Create upload directory if it doesn't exist
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    with app.app_context():
+        ensure_indexes(get_db())
+    app.run(debug=app.config['DEBUG'], host=app.config['HOST'], port=app.config['PORT'])
\ No newline at end of file
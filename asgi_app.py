@@ -0,0 +1,288 @@
+"""
+CampusLink ASGI Application
+Asyncio-native front for app.py, built on Starlette and Motor. The read-only
+/api GET routes are served natively with the same request and response
+contract, so an in-flight request waits on MongoDB without holding a worker
+thread. Everything else - every write, bulk ingestion, export, rooms, stats,
+faceted skills search, lost & found matches, /api/events and the HTML pages -
+is passed through to the Flask app in the same process, so all writes share
+its one write path (cache invalidation, the event feed, the in-memory
+indexes, the complaint counters and the activity rollups). It can run side
+by side with the Flask app on the same database, for example:
+
+    uvicorn asgi_app:app --port 5001 --workers 4
+
+Native responses are not cached and carry no ETag; with
+SEARCH_BACKEND=memory, /api/search is passed through as well.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+from a2wsgi import WSGIMiddleware
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.applications import Starlette
+from starlette.convertors import Convertor, register_url_convertor
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MultiDict
+
+from config import config
+from database import client_options
+from app import (
+    Config, DASHBOARD_COLLECTIONS, SEARCH_FIELDS, InvalidCursor, InvalidFields, PAGE_SORT, PageStream,
+    app as flask_app, json_serial, page_cursor, split_page, summary_projection, day_projection,
+    COUNTERS_COLLECTION, COUNTERS_ID, summarize_counts, queue_statuses, queue_cursor, QUEUE_SORT
+)
+
+# Same FLASK_CONFIG selection and pool settings as the Flask app
+settings = {name: getattr(config[os.environ.get('FLASK_CONFIG', 'default')], name)
+            for name in dir(Config) if name.isupper()}
+
+# Created once the event loop is running
+client = None
+db = None
+# Required indexes that could not be built, as found by the Flask app's first connection
+setup_errors = {}
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global client, db, setup_errors
+    client = AsyncIOMotorClient(settings['MONGODB_URI'], **client_options(settings))
+    db = client[settings['MONGODB_DB']]
+    setup_errors = await asyncio.to_thread(lambda: flask_app.extensions['mongo'].setup)
+    yield
+    client.close()
+
+class ObjectIdConvertor(Convertor):
+    """Path parameter matching only well-formed ObjectIds"""
+
+    regex = '[0-9a-fA-F]{24}'
+
+    def convert(self, value):
+        return value
+
+    def to_string(self, value):
+        return str(value)
+
+register_url_convertor('objectid', ObjectIdConvertor())
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response that encodes ObjectId and datetime like the Flask app"""
+
+    def render(self, content):
+        return json.dumps(content, default=json_serial, separators=(',', ':')).encode('utf-8')
+
+def jsonify(content, status_code=200):
+    return MongoJSONResponse(content, status_code=status_code)
+
+def query_args(request):
+    """Query string as a MultiDict, which is what the shared helpers in app.py read"""
+    return MultiDict(request.query_params.multi_items())
+
+async def handle_invalid_cursor(request, e):
+    return jsonify({'success': False, 'message': 'Invalid cursor'}, 400)
+
+async def handle_invalid_fields(request, e):
+    return jsonify({'success': False, 'message': f'Invalid field: {e}'}, 400)
+
+async def iter_page_json(cursor, limit, chunk_size=Config.STREAM_CHUNK_SIZE):
+    """Async counterpart of app.iter_page_json reading from a Motor cursor"""
+    page = PageStream(limit, chunk_size)
+    yield page.HEAD
+    async for doc in cursor:
+        if not page.add(doc):
+            break
+        if page.ready():
+            yield page.flush()
+    yield page.tail()
+
+async def list_response(request, collection, query):
+    """Respond with one page of documents; ?stream=1 streams it from the cursor"""
+    args = query_args(request)
+    if args.get('stream') == '1':
+        cursor, limit = page_cursor(collection, query, args, Config.STREAM_MAX_ITEMS_PER_PAGE)
+        cursor = cursor.batch_size(Config.STREAM_CHUNK_SIZE)
+        return StreamingResponse(iter_page_json(cursor, limit), media_type='application/json')
+    cursor, limit = page_cursor(collection, query, args, Config.MAX_ITEMS_PER_PAGE)
+    docs, next_cursor = split_page(await cursor.to_list(length=limit + 1), limit)
+    return jsonify({'items': docs, 'next_cursor': next_cursor})
+
+async def detail_response(request, collection):
+    """Respond with one full document, or 404"""
+    item_id = request.path_params['item_id']
+    doc = await collection.find_one({'_id': ObjectId(item_id)}) if ObjectId.is_valid(item_id) else None
+    if doc is None:
+        return jsonify({'success': False, 'message': 'Not found'}, 404)
+    return jsonify(doc)
+
+# Announcements API
+async def api_announcements(request):
+    category = request.query_params.get('category', '')
+    query = {}
+    if category:
+        query['category'] = category
+
+    return await list_response(request, db['announcements'], query)
+
+async def api_announcement_detail(request):
+    return await detail_response(request, db['announcements'])
+
+# Lost & Found API
+async def api_lost_found(request):
+    category = request.query_params.get('category', '')
+    type_filter = request.query_params.get('type', '')  # 'lost' or 'found'
+
+    query = {}
+    if category:
+        query['category'] = category
+    if type_filter:
+        query['type'] = type_filter
+
+    return await list_response(request, db['lost_found'], query)
+
+async def api_lost_found_detail(request):
+    return await detail_response(request, db['lost_found'])
+
+# Timetable API
+async def api_timetable(request):
+    user_id = request.query_params.get('user_id', 'default')
+    day = request.query_params.get('day', '')
+    timetable = await db['timetables'].find_one({'user_id': user_id}, day_projection(day) if day else None)
+    if timetable:
+        return jsonify(timetable)
+    return jsonify({'schedule': []})
+
+# Complaints API
+async def api_complaints(request):
+    return await list_response(request, db['complaints'], {})
+
+async def api_complaints_queue(request):
+    args = query_args(request)
+    statuses = queue_statuses(args)
+    if statuses is None:
+        return jsonify({'success': False, 'message': 'Invalid status'}, 400)
+    cursor, limit = queue_cursor(db['complaints'], statuses, args, Config.MAX_ITEMS_PER_PAGE)
+    docs, next_cursor = split_page(await cursor.to_list(length=limit + 1), limit, QUEUE_SORT)
+    return jsonify({'items': docs, 'next_cursor': next_cursor})
+
+async def api_complaints_counts(request):
+    return jsonify(summarize_counts(await db[COUNTERS_COLLECTION].find_one({'_id': COUNTERS_ID})))
+
+async def api_complaint_detail(request):
+    return await detail_response(request, db['complaints'])
+
+# Skills API
+async def api_skills(request):
+    return await list_response(request, db['skills'], {})
+
+async def api_skill_detail(request):
+    return await detail_response(request, db['skills'])
+
+# News API
+async def api_news(request):
+    return await list_response(request, db['news'], {})
+
+async def api_news_detail(request):
+    return await detail_response(request, db['news'])
+
+# Polls API
+async def api_polls(request):
+    return await list_response(request, db['polls'], {})
+
+async def api_poll_detail(request):
+    return await detail_response(request, db['polls'])
+
+# Dashboard API
+async def dashboard_section(name, limit):
+    """Latest documents and the document count of one collection"""
+    collection = db[name]
+    latest, count = await asyncio.gather(
+        collection.find({}, summary_projection(name)).sort(PAGE_SORT).to_list(length=limit),
+        collection.estimated_document_count()
+    )
+    return {'latest': latest, 'count': count}
+
+async def api_dashboard(request):
+    limit = query_args(request).get('limit', type=int) or Config.DASHBOARD_ITEMS
+    limit = max(1, min(limit, Config.MAX_ITEMS_PER_PAGE))
+    sections = await asyncio.gather(*(dashboard_section(name, limit) for name in DASHBOARD_COLLECTIONS))
+    return jsonify(dict(zip(DASHBOARD_COLLECTIONS, sections)))
+
+# Search API
+async def api_search(request):
+    args = query_args(request)
+    q = args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': False, 'message': 'Missing search query'}, 400)
+
+    names = [name for name in args.get('collections', '').split(',') if name]
+    for name in names:
+        if name not in SEARCH_FIELDS:
+            return jsonify({'success': False, 'message': f'Not searchable: {name}'}, 400)
+    names = names or list(SEARCH_FIELDS)
+
+    limit = args.get('limit', type=int) or Config.ITEMS_PER_PAGE
+    limit = max(1, min(limit, Config.MAX_ITEMS_PER_PAGE))
+    page = max(1, args.get('page', 1, type=int))
+    offset = (page - 1) * limit
+    if offset + limit > Config.SEARCH_MAX_RESULTS:
+        return jsonify({'success': False, 'message': 'Page is beyond the result limit'}, 400)
+    if any(name in setup_errors for name in names):
+        return jsonify({'success': False, 'message': 'Search is unavailable'}, 503)
+
+    async def search_collection(name):
+        projection = summary_projection(name)
+        projection['score'] = {'$meta': 'textScore'}
+        cursor = db[name].find({'$text': {'$search': q}}, projection) \
+            .sort([('score', {'$meta': 'textScore'})]).limit(offset + limit + 1)
+        return [dict(doc, collection=name) async for doc in cursor]
+
+    hits = [hit for found in await asyncio.gather(*map(search_collection, names)) for hit in found]
+    hits.sort(key=lambda doc: doc['score'], reverse=True)
+    return jsonify({
+        'items': hits[offset:offset + limit],
+        'page': page,
+        'next_page': page + 1 if len(hits) > offset + limit else None
+    })
+
+# Native GET routes; other methods on the same paths, and detail paths that are
+# not ids (e.g. /api/skills/search), fall through to the Flask app
+routes = [
+    Route('/api/announcements', api_announcements),
+    Route('/api/announcements/{item_id:objectid}', api_announcement_detail),
+    Route('/api/lost-found', api_lost_found),
+    Route('/api/lost-found/{item_id:objectid}', api_lost_found_detail),
+    Route('/api/timetable', api_timetable),
+    Route('/api/complaints', api_complaints),
+    Route('/api/complaints/queue', api_complaints_queue),
+    Route('/api/complaints/counts', api_complaints_counts),
+    Route('/api/complaints/{item_id:objectid}', api_complaint_detail),
+    Route('/api/skills', api_skills),
+    Route('/api/skills/{item_id:objectid}', api_skill_detail),
+    Route('/api/news', api_news),
+    Route('/api/news/{item_id:objectid}', api_news_detail),
+    Route('/api/polls', api_polls),
+    Route('/api/polls/{item_id:objectid}', api_poll_detail),
+    Route('/api/dashboard', api_dashboard)
+]
+if settings['SEARCH_BACKEND'] == 'text':
+    routes.append(Route('/api/search', api_search))
+
+# Each passed-through request holds a thread; event streams hold theirs for as
+# long as the client listens, so they get their own pool sized to the feed
+routes += [
+    Route('/api/events', WSGIMiddleware(flask_app, workers=settings['EVENTS_MAX_SUBSCRIBERS'])),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=settings['ASGI_WSGI_WORKERS']))
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    exception_handlers={
+        InvalidCursor: handle_invalid_cursor,
+        InvalidFields: handle_invalid_fields
+    }
+)
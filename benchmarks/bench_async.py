@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Flask vs ASGI Throughput Benchmark
+Drives the same GET route on the Flask app and the ASGI app with a growing
+number of concurrent keep-alive connections and reports requests per second
+and mean latency for each. Start both servers first, e.g.:
+
+    gunicorn -w 4 -b 0.0.0.0:5000 app:app
+    uvicorn asgi_app:app --port 5001 --workers 4
+    python benchmarks/bench_async.py --path /api/announcements
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+async def connection_worker(host, port, path, deadline, latencies, errors):
+    """Send requests over one keep-alive connection until deadline"""
+    request = (f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+               f'Connection: keep-alive\r\n\r\n').encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+async def run_level(url, path, concurrency, duration):
+    parts = urlsplit(url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        connection_worker(parts.hostname, parts.port or 80, path, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    mean_ms = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+    return len(latencies) / elapsed, mean_ms, len(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--flask', default='http://localhost:5000', help='Flask app base URL')
+    parser.add_argument('--asgi', default='http://localhost:5001', help='ASGI app base URL')
+    parser.add_argument('--path', default='/api/announcements', help='route to request')
+    parser.add_argument('--concurrency', default='10,50,200', help='comma-separated connection counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    args = parser.parse_args()
+
+    print(f"📊 GET {args.path} for {args.duration:g}s per concurrency level")
+    print("=" * 64)
+    print(f"{'server':<8}{'conns':>8}{'req/s':>12}{'mean ms':>12}{'errors':>10}")
+    for concurrency in [int(level) for level in args.concurrency.split(',')]:
+        for name, url in [('flask', args.flask), ('asgi', args.asgi)]:
+            rps, mean_ms, errors = asyncio.run(run_level(url, args.path, concurrency, args.duration))
+            print(f"{name:<8}{concurrency:>8}{rps:>12.1f}{mean_ms:>12.2f}{errors:>10}")
+
+if __name__ == "__main__":
+    main()
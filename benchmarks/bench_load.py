@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+Drives the API routes of app.py from concurrent workers with a weighted
+request mix and reports throughput and p50/p95/p99 latency per route.
+
+Against a running server (load data first with run.py --synthetic-data):
+
+    python benchmarks/bench_load.py --url http://localhost:5000 --concurrency 32
+
+In process, through the Flask test client on an in-memory mongomock
+database seeded with synthetic documents (pip install mongomock), or on a
+real database with --mongo-uri:
+
+    python benchmarks/bench_load.py --profile vote-storm --output before.json
+    python benchmarks/bench_load.py --profile vote-storm --compare before.json
+
+mongomock evaluates neither $text nor the $substrCP snippet projection, so
+in-process runs search with the in-memory index and list pages carry no
+snippets; compare their numbers with each other, not with a real server.
+"""
+
+import argparse
+import bisect
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+
+LIST_ROUTES = {
+    'announcements': '/api/announcements',
+    'lost_found': '/api/lost-found',
+    'complaints': '/api/complaints',
+    'skills': '/api/skills',
+    'news': '/api/news',
+    'polls': '/api/polls'
+}
+
+class Context:
+    """Ids and options discovered from the target, shared by all workers"""
+
+    def __init__(self, users):
+        self.ids = {name: [] for name in LIST_ROUTES}
+        self.poll_options = {}
+        self.users = users
+        self._voter = 0
+        self._lock = threading.Lock()
+
+    def item(self, rng, name):
+        return rng.choice(self.ids[name]) if self.ids[name] else '000000000000000000000000'
+
+    def user(self, rng):
+        return f'user{rng.randrange(self.users):08d}'
+
+    def new_voter(self):
+        with self._lock:
+            self._voter += 1
+            return f'bench-{os.getpid()}-{self._voter}'
+
+def text(rng, low, high):
+    return ' '.join(rng.choice(synthetic.WORDS) for _ in range(rng.randint(low, high)))
+
+def vote(rng, ctx, poll_ids):
+    poll_id = rng.choice(poll_ids) if poll_ids else '000000000000000000000000'
+    options = ctx.poll_options.get(poll_id) or ['Yes']
+    # A few repeat votes exercise the 'Already voted' path
+    voter = f'bench-repeat-{rng.randrange(100)}' if rng.random() < 0.05 else ctx.new_voter()
+    return {'poll_id': poll_id, 'option': rng.choice(options), 'voter_id': voter}
+
+# (route label, method, weight, build(rng, ctx) -> (path, JSON body))
+READS = [
+    ('GET /api/announcements', 'GET', 8, lambda rng, ctx: (
+        '/api/announcements' + (f'?category={rng.choice(synthetic.ANNOUNCEMENT_CATEGORIES)}'
+                                if rng.random() < 0.5 else ''), None)),
+    ('GET /api/announcements/<item_id>', 'GET', 6, lambda rng, ctx: (
+        f"/api/announcements/{ctx.item(rng, 'announcements')}", None)),
+    ('GET /api/lost-found', 'GET', 5, lambda rng, ctx: (
+        '/api/lost-found' + (f"?type={rng.choice(['lost', 'found'])}" if rng.random() < 0.5 else ''), None)),
+    ('GET /api/lost-found/<item_id>', 'GET', 3, lambda rng, ctx: (
+        f"/api/lost-found/{ctx.item(rng, 'lost_found')}", None)),
+    ('GET /api/timetable', 'GET', 6, lambda rng, ctx: (f'/api/timetable?user_id={ctx.user(rng)}', None)),
+    ('GET /api/complaints', 'GET', 4, lambda rng, ctx: ('/api/complaints', None)),
+    ('GET /api/complaints/<item_id>', 'GET', 2, lambda rng, ctx: (
+        f"/api/complaints/{ctx.item(rng, 'complaints')}", None)),
+    ('GET /api/skills', 'GET', 4, lambda rng, ctx: ('/api/skills', None)),
+    ('GET /api/skills/<item_id>', 'GET', 2, lambda rng, ctx: (f"/api/skills/{ctx.item(rng, 'skills')}", None)),
+    ('GET /api/news', 'GET', 5, lambda rng, ctx: ('/api/news', None)),
+    ('GET /api/news/<item_id>', 'GET', 3, lambda rng, ctx: (f"/api/news/{ctx.item(rng, 'news')}", None)),
+    ('GET /api/polls', 'GET', 5, lambda rng, ctx: ('/api/polls', None)),
+    ('GET /api/polls/<item_id>', 'GET', 4, lambda rng, ctx: (f"/api/polls/{ctx.item(rng, 'polls')}", None)),
+    ('GET /api/search', 'GET', 4, lambda rng, ctx: (f'/api/search?q={text(rng, 1, 2).replace(" ", "+")}', None)),
+    ('GET /api/dashboard', 'GET', 4, lambda rng, ctx: ('/api/dashboard', None)),
+    ('GET /api/export/<name>', 'GET', 0.2, lambda rng, ctx: (
+        f"/api/export/polls?fields=votes&from={(datetime.now() - timedelta(days=1)).date().isoformat()}", None)),
+    ('GET /api/polls/vote-buffer', 'GET', 0.2, lambda rng, ctx: ('/api/polls/vote-buffer', None)),
+    ('GET /api/cache/stats', 'GET', 0.2, lambda rng, ctx: ('/api/cache/stats', None)),
+    ('GET /api/pool/stats', 'GET', 0.2, lambda rng, ctx: ('/api/pool/stats', None))
+]
+
+WRITES = [
+    ('POST /api/announcements', 'POST', 2, lambda rng, ctx: ('/api/announcements', {
+        'title': text(rng, 3, 8), 'content': text(rng, 20, 60),
+        'category': rng.choice(synthetic.ANNOUNCEMENT_CATEGORIES)})),
+    ('POST /api/lost-found', 'POST', 2, lambda rng, ctx: ('/api/lost-found', {
+        'title': f'{rng.choice(synthetic.COLORS)} {rng.choice(synthetic.ITEMS)}',
+        'description': text(rng, 8, 20), 'category': rng.choice(synthetic.ITEM_CATEGORIES),
+        'type': rng.choice(['lost', 'found']), 'location': rng.choice(synthetic.PLACES),
+        'contact': 'bench@college.edu'})),
+    ('POST /api/complaints', 'POST', 2, lambda rng, ctx: ('/api/complaints', {
+        'title': text(rng, 3, 7), 'description': text(rng, 10, 30),
+        'category': rng.choice(synthetic.COMPLAINT_CATEGORIES),
+        'room_number': rng.choice(synthetic.ROOMS), 'priority': rng.choice(synthetic.PRIORITIES)})),
+    ('PUT /api/complaints', 'PUT', 1, lambda rng, ctx: ('/api/complaints', {
+        'id': ctx.item(rng, 'complaints'), 'status': rng.choice(['in-progress', 'resolved'])})),
+    ('POST /api/skills', 'POST', 1, lambda rng, ctx: ('/api/skills', {
+        'title': text(rng, 2, 5), 'description': text(rng, 10, 30),
+        'category': rng.choice(synthetic.SKILL_CATEGORIES), 'instructor': 'Bench Mark',
+        'contact': 'bench@college.edu'})),
+    ('POST /api/news', 'POST', 1, lambda rng, ctx: ('/api/news', {
+        'title': text(rng, 4, 10), 'content': text(rng, 20, 60),
+        'category': rng.choice(synthetic.NEWS_CATEGORIES)})),
+    ('POST /api/polls', 'POST', 0.5, lambda rng, ctx: ('/api/polls', {
+        'question': text(rng, 5, 10) + '?', 'options': rng.choice(synthetic.POLL_OPTIONS)})),
+    ('PUT /api/polls', 'PUT', 4, lambda rng, ctx: ('/api/polls', vote(rng, ctx, ctx.ids['polls']))),
+    ('POST /api/timetable', 'POST', 2, lambda rng, ctx: ('/api/timetable', {
+        'user_id': ctx.user(rng), 'day': rng.choice(synthetic.DAYS),
+        'time': f'{rng.randint(8, 17):02d}:00', 'subject': rng.choice(synthetic.SUBJECTS),
+        'room': rng.choice(synthetic.ROOMS)})),
+    ('POST /api/<name>/bulk', 'POST', 0.5, lambda rng, ctx: ('/api/announcements/bulk', [
+        {'title': text(rng, 3, 8), 'content': text(rng, 20, 60),
+         'category': rng.choice(synthetic.ANNOUNCEMENT_CATEGORIES)} for _ in range(20)]))
+]
+
+def vote_storm(hot_polls):
+    """Campus-wide poll: most requests vote on a handful of hot polls"""
+    def hot(ctx):
+        return ctx.ids['polls'][:hot_polls]
+    return [
+        ('PUT /api/polls', 'PUT', 85, lambda rng, ctx: ('/api/polls', vote(rng, ctx, hot(ctx)))),
+        ('GET /api/polls/<item_id>', 'GET', 10, lambda rng, ctx: (
+            f"/api/polls/{rng.choice(hot(ctx) or ['000000000000000000000000'])}", None)),
+        ('GET /api/polls', 'GET', 5, lambda rng, ctx: ('/api/polls', None))
+    ]
+
+def build_mix(args):
+    """List of (label, method, cumulative weight, build) for the chosen profile"""
+    if args.profile == 'vote-storm':
+        ops = vote_storm(args.hot_polls)
+    else:
+        read_total = sum(op[2] for op in READS)
+        write_total = sum(op[2] for op in WRITES)
+        ops = [(label, method, weight / read_total * args.read_ratio, build)
+               for label, method, weight, build in READS]
+        ops += [(label, method, weight / write_total * (1 - args.read_ratio), build)
+                for label, method, weight, build in WRITES]
+    mix, total = [], 0.0
+    for label, method, weight, build in ops:
+        if weight > 0:
+            total += weight
+            mix.append((label, method, total, build))
+    return mix, total
+
+class HTTPTarget:
+    """Running server, one keep-alive connection per worker thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, b''
+
+class TestClientTarget:
+    """Flask test client, one per worker thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        try:
+            response = client.open(path, method=method, json=body)
+        except Exception:
+            # Unhandled errors propagate out of the test client in debug configurations
+            return 500, b''
+        return response.status_code, response.get_data()
+
+def in_process_app(args):
+    """Build the Flask app on mongomock (or --mongo-uri) and seed it when in memory"""
+    if args.mongo_uri:
+        os.environ['MONGODB_URI'] = args.mongo_uri
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("In-process runs need mongomock (pip install mongomock), --mongo-uri or --url")
+        import database
+        database.MongoClient = mongomock.MongoClient
+    import app as campuslink
+    application = campuslink.create_app(args.config)
+    application.extensions['response_cache'].enabled = not args.no_cache
+    if args.mongo_uri:
+        return application
+
+    campuslink.SNIPPET_FIELDS.clear()
+    application.config['SEARCH_BACKEND'] = 'memory'
+    db = application.extensions['mongo'].db
+    generator = synthetic.Generator(random.Random(args.seed), datetime.now(), 365)
+    for name in synthetic.COLLECTIONS:
+        docs = [getattr(generator, name)(index) for index in range(args.seed_docs)]
+        if docs:
+            db[name].insert_many(docs)
+    with application.app_context():
+        campuslink.ensure_indexes(db)
+    return application
+
+def discover(target, ctx):
+    """Collect ids (and poll options) from the first list page of each collection"""
+    for name, path in LIST_ROUTES.items():
+        fields = '_id,options' if name == 'polls' else '_id'
+        status, body = target.request('GET', f'{path}?limit=100&fields={fields}')
+        if status != 200:
+            print(f"⚠️  Could not list {name} (status {status}); its detail routes will 404")
+            continue
+        for doc in json.loads(body)['items']:
+            ctx.ids[name].append(doc['_id'])
+            if name == 'polls':
+                ctx.poll_options[doc['_id']] = doc.get('options')
+        if not ctx.ids[name]:
+            print(f"⚠️  No {name} found; its detail routes will 404")
+
+def worker(target, ctx, mix, total, seed, deadline, samples):
+    rng = random.Random(seed)
+    bounds = [op[2] for op in mix]
+    while time.perf_counter() < deadline:
+        label, method, _, build = mix[bisect.bisect(bounds, rng.random() * total)]
+        path, body = build(rng, ctx)
+        start = time.perf_counter()
+        status, _ = target.request(method, path, body)
+        samples.append((label, time.perf_counter() - start, status))
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(samples, elapsed):
+    by_route = {}
+    for label, latency, status in samples:
+        by_route.setdefault(label, []).append((latency, status))
+    by_route['ALL'] = [(latency, status) for _, latency, status in samples]
+    routes = {}
+    for label, rows in sorted(by_route.items()):
+        latencies = sorted(latency for latency, _ in rows)
+        routes[label] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, status in rows if not 200 <= status < 400),
+            'rps': round(len(rows) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3)
+        }
+    return routes
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_report(routes, previous=None):
+    header = f"{'route':<36}{'reqs':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if previous:
+        header += f"{'Δp95':>9}"
+    print(header)
+    for label, row in routes.items():
+        line = (f"{label:<36}{row['requests']:>8}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}")
+        if previous and label in previous and previous[label]['p95_ms']:
+            change = (row['p95_ms'] / previous[label]['p95_ms'] - 1) * 100
+            line += f"{change:>+8.0f}%"
+        print(line)
+    print("(latencies in ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--mongo-uri', help='in-process runs: use this MongoDB instead of mongomock')
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'default'),
+                        help='in-process runs: configuration name')
+    parser.add_argument('--no-cache', action='store_true', help='in-process runs: disable the response cache')
+    parser.add_argument('--seed-docs', type=int, default=1000,
+                        help='in-process runs on mongomock: synthetic documents per collection')
+    parser.add_argument('--profile', choices=['mixed', 'vote-storm'], default='mixed')
+    parser.add_argument('--read-ratio', type=float, default=0.9, help='mixed profile: share of reads')
+    parser.add_argument('--hot-polls', type=int, default=3, help='vote-storm profile: polls being voted on')
+    parser.add_argument('--users', type=int, default=1000, help='timetable user ids user00000000..')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds before measuring')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--compare', help='earlier JSON results to compare p95 against')
+    args = parser.parse_args()
+
+    if args.url:
+        target = HTTPTarget(args.url)
+        target_name = args.url
+    else:
+        target = TestClientTarget(in_process_app(args))
+        target_name = 'test client on ' + ('MongoDB' if args.mongo_uri else 'mongomock')
+        if not args.mongo_uri:
+            # Only the seeded users have timetables
+            args.users = min(args.users, args.seed_docs)
+    ctx = Context(max(1, args.users))
+    discover(target, ctx)
+    mix, total = build_mix(args)
+
+    for phase, duration in [('warmup', args.warmup), ('measure', args.duration)]:
+        if duration <= 0:
+            continue
+        samples = []
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=worker, args=(target, ctx, mix, total, args.seed + i, deadline, samples))
+                   for i in range(args.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    routes = summarize(samples, elapsed)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['routes']
+
+    print(f"📊 {args.profile} profile, {args.concurrency} workers, {args.duration:g}s against {target_name}")
+    print("=" * 86)
+    print_report(routes, previous)
+
+    if args.output:
+        results = {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'target': target_name,
+            'settings': {name: getattr(args, name) for name in
+                         ['profile', 'read_ratio', 'hot_polls', 'concurrency', 'duration', 'seed',
+                          'seed_docs', 'no_cache']},
+            'routes': routes
+        }
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Serialization Micro-Benchmark
+Compares the old json.dumps/json.loads round trip with the MongoJSONProvider
+and the streaming encoder on a page of 10k announcements. No MongoDB needed.
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, json_serial, iter_page_json
+
+N_DOCS = 10000
+ROUNDS = 5
+
+def make_announcements(n):
+    """Build n announcement documents shaped like the ones the API stores"""
+    now = datetime.now()
+    return [
+        {
+            '_id': ObjectId(),
+            'title': f'Announcement {i}',
+            'content': 'The examination schedule has been released. ' * 5,
+            'category': ('academic', 'events', 'facilities')[i % 3],
+            'date': now - timedelta(minutes=i),
+            'author': 'Academic Office'
+        }
+        for i in range(n)
+    ]
+
+def old_path(docs):
+    return jsonify(json.loads(json.dumps(docs, default=json_serial))).get_data()
+
+def provider_path(docs):
+    return jsonify({'items': docs, 'next_cursor': None}).get_data()
+
+def streaming_path(docs):
+    return ''.join(iter_page_json(iter(docs), len(docs)))
+
+def bench(fn, docs):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    docs = make_announcements(N_DOCS)
+    print(f"📊 Serializing {N_DOCS} announcements (best of {ROUNDS})")
+    print("=" * 50)
+    with app.app_context():
+        results = [(name, bench(fn, docs)) for name, fn in [
+            ('dumps/loads round trip', old_path),
+            ('MongoJSONProvider', provider_path),
+            ('streaming encoder', streaming_path)
+        ]]
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:<24} {elapsed * 1000:8.1f} ms  ({baseline / elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Complaints triage queue for CampusLink.
+Each complaint stores a numeric priority_rank next to its priority, so the
+maintenance desk queue is an index scan ordered by (priority_rank, date, _id):
+most urgent first, oldest first within a priority. Complaint counts per
+status and priority live in one counters document that the write paths update
+with $inc, so the desk's open-ticket totals are a single small read.
+"""
+
+from pymongo import ASCENDING, UpdateMany
+
+PRIORITY_RANK = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+# Priorities outside PRIORITY_RANK sort after every known one
+UNRANKED = len(PRIORITY_RANK)
+
+COMPLAINT_STATUSES = ['pending', 'in-progress', 'resolved']
+OPEN_STATUSES = ['pending', 'in-progress']
+
+QUEUE_SORT = [('priority_rank', ASCENDING), ('date', ASCENDING), ('_id', ASCENDING)]
+
+COUNTERS_COLLECTION = 'counters'
+COUNTERS_ID = 'complaints'
+
+def priority_rank(priority):
+    return PRIORITY_RANK.get(priority, UNRANKED) if isinstance(priority, str) else UNRANKED
+
+def counter_key(value, known):
+    # Counter field names come from stored data, so anything unexpected is pooled
+    return value if isinstance(value, str) and value in known else 'other'
+
+def queue_query(statuses, category='', room_number='', after=None):
+    """Filter for the triage queue, continuing after an (rank, date, _id) key"""
+    query = {'status': statuses[0] if len(statuses) == 1 else {'$in': statuses}}
+    if category:
+        query['category'] = category
+    if room_number:
+        query['room_number'] = room_number
+    if after:
+        rank, date, oid = after
+        query = {'$and': [query, {'$or': [
+            {'priority_rank': {'$gt': rank}},
+            {'priority_rank': rank, 'date': {'$gt': date}},
+            {'priority_rank': rank, 'date': date, '_id': {'$gt': oid}}
+        ]}]}
+    return query
+
+def counter_inc(priority, status, amount=1):
+    """$inc document for one complaint of priority entering (or leaving) status"""
+    field = f"counts.{counter_key(status, COMPLAINT_STATUSES)}.{counter_key(priority, PRIORITY_RANK)}"
+    return {'$inc': {field: amount}}
+
+def status_change_inc(priority, old_status, new_status):
+    """$inc document moving one complaint from old_status to new_status"""
+    update = counter_inc(priority, old_status, -1)
+    update['$inc'].update(counter_inc(priority, new_status)['$inc'])
+    return update
+
+def summarize_counts(doc):
+    """Totals by status, open totals by priority and the raw status x priority counts"""
+    counts = (doc or {}).get('counts', {})
+    by_status = {status: sum(counts.get(status, {}).values()) for status in counts}
+    open_by_priority = {}
+    for status in OPEN_STATUSES:
+        for priority, count in counts.get(status, {}).items():
+            open_by_priority[priority] = open_by_priority.get(priority, 0) + count
+    return {
+        'open': sum(by_status.get(status, 0) for status in OPEN_STATUSES),
+        'by_status': by_status,
+        'open_by_priority': open_by_priority,
+        'counts': counts
+    }
+
+def backfill_priority_rank(db):
+    """Set priority_rank on complaints stored without one; returns how many changed"""
+    missing = {'priority_rank': {'$exists': False}}
+    updates = [UpdateMany(dict(missing, priority=priority), {'$set': {'priority_rank': rank}})
+               for priority, rank in PRIORITY_RANK.items()]
+    updates.append(UpdateMany(dict(missing, priority={'$nin': list(PRIORITY_RANK)}),
+                              {'$set': {'priority_rank': UNRANKED}}))
+    return db['complaints'].bulk_write(updates, ordered=False).modified_count
+
+def rebuild_counters(db):
+    """Recount every complaint into the counters document; returns the counts"""
+    counts = {}
+    for row in db['complaints'].aggregate([
+        {'$group': {'_id': {'status': '$status', 'priority': '$priority'}, 'count': {'$sum': 1}}}
+    ]):
+        status = counter_key(row['_id'].get('status'), COMPLAINT_STATUSES)
+        priority = counter_key(row['_id'].get('priority'), PRIORITY_RANK)
+        by_priority = counts.setdefault(status, {})
+        by_priority[priority] = by_priority.get(priority, 0) + row['count']
+    db[COUNTERS_COLLECTION].replace_one({'_id': COUNTERS_ID}, {'_id': COUNTERS_ID, 'counts': counts},
+                                        upsert=True)
+    return counts
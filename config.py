@@ -9,6 +9,12 @@ class Config:
     MONGODB_URI = os.environ.get('MONGODB_URI') or 'mongodb://localhost:27017/'
     MONGODB_DB = os.environ.get('MONGODB_DB') or 'campuslink'
     
+    # MongoDB connection pool, per process (unset values use the driver defaults)
+    MONGODB_MAX_POOL_SIZE = int(os.environ.get('MONGODB_MAX_POOL_SIZE', 100))
+    MONGODB_MIN_POOL_SIZE = int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.environ.get('MONGODB_MAX_IDLE_TIME_MS', 0)) or None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 0)) or None
+    
     # Upload configuration
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -30,10 +36,80 @@ class Config:
     
     # Pagination
     ITEMS_PER_PAGE = 20
+    MAX_ITEMS_PER_PAGE = 100
+    # Streamed pages (?stream=1) are encoded chunk by chunk, so they can be larger
+    STREAM_MAX_ITEMS_PER_PAGE = 10000
+    STREAM_CHUNK_SIZE = 200
+    
+    # Bulk ingestion: records per insert_many batch, per-record and per-upload limits
+    BULK_BATCH_SIZE = 500
+    BULK_MAX_RECORD_BYTES = 1024 * 1024
+    BULK_MAX_ERRORS = 1000
+    BULK_MAX_CONTENT_LENGTH = 1024 * 1024 * 1024
+    
+    # Request and MongoDB latency metrics served on /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Slow MongoDB operations: log threshold (0 turns it off) and optional explain() capture
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'False').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_INTERVAL_S = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL_S', 10))
+    SLOW_QUERY_DOCS_RATIO = 10
+    SLOW_QUERY_MAX_ENTRIES = 200
+    
+    # Room occupancy index: rebuilt from all timetables when older than this (0: never)
+    ROOM_INDEX_MAX_AGE_S = int(os.environ.get('ROOM_INDEX_MAX_AGE_S', 300))
+    
+    # Lost & found matching: matches kept per report, lowest score that counts as
+    # a match, and how often each process re-reads active reports (0: never)
+    MATCH_TOP_K = 10
+    MATCH_MIN_SCORE = 0.45
+    MATCH_INDEX_MAX_AGE_S = int(os.environ.get('MATCH_INDEX_MAX_AGE_S', 300))
+    
+    # Skills search: seconds facet counts are reused for the same filters (0: off)
+    SKILLS_FACET_CACHE_TTL_S = int(os.environ.get('SKILLS_FACET_CACHE_TTL_S', 30))
+    SKILLS_FACET_CACHE_MAX_ENTRIES = 512
+    
+    # Event feed (/api/events): events kept for Last-Event-ID resume, events a
+    # stream may fall behind before it is dropped, streams per process, keepalive
+    EVENTS_HISTORY = 1000
+    EVENTS_QUEUE_SIZE = 100
+    EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 100))
+    EVENTS_HEARTBEAT_S = 15
+    EVENTS_RETRY_MS = 3000
+    
+    # Threads for the requests asgi_app.py passes through to the Flask app
+    ASGI_WSGI_WORKERS = int(os.environ.get('ASGI_WSGI_WORKERS', 10))
+    
+    # Activity stats: most buckets one /api/stats response may span
+    STATS_MAX_BUCKETS = 1000
+    
+    # Export: documents read per cursor batch and written per streamed chunk
+    EXPORT_BATCH_SIZE = 1000
+    
+    # Dashboard: items per section and threads for the concurrent per-collection queries
+    DASHBOARD_ITEMS = 5
+    DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', 6))
+    
+    # Search: 'text' uses MongoDB text indexes, 'memory' an in-process inverted index
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'text')
+    SEARCH_MAX_RESULTS = 1000
+    # Rebuild the memory backend's index in the background after this many seconds
+    SEARCH_INDEX_MAX_AGE_S = int(os.environ.get('SEARCH_INDEX_MAX_AGE_S', 300))
+    
+    # Poll vote write-behind buffer
+    VOTE_BUFFER_ENABLED = os.environ.get('VOTE_BUFFER_ENABLED', 'False').lower() == 'true'
+    VOTE_BUFFER_FLUSH_INTERVAL_MS = int(os.environ.get('VOTE_BUFFER_FLUSH_INTERVAL_MS', 250))
+    VOTE_BUFFER_FLUSH_SIZE = int(os.environ.get('VOTE_BUFFER_FLUSH_SIZE', 500))
+    VOTE_BUFFER_MAX_PENDING = int(os.environ.get('VOTE_BUFFER_MAX_PENDING', 10000))
     
     # Cache settings
     CACHE_TYPE = 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_MAX_ENTRIES = 1024
+    CACHE_MAX_BYTES = 32 * 1024 * 1024
+    # How often each process re-reads the shared cache version stamps
+    CACHE_VERSION_TTL_S = float(os.environ.get('CACHE_VERSION_TTL_S', 1))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,153 @@
+"""
+MongoDB connection handling for CampusLink.
+The MongoClient is built lazily from an app's MONGODB_* settings, separately
+in every process, so gunicorn workers forked after a --preload import never
+share the parent's sockets; each process prepares the database (e.g. creates
+required indexes) before first use. Connection pool checkout waits are
+recorded so pool sizing can be checked against real traffic.
+"""
+
+import os
+import threading
+import time
+from pymongo import MongoClient, monitoring
+
+def client_options(settings):
+    """MongoClient keyword arguments for the pool settings in a config mapping"""
+    options = {
+        'maxPoolSize': settings['MONGODB_MAX_POOL_SIZE'],
+        'minPoolSize': settings['MONGODB_MIN_POOL_SIZE'],
+        'maxIdleTimeMS': settings['MONGODB_MAX_IDLE_TIME_MS'],
+        'waitQueueTimeoutMS': settings['MONGODB_WAIT_QUEUE_TIMEOUT_MS']
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Records how long requests wait to check a connection out of the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.failed_checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.open_connections = 0
+            self.checked_out = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'failed_checkouts': self.failed_checkouts,
+                'mean_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'open_connections': self.open_connections,
+                'checked_out': self.checked_out
+            }
+
+    def connection_check_out_started(self, event):
+        # Checkout start and finish are reported on the requesting thread
+        self._started.time = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = time.perf_counter() - getattr(self._started, 'time', time.perf_counter())
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failed_checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+class MongoConnection:
+    """One MongoClient per process, created on first use"""
+
+    def __init__(self, settings, listeners=(), on_connect=None):
+        self.uri = settings['MONGODB_URI']
+        self.db_name = settings['MONGODB_DB']
+        self.options = client_options(settings)
+        self.pool_stats = PoolStats()
+        self.listeners = [self.pool_stats, *listeners]
+        # Called with the database once per process before the client is used
+        self.on_connect = on_connect
+        self._setup = None
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # A client inherited across fork is abandoned, not closed:
+                    # its sockets still belong to the parent process
+                    self.pool_stats.reset()
+                    client = MongoClient(self.uri, event_listeners=self.listeners, **self.options)
+                    try:
+                        setup = self.on_connect(client[self.db_name]) if self.on_connect else None
+                    except Exception:
+                        # Not connected yet: the next use tries again
+                        client.close()
+                        raise
+                    self._client, self._setup = client, setup
+                    self._pid = os.getpid()
+        return self._client
+
+    @property
+    def setup(self):
+        """What on_connect returned in this process"""
+        self.client
+        return self._setup
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    def collection(self, name):
+        """Collection handle for use outside a request, e.g. in background threads"""
+        return LazyCollection(self, name)
+
+class LazyCollection:
+    """Resolves to the collection of the current process's client on every use"""
+
+    def __init__(self, connection, name):
+        self._connection = connection
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._connection.db[self.name], attr)
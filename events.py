@@ -0,0 +1,172 @@
+"""
+Server-sent event feed for CampusLink.
+Write routes publish small deltas (a new announcement, a complaint's new
+status, a poll's current tallies) to an in-process EventBroker. Every open
+/api/events stream is a subscriber with its own bounded queue, and an idle
+one just waits on its condition variable until an event or a heartbeat is
+due. A subscriber that falls too far behind is disconnected and catches up
+through Last-Event-ID like any reconnecting client, from the last
+EVENTS_HISTORY events. Events only reach subscribers in the process that
+published them.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from export import json_serial
+
+class Subscriber:
+    """One stream's pending events, bounded and coalesced by key"""
+
+    def __init__(self, types, max_pending):
+        self.types = types  # None: every type
+        self.max_pending = max_pending
+        self.closed = False
+        self.overflowed = False
+        self._pending = OrderedDict()  # coalescing key -> event
+        self._condition = threading.Condition()
+
+    def put(self, event):
+        if self.types is not None and event['type'] not in self.types:
+            return
+        with self._condition:
+            if self.closed:
+                return
+            # A keyed event (a poll's tallies) replaces an undelivered older one
+            key = (event['type'], event['key']) if event['key'] is not None else event['id']
+            self._pending.pop(key, None)
+            self._pending[key] = event
+            if len(self._pending) > self.max_pending:
+                self.overflowed = True
+                self.closed = True
+                self._pending.clear()
+            self._condition.notify()
+
+    def get(self, timeout):
+        """Next pending event, or None after timeout seconds or once closed"""
+        with self._condition:
+            if not self._pending and not self.closed:
+                self._condition.wait(timeout)
+            if self._pending:
+                return self._pending.popitem(last=False)[1]
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+class EventBroker:
+    """In-process publish/subscribe with a replay history; call init_app to configure"""
+
+    def __init__(self, history=1000, queue_size=100, max_subscribers=100, heartbeat=15.0, retry_ms=3000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._epoch = None
+        self._seq = 0
+        self.published = 0
+        self.overflows = 0
+
+    def init_app(self, app):
+        self._history = deque(maxlen=app.config['EVENTS_HISTORY'])
+        self.queue_size = app.config['EVENTS_QUEUE_SIZE']
+        self.max_subscribers = app.config['EVENTS_MAX_SUBSCRIBERS']
+        self.heartbeat = app.config['EVENTS_HEARTBEAT_S']
+        self.retry_ms = app.config['EVENTS_RETRY_MS']
+
+    def _check_process(self):
+        # Event ids start over in every process, so each process gets its own epoch
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._epoch = f'{int(time.time()):x}{self._pid:x}'
+            self._seq = 0
+            self._history.clear()
+            self._subscribers = set()
+
+    def publish(self, event_type, data, key=None):
+        """Send data to every subscriber of event_type; events with the same key supersede each other"""
+        payload = json.dumps(data, default=json_serial, separators=(',', ':'))
+        with self._lock:
+            self._check_process()
+            self._seq += 1
+            event = {'id': f'{self._epoch}-{self._seq}', 'seq': self._seq, 'type': event_type,
+                     'key': key, 'data': payload}
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event)
+            if subscriber.overflowed:
+                with self._lock:
+                    if subscriber in self._subscribers:
+                        self._subscribers.discard(subscriber)
+                        self.overflows += 1
+
+    def subscribe(self, last_event_id=None, types=None):
+        """Register a subscriber, replaying what it missed after last_event_id; None when full"""
+        subscriber = Subscriber(types, self.queue_size)
+        with self._lock:
+            self._check_process()
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if last_event_id:
+                epoch, _, seq = last_event_id.partition('-')
+                oldest = self._history[0]['seq'] if self._history else self._seq + 1
+                if epoch != self._epoch or not seq.isdigit() or int(seq) < oldest - 1 or int(seq) > self._seq:
+                    # Too old, or from another process: the client has to reload its lists
+                    subscriber.put(self._reset_event())
+                else:
+                    for event in self._history:
+                        if event['seq'] > int(seq):
+                            subscriber.put(event)
+                    if subscriber.overflowed:
+                        # Missed more than one queue holds: replaying would end the
+                        # stream before it starts, on every reconnect
+                        self.overflows += 1
+                        subscriber = Subscriber(types, self.queue_size)
+                        subscriber.put(self._reset_event())
+            if not subscriber.closed:
+                self._subscribers.add(subscriber)
+        return subscriber
+
+    def _reset_event(self):
+        return {'id': f'{self._epoch}-{self._seq}', 'type': 'reset', 'key': None, 'data': '{}'}
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber):
+        """text/event-stream chunks for subscriber until it is closed or the client goes away"""
+        try:
+            yield f'retry: {self.retry_ms}\n\n'
+            while True:
+                event = subscriber.get(self.heartbeat)
+                if event is not None:
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {event['data']}\n\n"
+                elif subscriber.closed:
+                    # Overflowed: ending the stream makes the client reconnect with Last-Event-ID
+                    return
+                else:
+                    # Keeps proxies from timing out and finds disconnected clients
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'history': len(self._history),
+                'overflows': self.overflows
+            }
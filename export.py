@@ -0,0 +1,181 @@
+"""
+Streaming export of CampusLink collections as NDJSON or CSV.
+Documents are read through a batched cursor in _id order and encoded one
+batch at a time by a generator, so memory use stays constant however large
+the collection is. An export can be resumed from the last _id it wrote.
+Without explicit fields, CSV columns are every field that appears in the
+exported documents, found by an aggregation before the export starts.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from bson import ObjectId
+
+EXPORTABLE = {
+    'announcements', 'lost_found', 'timetables', 'complaints',
+    'skills', 'news', 'polls', 'poll_votes'
+}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+def json_serial(obj):
+    """JSON serializer for objects not serializable by default json code"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError("Type %s not serializable" % type(obj))
+
+def parse_date(value):
+    """Naive datetime for an ISO 8601 date, or None when it is empty.
+
+    Documents are dated with naive local times (datetime.now()), so a value
+    with a UTC offset is converted to local time before it is compared.
+    """
+    if not value:
+        return None
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date
+
+def export_query(date_from=None, date_to=None, after=None):
+    """Filter for an export: optional [date_from, date_to) range, resuming after an _id"""
+    query = {}
+    if date_from or date_to:
+        query['date'] = {}
+        if date_from:
+            query['date']['$gte'] = date_from
+        if date_to:
+            query['date']['$lt'] = date_to
+    if after:
+        query['_id'] = {'$gt': ObjectId(after)}
+    return query
+
+def iter_export(collection, fmt, query, fields=None, batch_size=1000, header=True):
+    """Yield the matching documents of collection encoded as fmt, one batch per chunk.
+
+    header=False leaves out the CSV header row, e.g. when appending to a file
+    that has one; pass that file's columns as fields.
+    """
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields}
+    cursor = collection.find(query, projection).sort('_id', 1).batch_size(batch_size)
+    if fmt == 'csv':
+        return _iter_csv(cursor, fields or csv_columns(collection, query), batch_size, header)
+    return _iter_ndjson(cursor, batch_size)
+
+def csv_columns(collection, query):
+    """Every field of the documents matching query, in the order they first appear"""
+    pipeline = [
+        {'$match': query},
+        {'$sort': {'_id': 1}},
+        {'$project': {'fields': {'$objectToArray': '$$ROOT'}}},
+        {'$unwind': {'path': '$fields', 'includeArrayIndex': 'position'}},
+        {'$group': {'_id': '$fields.k', 'first': {'$first': '$_id'}, 'position': {'$first': '$position'}}},
+        {'$sort': {'first': 1, 'position': 1}}
+    ]
+    return [doc['_id'] for doc in collection.aggregate(pipeline)]
+
+def csv_header(path):
+    """Columns of an earlier CSV export file, or None when it has no header row"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), None)
+
+def _iter_ndjson(cursor, batch_size):
+    encoder = json.JSONEncoder(default=json_serial)
+    lines = []
+    for doc in cursor:
+        lines.append(encoder.encode(doc))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def _iter_csv(cursor, fields, batch_size, header):
+    buffer = io.StringIO()
+    columns = ['_id'] + [name for name in fields if name != '_id']
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    rows = 0
+    for doc in cursor:
+        if header:
+            writer.writeheader()
+            header = False
+        writer.writerow({name: _csv_value(value) for name, value in doc.items()})
+        rows += 1
+        if rows == batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=json_serial)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def last_exported_id(path, fmt, tail_bytes=2 * 1024 * 1024):
+    """_id of the last complete record in an earlier export file, or None.
+
+    Anything after that record, left half-written by an interrupted export,
+    is truncated away so the file can be appended to.
+    """
+    if not os.path.exists(path):
+        return None
+    if fmt == 'csv':
+        last, end = _last_csv_row(path)
+    else:
+        last, end = _last_ndjson_line(path, tail_bytes)
+    with open(path, 'rb+') as f:
+        f.truncate(end)
+    return last
+
+def _last_ndjson_line(path, tail_bytes):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        start = max(0, f.tell() - tail_bytes)
+        f.seek(start)
+        tail = f.read()
+    end = tail.rfind(b'\n') + 1
+    for line in reversed(tail[:end].splitlines()):
+        try:
+            candidate = json.loads(line)['_id']
+        except (ValueError, KeyError, TypeError):
+            continue
+        if ObjectId.is_valid(candidate):
+            return candidate, start + end
+    return None, start + end
+
+def _last_csv_row(path):
+    # Quoted cells may span lines, so whole rows are read from the start
+    consumed = 0
+    def lines(f):
+        nonlocal consumed
+        for line in f:
+            if not line.endswith('\n'):
+                return
+            consumed += len(line.encode('utf-8'))
+            yield line
+    last, end, width = None, 0, None
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(lines(f)):
+            if width is None:
+                width = len(row)
+            elif len(row) != width or not ObjectId.is_valid(row[0]):
+                break
+            else:
+                last = row[0]
+            end = consumed
+    return last, end
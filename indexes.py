@@ -0,0 +1,139 @@
+"""
+CampusLink Index Registry
+Declares the indexes each query shape in app.py depends on, applies them
+idempotently and reports indexes that are missing, undeclared or unused.
+"""
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from search_index import SEARCH_FIELDS
+from complaint_queue import QUEUE_SORT
+
+# Sort order used by every paginated list endpoint
+NEWEST_FIRST = [('date', DESCENDING), ('_id', DESCENDING)]
+
+INDEXES = {
+    'announcements': [
+        # GET /api/announcements
+        IndexModel(NEWEST_FIRST, name='date_id'),
+        # GET /api/announcements?category=
+        IndexModel([('category', ASCENDING)] + NEWEST_FIRST, name='category_date_id'),
+    ],
+    'lost_found': [
+        # GET /api/lost-found
+        IndexModel(NEWEST_FIRST, name='date_id'),
+        # GET /api/lost-found?category=
+        IndexModel([('category', ASCENDING)] + NEWEST_FIRST, name='category_date_id'),
+        # GET /api/lost-found?type=
+        IndexModel([('type', ASCENDING)] + NEWEST_FIRST, name='type_date_id'),
+        # GET /api/lost-found?type=&category=
+        IndexModel([('type', ASCENDING), ('category', ASCENDING)] + NEWEST_FIRST,
+                   name='type_category_date_id'),
+    ],
+    'timetables': [
+        # GET/POST /api/timetable look up one document per user
+        IndexModel([('user_id', ASCENDING)], name='user_id', unique=True),
+    ],
+    'complaints': [
+        # GET /api/complaints
+        IndexModel(NEWEST_FIRST, name='date_id'),
+        # GET /api/complaints/queue
+        IndexModel([('status', ASCENDING)] + QUEUE_SORT, name='status_rank_date_id'),
+        # GET /api/complaints/queue?category=
+        IndexModel([('status', ASCENDING), ('category', ASCENDING)] + QUEUE_SORT,
+                   name='status_category_rank_date_id'),
+        # GET /api/complaints/queue?room_number=
+        IndexModel([('status', ASCENDING), ('room_number', ASCENDING)] + QUEUE_SORT,
+                   name='status_room_rank_date_id'),
+    ],
+    'skills': [
+        # GET /api/skills
+        IndexModel(NEWEST_FIRST, name='date_id'),
+        # GET /api/skills/search?status=
+        IndexModel([('status', ASCENDING)] + NEWEST_FIRST, name='status_date_id'),
+        # GET /api/skills/search?status=&category=
+        IndexModel([('status', ASCENDING), ('category', ASCENDING)] + NEWEST_FIRST,
+                   name='status_category_date_id'),
+        # GET /api/skills/search?status=&price_band=
+        IndexModel([('status', ASCENDING), ('price_band', ASCENDING)] + NEWEST_FIRST,
+                   name='status_price_band_date_id'),
+    ],
+    'news': [
+        # GET /api/news
+        IndexModel(NEWEST_FIRST, name='date_id'),
+    ],
+    'polls': [
+        # GET /api/polls
+        IndexModel(NEWEST_FIRST, name='date_id'),
+    ],
+    'rollups': [
+        # GET /api/stats/<collection>
+        IndexModel([('collection', ASCENDING), ('bucket', ASCENDING), ('start', ASCENDING)],
+                   name='collection_bucket_start'),
+    ],
+    'poll_votes': [
+        # PUT /api/polls relies on this to reject a second vote per voter
+        IndexModel([('poll_id', ASCENDING), ('voter_id', ASCENDING)],
+                   name='poll_voter', unique=True),
+    ],
+}
+
+# GET /api/search with SEARCH_BACKEND = 'text'
+for _name, _weights in SEARCH_FIELDS.items():
+    INDEXES[_name].append(IndexModel([(field, TEXT) for field in _weights],
+                                     weights=_weights, name='text'))
+
+# Indexes the app is not correct without (a second vote would be accepted,
+# text search would fail); every app process creates them on first connect
+REQUIRED_INDEXES = {
+    'poll_votes': {'poll_voter'},
+    **{name: {'text'} for name in SEARCH_FIELDS}
+}
+
+def ensure_indexes(db, indexes=None):
+    """Create every declared index (or those in indexes); existing indexes with the same spec are left alone.
+
+    Returns {collection: error message} for collections whose indexes could
+    not be created, e.g. a unique index over duplicate data.
+    """
+    errors = {}
+    for name, models in INDEXES.items():
+        if indexes is not None:
+            models = [model for model in models if model.document['name'] in indexes.get(name, ())]
+        if not models:
+            continue
+        try:
+            db[name].create_indexes(models)
+        except OperationFailure as e:
+            errors[name] = str(e)
+    return errors
+
+def ensure_required_indexes(db):
+    """Create the REQUIRED_INDEXES; returns {collection: error message} like ensure_indexes"""
+    return ensure_indexes(db, REQUIRED_INDEXES)
+
+def index_report(db):
+    """Compare the declared indexes with what each collection actually has.
+
+    For every collection returns the declared indexes that are missing, the
+    existing indexes nobody declared, and the indexes the server has not used
+    since it started (when $indexStats is available).
+    """
+    report = {}
+    for name, models in INDEXES.items():
+        collection = db[name]
+        declared = {model.document['name'] for model in models}
+        existing = set(collection.index_information()) - {'_id_'}
+        try:
+            unused = sorted(
+                stats['name'] for stats in collection.aggregate([{'$indexStats': {}}])
+                if stats['name'] != '_id_' and stats['accesses']['ops'] == 0
+            )
+        except OperationFailure:
+            unused = None
+        report[name] = {
+            'missing': sorted(declared - existing),
+            'undeclared': sorted(existing - declared),
+            'unused': unused
+        }
+    return report
@@ -0,0 +1,152 @@
+"""
+Bulk ingestion helpers for CampusLink.
+Records are parsed one at a time from a request body stream, either a JSON
+array or newline-delimited JSON, and inserted in fixed-size unordered
+insert_many batches, so memory use does not grow with the size of the upload.
+"""
+
+import codecs
+import json
+from pymongo.errors import BulkWriteError
+
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+_decoder = json.JSONDecoder()
+
+class MalformedBody(ValueError):
+    """Raised when the body can no longer be parsed; later records are lost"""
+
+def iter_ndjson(stream, max_record_bytes):
+    """Yield (index, record or ValueError) for each non-blank line of stream"""
+    index = 0
+    while True:
+        line = stream.readline(max_record_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_record_bytes and not line.endswith(b'\n'):
+            # Skip the rest of the oversized line
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_record_bytes)
+            yield index, ValueError('record too large')
+            index += 1
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line)
+        except ValueError as e:
+            yield index, ValueError(f'invalid JSON: {e}')
+        index += 1
+
+def iter_json_array(stream, max_record_bytes, chunk_size=64 * 1024):
+    """Yield (index, record) for each element of a JSON array, reading stream in chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(chunk_size)
+        try:
+            if not chunk:
+                eof = True
+                buffer += decoder.decode(b'', final=True)
+            else:
+                buffer += decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise MalformedBody('body is not UTF-8')
+
+    def next_char():
+        """Drop leading whitespace and return the next character ('' at end)"""
+        nonlocal buffer
+        while True:
+            buffer = buffer.lstrip()
+            if buffer or eof:
+                return buffer[:1]
+            fill()
+
+    if next_char() != '[':
+        raise MalformedBody('expected a JSON array')
+    buffer = buffer[1:]
+    if next_char() == ']':
+        return
+
+    index = 0
+    while True:
+        next_char()
+        # A value that ends exactly at the end of the buffer may continue in the next chunk
+        while True:
+            try:
+                record, end = _decoder.raw_decode(buffer)
+                if end < len(buffer) or eof:
+                    break
+            except ValueError:
+                if eof:
+                    raise MalformedBody(f'invalid JSON in record {index}')
+            if len(buffer) > max_record_bytes:
+                raise MalformedBody(f'record {index} too large')
+            fill()
+        buffer = buffer[end:]
+        yield index, record
+        index += 1
+
+        separator = next_char()
+        buffer = buffer[1:]
+        if separator == ']':
+            return
+        if separator != ',':
+            raise MalformedBody(f'expected , or ] after record {index - 1}')
+
+def bulk_insert(collection, records, build, batch_size, max_errors, on_insert=None):
+    """Validate records with build() and insert them in unordered batches.
+
+    records yields (index, data) pairs where data may be an exception raised
+    while parsing it. Returns a summary with per-record errors, of which the
+    first max_errors are kept.
+    """
+    summary = {'inserted': 0, 'failed': 0, 'errors': []}
+
+    def record_error(index, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append({'index': index, 'error': message})
+
+    def flush(batch):
+        docs = [doc for _, doc in batch]
+        failed = set()
+        try:
+            collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details['writeErrors']:
+                failed.add(error['index'])
+                record_error(batch[error['index']][0], error['errmsg'])
+        inserted = [doc for position, doc in enumerate(docs) if position not in failed]
+        summary['inserted'] += len(inserted)
+        if on_insert is not None:
+            on_insert(inserted)
+
+    batch = []
+    try:
+        for index, data in records:
+            if isinstance(data, Exception):
+                record_error(index, str(data))
+                continue
+            if not isinstance(data, dict):
+                record_error(index, 'record must be a JSON object')
+                continue
+            try:
+                batch.append((index, build(data)))
+            except KeyError as e:
+                record_error(index, f'missing field {e.args[0]}')
+                continue
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+    except MalformedBody as e:
+        summary['error'] = str(e)
+    if batch:
+        flush(batch)
+
+    summary['success'] = summary['failed'] == 0 and 'error' not in summary
+    summary['errors_truncated'] = summary['failed'] > len(summary['errors'])
+    return summary
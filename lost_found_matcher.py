@@ -0,0 +1,284 @@
+"""
+Lost & found matching for CampusLink.
+Active lost and found reports are indexed by title/description token, by
+category and by location. A new report is scored only against reports of the
+other type that share a selective token, or both the category and the
+location; the score weighs shared tokens by rarity (a weighted Dice
+coefficient) plus bonuses for the same category and location. Each report's
+top matches are kept in memory and persisted, and a new report is offered to
+the lists of the reports it scores well against, so nothing is ever
+rescanned pairwise. Reports inserted by other processes are picked up from
+the database before each match, by _id time since the last look.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from periodic_index import PeriodicIndex
+from search_index import tokenize
+
+SIDES = ('lost', 'found')
+OTHER_SIDE = {'lost': 'found', 'found': 'lost'}
+
+# Words every report uses, which say nothing about the item
+MATCH_STOPWORDS = {'lost', 'found', 'near', 'item', 'left', 'please', 'contact', 'someone', 'my'}
+TITLE_WEIGHT = 2
+TEXT_WEIGHT, CATEGORY_WEIGHT, LOCATION_WEIGHT = 0.6, 0.25, 0.15
+# Tokens in more than this share of reports are too common to find candidates with
+MAX_TOKEN_SHARE = 0.05
+MIN_CANDIDATE_POSTINGS = 50
+# ObjectIds carry their creating host's clock, so look back this far for new reports
+SYNC_OVERLAP = timedelta(seconds=60)
+
+ACTIVE_REPORTS = {'status': 'active', 'type': {'$in': list(SIDES)}}
+REPORT_PROJECTION = {'title': 1, 'description': 1, 'category': 1, 'location': 1, 'type': 1}
+
+def item_tokens(doc):
+    """{token: weight} of a report's title and description"""
+    tokens = {}
+    for field, weight in (('title', TITLE_WEIGHT), ('description', 1)):
+        for token in tokenize(doc.get(field)):
+            if token not in MATCH_STOPWORDS:
+                tokens[token] = max(tokens.get(token, 0), weight)
+    return tokens
+
+def normalize(value):
+    return ' '.join(str(value or '').lower().split())
+
+class IdfCache(dict):
+    """Inverse document frequency of each token, computed once per match"""
+
+    def __init__(self, df, total):
+        super().__init__()
+        self.df = df
+        self.total = total
+
+    def __missing__(self, token):
+        value = self[token] = math.log(1 + self.total / self.df.get(token, 1))
+        return value
+
+class MatchItem:
+    __slots__ = ('side', 'tokens', 'category', 'location')
+
+    def __init__(self, side, tokens, category, location):
+        self.side = side
+        self.tokens = tokens
+        self.category = category
+        self.location = location
+
+class MatchIndex(PeriodicIndex):
+    """Active lost and found reports with their current top matches"""
+
+    STATE = ('_items', '_postings', '_categories', '_locations', '_df', '_top', '_synced_at')
+    THREAD_NAME = 'match-index'
+
+    def __init__(self, top_k=10, min_score=0.45):
+        super().__init__()
+        self.top_k = top_k
+        self.min_score = min_score
+        self._synced_at = datetime.now(timezone.utc)
+        self._items = {}  # _id -> MatchItem
+        self._postings = {side: {} for side in SIDES}  # side -> token -> set of _id
+        self._categories = {side: {} for side in SIDES}  # side -> category -> set of _id
+        self._locations = {side: {} for side in SIDES}  # side -> location -> set of _id
+        self._df = {}  # token -> reports of either side containing it
+        self._top = {}  # _id -> [(score, other _id)], best first, at most top_k
+
+    def init_app(self, app):
+        self.top_k = app.config['MATCH_TOP_K']
+        self.min_score = app.config['MATCH_MIN_SCORE']
+
+    def _load(self, db, batch_size):
+        fresh = MatchIndex(self.top_k, self.min_score)
+        for doc in db['lost_found'].find(ACTIVE_REPORTS, REPORT_PROJECTION).batch_size(batch_size):
+            fresh._add(doc)
+        for doc in db['lost_found_matches'].find({}).batch_size(batch_size):
+            fresh._load_matches(doc)
+        return fresh
+
+    def _load_matches(self, doc):
+        if doc['_id'] in self._items:
+            self._top[doc['_id']] = [(match['score'], match['_id']) for match in doc.get('matches', [])
+                                     if match['_id'] in self._items]
+
+    def sync(self, db):
+        """Index active reports inserted since the last sync, e.g. through other processes"""
+        started = datetime.now(timezone.utc)
+        query = dict(ACTIVE_REPORTS, _id={'$gte': ObjectId.from_datetime(self._synced_at - SYNC_OVERLAP)})
+        new_ids = []
+        for doc in db['lost_found'].find(query, REPORT_PROJECTION):
+            if doc['_id'] not in self:
+                self._write('_add', doc)
+                new_ids.append(doc['_id'])
+        if new_ids:
+            for doc in db['lost_found_matches'].find({'_id': {'$in': new_ids}}):
+                self._write('_load_matches', doc)
+        self._synced_at = started
+        return len(new_ids)
+
+    def add(self, doc):
+        """Index one report; returns False for reports that cannot be matched"""
+        if doc.get('type') not in SIDES or doc.get('status', 'active') != 'active':
+            return False
+        self._write('_add', doc)
+        return True
+
+    def _add(self, doc):
+        item = MatchItem(doc['type'], item_tokens(doc), normalize(doc.get('category')),
+                         normalize(doc.get('location')))
+        self._remove(doc['_id'])
+        self._items[doc['_id']] = item
+        for token in item.tokens:
+            self._postings[item.side].setdefault(token, set()).add(doc['_id'])
+            self._df[token] = self._df.get(token, 0) + 1
+        if item.category:
+            self._categories[item.side].setdefault(item.category, set()).add(doc['_id'])
+        if item.location:
+            self._locations[item.side].setdefault(item.location, set()).add(doc['_id'])
+
+    def remove(self, item_id):
+        self._write('_remove', item_id)
+
+    def _remove(self, item_id):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        self._top.pop(item_id, None)
+        for token in item.tokens:
+            self._discard(self._postings[item.side], token, item_id)
+            self._df[token] -= 1
+            if not self._df[token]:
+                del self._df[token]
+        self._discard(self._categories[item.side], item.category, item_id)
+        self._discard(self._locations[item.side], item.location, item_id)
+
+    @staticmethod
+    def _discard(index, key, item_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(item_id)
+            if not ids:
+                del index[key]
+
+    def _score(self, item, other, idf, mass):
+        shared = sum(min(weight, other.tokens[token]) * idf[token]
+                     for token, weight in item.tokens.items() if token in other.tokens)
+        other_mass = sum(weight * idf[token] for token, weight in other.tokens.items())
+        text = 2 * shared / (mass + other_mass) if mass + other_mass else 0.0
+        return (TEXT_WEIGHT * text
+                + CATEGORY_WEIGHT * (bool(item.category) and item.category == other.category)
+                + LOCATION_WEIGHT * (bool(item.location) and item.location == other.location))
+
+    def match(self, item_id):
+        """(score, _id) of every report of the other type scoring at least min_score, best first"""
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return []
+            side = OTHER_SIDE[item.side]
+            total = len(self._items)
+            idf = IdfCache(self._df, total)
+            mass = sum(weight * idf[token] for token, weight in item.tokens.items())
+
+            candidates = set()
+            postings = self._postings[side]
+            common = max(MIN_CANDIDATE_POSTINGS, MAX_TOKEN_SHARE * total)
+            for token in item.tokens:
+                ids = postings.get(token)
+                if ids and len(ids) <= common:
+                    candidates |= ids
+            same_category = self._categories[side].get(item.category, set())
+            same_location = self._locations[side].get(item.location, set())
+            small, large = sorted((same_category, same_location), key=len)
+            candidates |= {other_id for other_id in small if other_id in large}
+
+            scored = []
+            for other_id in candidates:
+                score = round(self._score(item, self._items[other_id], idf, mass), 4)
+                if score >= self.min_score:
+                    scored.append((score, other_id))
+        scored.sort(key=lambda match: match[0], reverse=True)
+        return scored
+
+    def set_matches(self, item_id, matches):
+        self._write('_set_matches', item_id, matches)
+
+    def _set_matches(self, item_id, matches):
+        if item_id in self._items:
+            self._top[item_id] = list(matches[:self.top_k])
+
+    def offer(self, item_id, other_id, score):
+        """Add other_id to item_id's top matches; returns True if it made the cut"""
+        return self._write('_offer', item_id, other_id, score)
+
+    def _offer(self, item_id, other_id, score):
+        top = self._top.setdefault(item_id, [])
+        if any(existing == other_id for _, existing in top):
+            return False
+        if len(top) >= self.top_k and score <= top[-1][0]:
+            return False
+        top.append((score, other_id))
+        top.sort(key=lambda match: match[0], reverse=True)
+        del top[self.top_k:]
+        return True
+
+    def top(self, item_id):
+        """(score, _id) of item_id's current top matches, best first"""
+        with self._lock:
+            return list(self._top.get(item_id, []))
+
+    def item_ids(self):
+        with self._lock:
+            return list(self._items)
+
+    def __contains__(self, item_id):
+        with self._lock:
+            return item_id in self._items
+
+def match_updates(index, item_id, scored, now=None):
+    """Writes persisting item_id's matches and offering it to the reports it matched.
+
+    item_id's own list is replaced; the others get it pushed into their
+    lists, which $sort and $slice keep at top_k even when several processes
+    offer to the same report.
+    """
+    now = now or datetime.now()
+    top = scored[:index.top_k]
+    index.set_matches(item_id, top)
+    operations = [UpdateOne({'_id': item_id},
+                            {'$set': {'matches': [{'_id': other_id, 'score': score} for score, other_id in top],
+                                      'updated_at': now}},
+                            upsert=True)]
+    for score, other_id in scored:
+        if index.offer(other_id, item_id, score):
+            operations.append(UpdateOne(
+                {'_id': other_id, 'matches._id': {'$ne': item_id}},
+                {'$push': {'matches': {'$each': [{'_id': item_id, 'score': score}],
+                                       '$sort': {'score': -1}, '$slice': index.top_k}},
+                 '$set': {'updated_at': now}}
+            ))
+    return operations
+
+def rebuild_matches(db, top_k=10, min_score=0.45, batch_size=1000):
+    """Recompute every active report's matches from scratch; returns how many were matched"""
+    index = MatchIndex(top_k, min_score)
+    index.build(db, batch_size=batch_size)
+    started = datetime.now()
+    matched = 0
+    operations = []
+    for item_id in index.item_ids():
+        top = index.match(item_id)[:top_k]
+        operations.append(ReplaceOne({'_id': item_id}, {
+            'matches': [{'_id': other_id, 'score': score} for score, other_id in top],
+            'updated_at': started
+        }, upsert=True))
+        matched += bool(top)
+        if len(operations) == batch_size:
+            db['lost_found_matches'].bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db['lost_found_matches'].bulk_write(operations, ordered=False)
+    # Reports that are no longer active
+    db['lost_found_matches'].delete_many({'updated_at': {'$lt': started}})
+    return matched
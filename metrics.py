@@ -0,0 +1,162 @@
+"""
+Request and MongoDB metrics for CampusLink in the Prometheus text format.
+Flask request latency is recorded per endpoint, method and status code, and
+MongoDB command latency per collection and command through a pymongo
+CommandListener. Connection pool gauges are read from the PoolStats listener
+when /metrics is scraped. Every process keeps its own numbers.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            # Counts are stored per bucket and accumulated when rendered
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, list(values)) for labels, values in series]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = 'le="%s"' % ('+Inf' if bound == float('inf') else _number(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {values[-1]:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command by collection and command name"""
+
+    def __init__(self, histogram, failures):
+        self.histogram = histogram
+        self.failures = failures
+        self._lock = threading.Lock()
+        self._pending = {}  # (request_id, connection_id) -> (collection, command)
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            target = event.command.get('collection')
+        collection = target if isinstance(target, str) else ''
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (collection, event.command_name)
+
+    def _finish(self, event):
+        with self._lock:
+            key = self._pending.pop((event.request_id, event.connection_id), None)
+        if key is None:
+            key = ('', event.command_name)
+        self.histogram.observe(key, event.duration_micros / 1e6)
+        return key
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        key = self._finish(event)
+        with self._lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+class Metrics:
+    """Registry behind /metrics; call init_app after the app's MongoConnection exists"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = True
+        self.requests = Histogram(
+            'campuslink_http_request_duration_seconds',
+            'Time to handle a request until its response headers are ready',
+            ('endpoint', 'method', 'status'), buckets)
+        self.mongo_commands = Histogram(
+            'campuslink_mongodb_command_duration_seconds',
+            'MongoDB command round-trip time',
+            ('collection', 'command'), buckets)
+        self.mongo_failures = {}
+        self.command_listener = CommandMetrics(self.mongo_commands, self.mongo_failures)
+        self.pool_stats = None
+
+    def init_app(self, app):
+        self.enabled = app.config['METRICS_ENABLED']
+        self.pool_stats = app.extensions['mongo'].pool_stats
+        if not self.enabled:
+            return
+        app.before_request(self._start_timer)
+        app.after_request(self._record_response)
+        app.teardown_request(self._record_error)
+
+    def _start_timer(self):
+        g.metrics_started = time.perf_counter()
+
+    def _observe(self, status):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            self.requests.observe((request.endpoint or 'unmatched', request.method, str(status)),
+                                  time.perf_counter() - started)
+
+    def _record_response(self, response):
+        self._observe(response.status_code)
+        return response
+
+    def _record_error(self, exc):
+        # after_request does not run when a view raises an unhandled exception
+        if exc is not None:
+            self._observe(500)
+
+    def render(self):
+        """Everything recorded so far, in the Prometheus text exposition format"""
+        lines = self.requests.render() + self.mongo_commands.render()
+        lines += ['# HELP campuslink_mongodb_command_failures_total MongoDB commands that failed',
+                  '# TYPE campuslink_mongodb_command_failures_total counter']
+        with self.command_listener._lock:
+            failures = sorted(self.mongo_failures.items())
+        for labels, count in failures:
+            lines.append(f'campuslink_mongodb_command_failures_total{_labels(("collection", "command"), labels)} {count}')
+        if self.pool_stats is not None:
+            pool = self.pool_stats.stats()
+            for name, kind, help_text, value in [
+                ('open_connections', 'gauge', 'Open pool connections', pool['open_connections']),
+                ('checked_out_connections', 'gauge', 'Connections checked out of the pool', pool['checked_out']),
+                ('checkouts_total', 'counter', 'Successful pool checkouts', pool['checkouts']),
+                ('failed_checkouts_total', 'counter', 'Pool checkouts that failed or timed out', pool['failed_checkouts']),
+                ('checkout_wait_max_seconds', 'gauge', 'Longest pool checkout wait', pool['max_wait_ms'] / 1000)
+            ]:
+                metric = f'campuslink_mongodb_pool_{name}'
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}',
+                          f'{metric} {_number(value)}']
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,82 @@
+"""
+Periodically rebuilt in-memory indexes for CampusLink.
+An index is loaded from the database on first use and then kept current by
+the write paths of its own process; writes made by other processes show up
+when it is rebuilt in the background after max_age seconds. A rebuild loads
+a fresh copy off to the side, so queries never see a half-built index, and
+writes made while it loads are recorded and replayed onto the fresh copy
+before it replaces the live state, so none are lost in the swap.
+"""
+
+import threading
+import time
+
+class PeriodicIndex:
+    """Base class: subclasses implement _load and route every write through _write.
+
+    STATE names the attributes holding the index contents, which a rebuild
+    swaps in from the fresh copy. Writes must be safe to apply twice, since
+    the fresh copy may already have read their result from the database.
+    """
+
+    STATE = ()
+    THREAD_NAME = 'index'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._journal = None  # [(method, args)] while a rebuild is loading
+        self.built = False
+        self.built_at = 0.0
+        self._rebuilding = False
+
+    def build(self, db, max_age=0, batch_size=1000):
+        """Load the index once, and again in the background when older than max_age seconds"""
+        if self.built:
+            if max_age and time.monotonic() - self.built_at > max_age:
+                with self._build_lock:
+                    if self._rebuilding:
+                        return
+                    self._rebuilding = True
+                threading.Thread(target=self._rebuild_in_background, args=(db, batch_size),
+                                 name=self.THREAD_NAME, daemon=True).start()
+            return
+        with self._build_lock:
+            if not self.built:
+                self._rebuild(db, batch_size)
+
+    def _rebuild_in_background(self, db, batch_size):
+        try:
+            self._rebuild(db, batch_size)
+        except Exception as e:
+            print(f"Background rebuild of {self.THREAD_NAME} failed: {e}")
+        finally:
+            with self._build_lock:
+                self._rebuilding = False
+
+    def _rebuild(self, db, batch_size):
+        with self._lock:
+            self._journal = []
+        try:
+            fresh = self._load(db, batch_size)
+            with self._lock:
+                for method, args in self._journal:
+                    getattr(fresh, method)(*args)
+                for name in self.STATE:
+                    setattr(self, name, getattr(fresh, name))
+                self.built = True
+                self.built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def _load(self, db, batch_size):
+        """A new, unshared instance loaded from db"""
+        raise NotImplementedError
+
+    def _write(self, method, *args):
+        """Apply the unlocked mutator method to the live state, and to a rebuild in progress"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((method, args))
+            return getattr(self, method)(*args)
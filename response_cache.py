@@ -0,0 +1,236 @@
+"""
+In-process response cache for the read APIs.
+GET responses are cached per route and normalized query string with LRU and
+TTL eviction under an entry and memory cap. Any write through the same route
+that succeeds bumps the collection's version stamp, which is kept in MongoDB
+so that every worker (and run.py maintenance commands) share it. Each process
+reads the stamps at most every CACHE_VERSION_TTL_S seconds; a cached body is
+only served while its stamp is current, and the stamp drives the ETag /
+Last-Modified validators so clients that already hold the current data get a
+304 without querying the collection itself.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from pymongo import ReturnDocument
+
+VERSIONS_COLLECTION = 'cache_versions'
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def _next_second(moment):
+    """moment rounded up to the one-second resolution of HTTP dates"""
+    rounded = moment.replace(microsecond=0)
+    return rounded if rounded == moment else rounded + timedelta(seconds=1)
+
+def _stamp(doc):
+    """(version, last modified) of a versions document"""
+    return doc['version'], doc['modified'].replace(tzinfo=timezone.utc)
+
+def bump_version(versions, collection):
+    """Mark collection as changed for every process; returns its new (version, last modified)"""
+    doc = versions.find_one_and_update(
+        {'_id': collection},
+        {'$inc': {'version': 1}, '$set': {'modified': _now()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return _stamp(doc)
+
+class ResponseCache:
+    """LRU + TTL cache of GET response bodies, invalidated per collection"""
+
+    def __init__(self, timeout=300, max_entries=1024, max_bytes=32 * 1024 * 1024, enabled=True):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.version_ttl = 1.0
+        # Collection holding the shared version stamps; set by init_app
+        self.versions = None
+        self._entries = OrderedDict()  # key -> (expires_at, collection, body, mimetype, version)
+        self._keys_by_collection = {}
+        self._stamps = {}  # collection -> (version, last modified)
+        self._stamps_read = float('-inf')
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.not_modified = 0
+
+    def init_app(self, app):
+        """Take the cache settings from an app's configuration"""
+        self.timeout = app.config['CACHE_DEFAULT_TIMEOUT']
+        self.max_entries = app.config['CACHE_MAX_ENTRIES']
+        self.max_bytes = app.config['CACHE_MAX_BYTES']
+        self.enabled = app.config['CACHE_TYPE'] != 'null'
+        self.version_ttl = app.config['CACHE_VERSION_TTL_S']
+        self.versions = app.extensions['mongo'].collection(VERSIONS_COLLECTION)
+        self.clear()
+
+    def get(self, key, version):
+        """Cached entry for key, unless it expired or was built before version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic() or entry[4] != version:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, collection, body, mimetype, version):
+        """Store a response unless its collection was written since version was read"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if self._stamps.get(collection, (None,))[0] != version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.timeout, collection, body, mimetype, version)
+            self._keys_by_collection.setdefault(collection, set()).add(key)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stamp(self, collection):
+        """Shared (version, last modified) of collection, re-read at most every version_ttl seconds"""
+        with self._lock:
+            stale = time.monotonic() - self._stamps_read > self.version_ttl
+            stamp = self._stamps.get(collection)
+        if stale or stamp is None:
+            read_at = time.monotonic()
+            stamps = {doc['_id']: _stamp(doc) for doc in self.versions.find()}
+            if collection not in stamps:
+                # Never written since the stamps were introduced: start it now
+                doc = self.versions.find_one_and_update(
+                    {'_id': collection},
+                    {'$setOnInsert': {'version': 0, 'modified': _now()}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                stamps[collection] = _stamp(doc)
+            with self._lock:
+                self._stamps.update(stamps)
+                self._stamps_read = read_at
+                stamp = self._stamps[collection]
+        return stamp
+
+    @staticmethod
+    def validators(collection, stamp):
+        """Strong ETag and Last-Modified time for a collection at a (version, last modified) stamp"""
+        version, modified = stamp
+        last_modified = _next_second(modified)
+        return f'{collection}-{version}-{int(last_modified.timestamp())}', last_modified
+
+    def invalidate(self, collection):
+        """Drop every cached response built from collection and bump its shared version"""
+        stamp = bump_version(self.versions, collection)
+        with self._lock:
+            # Another worker's later bump may already have been read
+            if stamp[0] > self._stamps.get(collection, (-1,))[0]:
+                self._stamps[collection] = stamp
+            for key in self._keys_by_collection.pop(collection, ()):
+                self._remove(key)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._stamps.clear()
+            self._stamps_read = float('-inf')
+            self._entries.clear()
+            self._keys_by_collection.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'not_modified': self.not_modified
+            }
+
+    def respond(self, collection, view, *args, **kwargs):
+        """Answer the current request with view through the cache; writes that succeed invalidate collection"""
+        if request.method not in ('GET', 'HEAD'):
+            response = make_response(view(*args, **kwargs))
+            if response.status_code < 400:
+                self.invalidate(collection)
+            return response
+        
+        stamp = self.stamp(collection)
+        etag, last_modified = self.validators(collection, stamp)
+        if self._is_fresh(etag, last_modified):
+            with self._lock:
+                self.not_modified += 1
+            return self._with_validators(Response(status=304), etag, last_modified)
+        
+        if not self.enabled or request.args.get('stream') == '1':
+            response = make_response(view(*args, **kwargs))
+            return self._with_validators(response, etag, last_modified)
+        
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        entry = self.get(key, stamp[0])
+        if entry is not None:
+            response = Response(entry[2], mimetype=entry[3])
+            return self._with_validators(response, etag, last_modified)
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            self.set(key, collection, response.get_data(), response.mimetype, stamp[0])
+        return self._with_validators(response, etag, last_modified)
+
+    @staticmethod
+    def _is_fresh(etag, last_modified):
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        if request.if_modified_since:
+            return request.if_modified_since >= last_modified
+        return False
+
+    @staticmethod
+    def _with_validators(response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response.set_etag(etag)
+            # Until that second has passed, another write could still get the
+            # same Last-Modified and If-Modified-Since would miss it
+            if last_modified <= _now():
+                response.last_modified = last_modified
+        return response
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry[2])
+        keys = self._keys_by_collection.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+
+def cached(collection):
+    """Route views through the current app's ResponseCache (app.extensions['response_cache'])"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return current_app.extensions['response_cache'].respond(collection, view, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+"""
+Activity rollups for CampusLink.
+Every document a write route creates is counted into an hourly and a daily
+bucket document for its collection, with per-value counts for the fields in
+ROLLUP_DIMENSIONS (category, lost/found type, ...). /api/stats reads a range
+of bucket documents and never aggregates raw documents; weekly and monthly
+series are summed from the daily buckets. rebuild() recounts a collection
+from scratch for backfills.
+"""
+
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+
+ROLLUPS_COLLECTION = 'rollups'
+
+# Fields counted per value in each bucket, per collection
+ROLLUP_DIMENSIONS = {
+    'announcements': ['category'],
+    'lost_found': ['type', 'category'],
+    'complaints': ['category', 'priority'],
+    'skills': ['category'],
+    'news': ['category'],
+    'polls': [],
+    # One document per vote, so this is poll participation
+    'poll_votes': ['option'],
+}
+
+STORED_BUCKETS = ('hour', 'day')
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+def bucket_start(date, bucket):
+    """Start of the hour, day, ISO week (Monday) or month containing date"""
+    if bucket == 'hour':
+        return date.replace(minute=0, second=0, microsecond=0)
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start, bucket):
+    if bucket == 'hour':
+        return start + timedelta(hours=1)
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if bucket == 'week':
+        return start + timedelta(weeks=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+def value_key(value):
+    # Values become field names, which cannot contain '.' or start with '$'
+    key = str(value).replace('.', '_') if value not in (None, '') else 'none'
+    return '_' + key[1:] if key.startswith('$') else key
+
+def bucket_id(name, bucket, start):
+    return f'{name}:{bucket}:{start.isoformat()}'
+
+def count_documents(name, docs):
+    """{(bucket, start): {field: amount}} $inc fields for docs of collection name"""
+    increments = {}
+    dimensions = ROLLUP_DIMENSIONS[name]
+    for doc in docs:
+        date = doc.get('date')
+        if not isinstance(date, datetime):
+            continue
+        for bucket in STORED_BUCKETS:
+            fields = increments.setdefault((bucket, bucket_start(date, bucket)), {})
+            fields['count'] = fields.get('count', 0) + 1
+            for dimension in dimensions:
+                field = f'by.{dimension}.{value_key(doc.get(dimension))}'
+                fields[field] = fields.get(field, 0) + 1
+    return increments
+
+def rollup_updates(name, docs):
+    """UpdateOne upserts adding docs of collection name to their hourly and daily buckets"""
+    return [
+        UpdateOne({'_id': bucket_id(name, bucket, start)},
+                  {'$inc': fields,
+                   '$setOnInsert': {'collection': name, 'bucket': bucket, 'start': start}},
+                  upsert=True)
+        for (bucket, start), fields in count_documents(name, docs).items()
+    ]
+
+def _add(totals, doc):
+    totals['count'] = totals.get('count', 0) + doc.get('count', 0)
+    by = totals.setdefault('by', {})
+    for dimension, counts in doc.get('by', {}).items():
+        merged = by.setdefault(dimension, {})
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+
+def series(collection, name, bucket, date_from, date_to):
+    """Buckets of collection name starting in [date_from, date_to), gaps filled with zeros"""
+    stored = 'hour' if bucket == 'hour' else 'day'
+    first = bucket_start(date_from, bucket)
+    rows = {}
+    for doc in collection.find({'collection': name, 'bucket': stored,
+                                'start': {'$gte': first, '$lt': date_to}},
+                               {'count': 1, 'by': 1, 'start': 1}).sort('start', 1):
+        _add(rows.setdefault(bucket_start(doc['start'], bucket), {}), doc)
+
+    buckets = []
+    totals = {'count': 0, 'by': {}}
+    start = first
+    while start < date_to:
+        row = rows.get(start, {})
+        buckets.append({'start': start, 'count': row.get('count', 0), 'by': row.get('by', {})})
+        _add(totals, row)
+        start = next_bucket(start, bucket)
+    return buckets, totals
+
+def bucket_count(bucket, date_from, date_to, limit):
+    """How many buckets series() would return, counting no further than limit + 1"""
+    count = 0
+    start = bucket_start(date_from, bucket)
+    while start < date_to and count <= limit:
+        count += 1
+        start = next_bucket(start, bucket)
+    return count
+
+def rebuild(db, name, batch_size=1000, flush_every=10000):
+    """Recount collection name into fresh rollups; returns the number of documents counted"""
+    projection = {'date': 1, **{dimension: 1 for dimension in ROLLUP_DIMENSIONS[name]}}
+    rollups = db[ROLLUPS_COLLECTION]
+    rollups.delete_many({'collection': name})
+    counted = 0
+    pending = []
+    for doc in db[name].find({}, projection).batch_size(batch_size):
+        pending.append(doc)
+        if len(pending) == flush_every:
+            counted += _write(rollups, name, pending)
+            pending = []
+    if pending:
+        counted += _write(rollups, name, pending)
+    return counted
+
+def _write(rollups, name, docs):
+    # Documents without a date are not counted, so a batch may have nothing to write
+    updates = rollup_updates(name, docs)
+    if updates:
+        rollups.bulk_write(updates, ordered=False)
+    return len(docs)
@@ -0,0 +1,183 @@
+"""
+Room occupancy index for CampusLink.
+Every timetable slot occupies its room from time to time + duration on its
+day. Identical intervals from different timetables (a lecture in many
+students' schedules) are stored once with a count, per day and room, sorted
+by start time with a running maximum of end times, so whether a room is free
+in a window is a binary search. The index is built from the timetables
+collection on first use and then kept current slot by slot from the write
+paths; in other processes writes show up at the next periodic rebuild (see
+periodic_index.py).
+"""
+
+import re
+from bisect import bisect_left, insort
+from periodic_index import PeriodicIndex
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TIME = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?\s*$')
+DEFAULT_DURATION = 60
+
+def parse_time(value):
+    """Minutes after midnight for 'HH:MM' (or 'H:MM am/pm'), else None"""
+    match = TIME.match(str(value or ''))
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+def format_time(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+def normalize_day(value):
+    day = str(value or '').strip().capitalize()
+    return day if day in DAYS else None
+
+def slot_interval(slot):
+    """(day, room, start, end) of a schedule slot, or None when it cannot be placed"""
+    day = normalize_day(slot.get('day'))
+    room = str(slot.get('room') or '').strip()
+    start = parse_time(slot.get('time'))
+    try:
+        duration = int(slot.get('duration') or DEFAULT_DURATION)
+    except (TypeError, ValueError):
+        duration = DEFAULT_DURATION
+    if day is None or not room or start is None or duration <= 0:
+        return None
+    return day, room, start, start + duration
+
+class RoomDay:
+    """Distinct occupied intervals of one room on one day"""
+
+    __slots__ = ('intervals', 'counts', 'max_end')
+
+    def __init__(self):
+        self.intervals = []  # sorted (start, end)
+        self.counts = {}  # (start, end) -> slots occupying it
+        self.max_end = []  # max_end[i] = latest end among intervals[:i + 1]
+
+    def add(self, start, end):
+        key = (start, end)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.counts[key] == 1:
+            insort(self.intervals, key)
+            self._reindex()
+
+    def remove(self, start, end):
+        key = (start, end)
+        count = self.counts.get(key, 0) - 1
+        if count > 0:
+            self.counts[key] = count
+        elif count == 0:
+            del self.counts[key]
+            self.intervals.remove(key)
+            self._reindex()
+
+    def _reindex(self):
+        latest = -1
+        self.max_end = []
+        for _, end in self.intervals:
+            latest = max(latest, end)
+            self.max_end.append(latest)
+
+    def is_free(self, start, end):
+        # Intervals starting before the window ends overlap it unless they all end by its start
+        position = bisect_left(self.intervals, (end,))
+        return position == 0 or self.max_end[position - 1] <= start
+
+class RoomIndex(PeriodicIndex):
+    """Occupancy intervals of every room that appears in a timetable"""
+
+    STATE = ('_rooms', '_user_slots')
+    THREAD_NAME = 'room-index'
+
+    def __init__(self):
+        super().__init__()
+        self._rooms = {}  # room -> {day: RoomDay}
+        self._user_slots = {}  # user_id -> {slot key: (day, room, start, end)}
+
+    def _load(self, db, batch_size):
+        fresh = RoomIndex()
+        projection = {'user_id': 1, 'schedule.day': 1, 'schedule.time': 1, 'schedule.duration': 1,
+                      'schedule.room': 1, 'schedule.slot_id': 1}
+        for timetable in db['timetables'].find({}, projection).batch_size(batch_size):
+            fresh._set_user(timetable.get('user_id'), timetable.get('schedule') or [])
+        return fresh
+
+    @staticmethod
+    def _slot_key(slot, position):
+        # Slots saved before slot ids existed are told apart by position
+        return slot.get('slot_id') or ('position', position)
+
+    def _add(self, interval):
+        day, room, start, end = interval
+        self._rooms.setdefault(room, {}).setdefault(day, RoomDay()).add(start, end)
+
+    def _remove(self, interval):
+        day, room, start, end = interval
+        room_day = self._rooms.get(room, {}).get(day)
+        if room_day is not None:
+            room_day.remove(start, end)
+
+    def set_user(self, user_id, schedule):
+        """Replace all of one user's slots"""
+        self._write('_set_user', user_id, schedule)
+
+    def _set_user(self, user_id, schedule):
+        for interval in self._user_slots.pop(user_id, {}).values():
+            self._remove(interval)
+        slots = self._user_slots[user_id] = {}
+        for position, slot in enumerate(schedule):
+            interval = slot_interval(slot)
+            if interval is not None:
+                slots[self._slot_key(slot, position)] = interval
+                self._add(interval)
+
+    def set_slot(self, user_id, slot):
+        """Add one slot, or move it if its slot_id is already indexed"""
+        self._write('_set_slot', user_id, slot)
+
+    def _set_slot(self, user_id, slot):
+        slots = self._user_slots.setdefault(user_id, {})
+        old = slots.pop(slot['slot_id'], None)
+        if old is not None:
+            self._remove(old)
+        interval = slot_interval(slot)
+        if interval is not None:
+            slots[slot['slot_id']] = interval
+            self._add(interval)
+
+    def remove_slot(self, user_id, slot_id):
+        self._write('_remove_slot', user_id, slot_id)
+
+    def _remove_slot(self, user_id, slot_id):
+        interval = self._user_slots.get(user_id, {}).pop(slot_id, None)
+        if interval is not None:
+            self._remove(interval)
+
+    def free_rooms(self, day, start, end):
+        """Rooms with no slot overlapping [start, end) on day"""
+        with self._lock:
+            return sorted(room for room, days in self._rooms.items()
+                          if day not in days or days[day].is_free(start, end))
+
+    def occupancy(self, room, day=None):
+        """{day: [{start, end, slots}]} for one room, in day and start order"""
+        with self._lock:
+            days = self._rooms.get(room, {})
+            return {
+                name: [{'start': format_time(start), 'end': format_time(end),
+                        'slots': days[name].counts[(start, end)]}
+                       for start, end in days[name].intervals]
+                for name in DAYS if name in days and (day is None or name == day) and days[name].intervals
+            }
+
+    def __contains__(self, room):
+        with self._lock:
+            return room in self._rooms
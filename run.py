@@ -4,17 +4,31 @@ CampusLink Application Runner
 This script starts the CampusLink web application and optionally populates sample data.
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime, timedelta
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
+from config import config
+from indexes import ensure_indexes, index_report
+from export import EXPORTABLE, FORMATS, csv_header, export_query, iter_export, last_exported_id, parse_date
+from complaint_queue import backfill_priority_rank, rebuild_counters
+from rollups import ROLLUP_DIMENSIONS, rebuild as rebuild_rollup
+from lost_found_matcher import rebuild_matches
+from skills_search import skill_bands
+from response_cache import VERSIONS_COLLECTION, bump_version
+import synthetic
+
+# Same configuration the app is built with
+settings = config[os.environ.get('FLASK_CONFIG', 'default')]
 
 def populate_sample_data():
     """Populate the database with sample data for demonstration"""
     try:
-        client = MongoClient('mongodb://localhost:27017/')
-        db = client['campuslink']
+        client = MongoClient(settings.MONGODB_URI)
+        db = client[settings.MONGODB_DB]
         
         # Sample announcements
         announcements = [
@@ -203,6 +217,7 @@ def populate_sample_data():
             if data:
                 collection.insert_many(data)
                 print(f"✓ Inserted {len(data)} sample records into {collection.name}")
+        mark_changed(db, *(collection.name for collection, _ in collections_data))
         
         print("\n🎉 Sample data populated successfully!")
         print("You can now explore the application with realistic data.")
@@ -210,6 +225,208 @@ def populate_sample_data():
     except Exception as e:
         print(f"❌ Error populating sample data: {e}")
 
+def mark_changed(db, *names):
+    """Bump the shared cache versions of names so running app processes stop serving cached responses"""
+    for name in names:
+        bump_version(db[VERSIONS_COLLECTION], name)
+
+def migrate_poll_voters(db, batch_size=1000):
+    """Move the legacy voters array of each poll into the poll_votes collection"""
+    moved = 0
+    for poll in db['polls'].find({'voters': {'$exists': True}}, {'voters': 1}):
+        voters = poll.get('voters', [])
+        for start in range(0, len(voters), batch_size):
+            votes = [
+                # The legacy array did not record which option was chosen
+                {'poll_id': poll['_id'], 'voter_id': voter_id, 'option': None,
+                 'date': datetime.now()}
+                for voter_id in voters[start:start + batch_size]
+            ]
+            try:
+                moved += len(db['poll_votes'].insert_many(votes, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                # Voters already migrated by an earlier run are skipped
+                if any(err['code'] != 11000 for err in e.details['writeErrors']):
+                    raise
+                moved += e.details['nInserted']
+        db['polls'].update_one({'_id': poll['_id']}, {'$unset': {'voters': ''}})
+    mark_changed(db, 'polls')
+    print(f"✓ Moved {moved} voters into poll_votes")
+
+def update_in_batches(collection, query, projection, build, batch_size):
+    """Write build(doc), an UpdateOne, for every matching document in unordered batches; returns how many changed"""
+    updated = 0
+    updates = []
+    for doc in collection.find(query, projection):
+        updates.append(build(doc))
+        if len(updates) == batch_size:
+            updated += collection.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        updated += collection.bulk_write(updates, ordered=False).modified_count
+    return updated
+
+def migrate_timetable_slots(db, batch_size=500):
+    """Give every timetable slot saved before slot ids existed a stable slot_id"""
+    def add_slot_ids(timetable):
+        schedule = [dict(slot, slot_id=slot.get('slot_id') or ObjectId()) for slot in timetable['schedule']]
+        # Matching the old array skips timetables edited meanwhile; run again to pick them up
+        return UpdateOne({'_id': timetable['_id'], 'schedule': timetable['schedule']},
+                         {'$set': {'schedule': schedule}})
+    
+    updated = update_in_batches(db['timetables'], {'schedule': {'$elemMatch': {'slot_id': {'$exists': False}}}},
+                                {'schedule': 1}, add_slot_ids, batch_size)
+    mark_changed(db, 'timetables')
+    print(f"✓ Added slot ids to {updated} timetables")
+
+def rebuild_complaint_counters(db):
+    """Rank complaints stored without a priority_rank and recount the complaint counters"""
+    ranked = backfill_priority_rank(db)
+    counts = rebuild_counters(db)
+    mark_changed(db, 'complaints')
+    total = sum(sum(by_priority.values()) for by_priority in counts.values())
+    print(f"✓ Ranked {ranked} complaints and counted {total} into the complaint counters")
+
+def rebuild_rollups(db, names=None):
+    """Recount the activity rollups of the given collections (default: all) from their documents"""
+    for name in ROLLUP_DIMENSIONS if names is None else names:
+        if name not in ROLLUP_DIMENSIONS:
+            print(f"❌ No activity rollups for {name}")
+            continue
+        print(f"✓ Counted {rebuild_rollup(db, name):,} {name} documents into the activity rollups")
+
+def rebuild_lost_found_matches(db):
+    """Recompute the matches of every active lost & found report"""
+    matched = rebuild_matches(db, settings.MATCH_TOP_K, settings.MATCH_MIN_SCORE)
+    mark_changed(db, 'lost_found')
+    print(f"✓ Matched {matched:,} active lost & found reports")
+
+def migrate_skill_bands(db, batch_size=1000):
+    """Store the price and duration bands of skills saved before faceted search existed"""
+    updated = update_in_batches(
+        db['skills'],
+        {'$or': [{'price_band': {'$exists': False}}, {'duration_band': {'$exists': False}}]},
+        {'price': 1, 'duration': 1},
+        lambda skill: UpdateOne({'_id': skill['_id']}, {'$set': skill_bands(skill)}),
+        batch_size
+    )
+    mark_changed(db, 'skills')
+    print(f"✓ Added price and duration bands to {updated} skills")
+
+def apply_indexes(db):
+    """Create the declared indexes and print anything that still needs attention"""
+    errors = ensure_indexes(db)
+    for name, error in errors.items():
+        print(f"❌ Could not create indexes on {name}: {error}")
+    if not errors:
+        print("✓ Database indexes up to date")
+    
+    for name, status in index_report(db).items():
+        if status['missing']:
+            print(f"⚠️  {name}: missing {', '.join(status['missing'])}")
+        if status['undeclared']:
+            print(f"⚠️  {name}: not in the index registry {', '.join(status['undeclared'])}")
+        if status['unused']:
+            print(f"ℹ️  {name}: unused since server start {', '.join(status['unused'])}")
+
+def export_collection(db, argv):
+    """Stream a collection to a file or stdout; --resume continues an earlier export file"""
+    parser = argparse.ArgumentParser(prog='run.py --export')
+    parser.add_argument('collection', choices=sorted(EXPORTABLE))
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+    parser.add_argument('--from', dest='date_from', type=parse_date,
+                        help='only documents dated on or after this ISO date')
+    parser.add_argument('--to', dest='date_to', type=parse_date,
+                        help='only documents dated before this ISO date')
+    parser.add_argument('--fields', default='', help='comma-separated fields to export')
+    parser.add_argument('--after', help='export documents after this _id')
+    parser.add_argument('--output', help='file to write (default: stdout)')
+    parser.add_argument('--resume', action='store_true',
+                        help='append to --output after the last _id it contains')
+    parser.add_argument('--batch-size', type=int, default=settings.EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    
+    after = args.after
+    append = False
+    if args.resume:
+        if not args.output:
+            parser.error('--resume needs --output')
+        after = last_exported_id(args.output, args.format) or after
+        append = os.path.exists(args.output) and os.path.getsize(args.output) > 0
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+    if append and args.format == 'csv':
+        # New rows have to line up under the file's existing header
+        fields = csv_header(args.output)
+    chunks = iter_export(db[args.collection], args.format,
+                         export_query(args.date_from, args.date_to, after),
+                         fields=fields, batch_size=args.batch_size, header=not append)
+    
+    if not args.output:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        return
+    
+    if append:
+        print(f"↻ Resuming {args.collection} export after {after}")
+    with open(args.output, 'a' if append else 'w', encoding='utf-8', newline='') as f:
+        for chunk in chunks:
+            f.write(chunk)
+        size = f.tell()
+    print(f"✓ Exported {args.collection} to {args.output} ({size / 1024 / 1024:.1f} MB)")
+
+def generate_synthetic_data(db, argv):
+    """Load seeded synthetic data at production volumes; returns the database it loaded"""
+    parser = argparse.ArgumentParser(prog='run.py --synthetic-data')
+    parser.add_argument('--count', type=int, default=100000,
+                        help='documents per collection (timetables: users)')
+    parser.add_argument('--collections', default=','.join(synthetic.COLLECTIONS),
+                        help='comma-separated collections to generate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=datetime.fromisoformat,
+                        help='newest document date (default: today); fix it to reproduce a data set exactly')
+    parser.add_argument('--days', type=int, default=365, help='days of history before --end')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--db', default=settings.MONGODB_DB,
+                        help='database to load (default: MONGODB_DB); prefer a scratch database')
+    parser.add_argument('--drop', action='store_true',
+                        help='drop the collections first (with poll_votes when loading polls)')
+    args = parser.parse_args(argv)
+    
+    names = [name for name in args.collections.split(',') if name]
+    for name in names:
+        if name not in synthetic.COLLECTIONS:
+            parser.error(f'unknown collection {name}')
+    counts = {name: args.count for name in names}
+    
+    db = db.client[args.db]
+    if args.drop:
+        # Votes belong to the polls they were cast in
+        dropped = names + ['poll_votes'] if 'polls' in names else names
+        print(f"⚠️  Dropping {', '.join(dropped)} in database {args.db}")
+        for name in dropped:
+            # Dropping also drops the indexes, which are rebuilt once after loading
+            db[name].drop()
+    
+    total = sum(counts.values())
+    done = {name: 0 for name in names}
+    print(f"🧪 Generating {total:,} documents with seed {args.seed} on {args.workers} workers")
+    for name, inserted, _, elapsed in synthetic.generate(
+            settings.MONGODB_URI, args.db, counts, seed=args.seed, end=args.end,
+            days=args.days, workers=args.workers, batch_size=args.batch_size):
+        done[name] = inserted
+        overall = sum(done.values())
+        print(f"   {overall:>12,} / {total:,}  {overall / elapsed:>10,.0f} docs/s  ({name} {inserted:,})")
+    for name in names:
+        print(f"✓ Inserted {done[name]:,} synthetic records into {name}")
+    mark_changed(db, *names)
+    if 'complaints' in names:
+        rebuild_complaint_counters(db)
+    rebuild_rollups(db, [name for name in names if name in ROLLUP_DIMENSIONS])
+    if 'lost_found' in names:
+        rebuild_lost_found_matches(db)
+    return db
+
 def main():
     """Main function to run the application"""
     print("🚀 Starting CampusLink Application...")
@@ -217,8 +434,9 @@ def main():
     
     # Check if MongoDB is running
     try:
-        client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=2000)
+        client = MongoClient(settings.MONGODB_URI, serverSelectionTimeoutMS=2000)
         client.server_info()
+        db = client[settings.MONGODB_DB]
         print("✓ MongoDB connection successful")
     except Exception as e:
         print("❌ MongoDB connection failed!")
@@ -226,11 +444,63 @@ def main():
         print("Visit: https://docs.mongodb.com/manual/installation/")
         return
     
+    # Only manage indexes and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--indexes':
+        apply_indexes(db)
+        return
+    
+    # Export one collection and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--export':
+        export_collection(db, sys.argv[2:])
+        return
+    
+    # Give legacy timetable slots their slot ids and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--migrate-timetable-slots':
+        migrate_timetable_slots(db)
+        return
+    
+    # Recount the complaint counters and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--rebuild-complaint-counters':
+        rebuild_complaint_counters(db)
+        return
+    
+    # Recount the activity rollups and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--rebuild-rollups':
+        rebuild_rollups(db, sys.argv[2:] or None)
+        return
+    
+    # Recompute lost & found matches and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--rebuild-lost-found-matches':
+        rebuild_lost_found_matches(db)
+        return
+    
+    # Band legacy skill prices and durations and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--migrate-skill-bands':
+        migrate_skill_bands(db)
+        return
+    
+    # Load synthetic data for load testing and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--synthetic-data':
+        apply_indexes(generate_synthetic_data(db, sys.argv[2:]))
+        return
+    
+    # Move legacy poll voters out of the poll documents and exit
+    if len(sys.argv) > 1 and sys.argv[1] == '--migrate-poll-voters':
+        apply_indexes(db)
+        migrate_poll_voters(db)
+        return
+    
     # Ask user if they want to populate sample data
     if len(sys.argv) > 1 and sys.argv[1] == '--sample-data':
         populate_sample_data()
+        rebuild_complaint_counters(db)
+        rebuild_rollups(db)
+        rebuild_lost_found_matches(db)
+        migrate_skill_bands(db)
         print()
     
+    apply_indexes(db)
+    
     # Import and run the Flask app
     try:
         from app import app
@@ -245,7 +515,7 @@ def main():
         print("\n⚡ Starting server...")
         print("=" * 50)
         
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        app.run(host=app.config['HOST'], port=app.config['PORT'], debug=app.config['DEBUG'])
         
     except Exception as e:
         print(f"❌ Error starting application: {e}")
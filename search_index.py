@@ -0,0 +1,113 @@
+"""
+Full-text search support for CampusLink.
+Declares which fields of which collections are searchable and provides a
+pure-Python inverted index (BM25 ranking) for deployments where MongoDB text
+indexes are not available. The index is built from the database on first use,
+kept up to date by the POST handlers in app.py, and rebuilt periodically to
+pick up writes made by other processes (see periodic_index.py).
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from periodic_index import PeriodicIndex
+
+# Searchable fields per collection and their weights
+SEARCH_FIELDS = {
+    'announcements': {'title': 3, 'content': 1},
+    'news': {'title': 3, 'content': 1},
+    'lost_found': {'title': 3, 'description': 1},
+    'skills': {'title': 3, 'description': 1}
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'will', 'with'
+}
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    """Lowercase text and split it into searchable tokens"""
+    return [token for token in TOKEN.findall((text or '').lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+class InvertedIndex(PeriodicIndex):
+    """In-memory inverted index over the searchable collections"""
+
+    STATE = ('_postings', '_lengths', '_doc_tokens', '_total_length')
+    THREAD_NAME = 'search-index'
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        super().__init__()
+        self._postings = defaultdict(dict)  # token -> {(collection, _id): weighted tf}
+        self._lengths = {}  # (collection, _id) -> weighted document length
+        self._doc_tokens = {}  # (collection, _id) -> tokens it is posted under
+        self._total_length = 0
+
+    def add(self, collection, doc_id, doc):
+        """Index (or re-index) one document"""
+        weights = SEARCH_FIELDS[collection]
+        frequencies = defaultdict(int)
+        for field, weight in weights.items():
+            for token in tokenize(doc.get(field)):
+                frequencies[token] += weight
+        self._write('_index', (collection, doc_id), dict(frequencies))
+
+    def _index(self, key, frequencies):
+        self._remove(key)
+        for token, frequency in frequencies.items():
+            self._postings[token][key] = frequency
+        length = sum(frequencies.values())
+        self._doc_tokens[key] = list(frequencies)
+        self._lengths[key] = length
+        self._total_length += length
+
+    def remove(self, collection, doc_id):
+        self._write('_remove', (collection, doc_id))
+
+    def _load(self, db, batch_size):
+        fresh = InvertedIndex()
+        for name, weights in SEARCH_FIELDS.items():
+            projection = {field: 1 for field in weights}
+            for doc in db[name].find({}, projection).batch_size(batch_size):
+                fresh.add(name, doc['_id'], doc)
+        return fresh
+
+    def search(self, query, collections, limit):
+        """Return the top limit (score, collection, _id) hits for query"""
+        tokens = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._lengths)
+            if not n_docs or not tokens:
+                return []
+            average_length = self._total_length / n_docs or 1
+            scores = defaultdict(float)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if key[0] not in collections:
+                        continue
+                    norm = 1 - self.B + self.B * self._lengths[key] / average_length
+                    scores[key] += idf * frequency * (self.K1 + 1) / (frequency + self.K1 * norm)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, key[0], key[1]) for key, score in top]
+
+    def _remove(self, key):
+        length = self._lengths.pop(key, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in self._doc_tokens.pop(key):
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
@@ -0,0 +1,122 @@
+"""
+Faceted search over the skills marketplace for CampusLink.
+Listings store free-text price ("Free", "₹500") and duration ("2 hours"), so
+each listing also stores the price band and duration band they fall in. One
+aggregation matches the filters, sorts newest first over an index and runs a
+$facet with the requested page next to the counts per category, price band,
+duration band and status. Counts for a set of filters are cached for a few
+seconds, so paging through the same results is a plain indexed find.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+PRICE_BANDS = ['free', 'under-250', '250-499', '500-999', '1000-plus', 'unknown']
+DURATION_BANDS = ['under-1h', '1-2h', '2-4h', '4h-plus', 'unknown']
+FACETS = ['category', 'price_band', 'duration_band', 'status']
+
+PRICE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+DURATION = re.compile(r'(\d+(?:\.\d+)?)\s*(minute|min|hour|hr|h|day|week)', re.IGNORECASE)
+HOURS_PER_UNIT = {'minute': 1 / 60, 'min': 1 / 60, 'hour': 1, 'hr': 1, 'h': 1, 'day': 24, 'week': 168}
+
+def price_band(price):
+    """Band of a price such as 'Free', '₹500' or 1200 (rupees)"""
+    text = str(price if price is not None else '').strip().lower()
+    if not text:
+        return 'unknown'
+    if 'free' in text:
+        return 'free'
+    match = PRICE.search(text)
+    if match is None:
+        return 'unknown'
+    amount = float(match.group().replace(',', ''))
+    if amount == 0:
+        return 'free'
+    if amount < 250:
+        return 'under-250'
+    if amount < 500:
+        return '250-499'
+    if amount < 1000:
+        return '500-999'
+    return '1000-plus'
+
+def duration_band(duration):
+    """Band of a duration such as '90 minutes' or '2 hours'"""
+    match = DURATION.search(str(duration or ''))
+    if match is None:
+        return 'unknown'
+    hours = float(match.group(1)) * HOURS_PER_UNIT[match.group(2).lower()]
+    if hours < 1:
+        return 'under-1h'
+    if hours <= 2:
+        return '1-2h'
+    if hours <= 4:
+        return '2-4h'
+    return '4h-plus'
+
+def skill_bands(doc):
+    """The stored band fields for a skill listing"""
+    return {'price_band': price_band(doc.get('price')), 'duration_band': duration_band(doc.get('duration'))}
+
+def facet_pipeline(query, sort, after_query, limit, projection):
+    """One aggregation returning {'items': page, '<facet>': counts..., 'total': [{'count': n}]}"""
+    items = []
+    if after_query:
+        items.append({'$match': after_query})
+    items.append({'$limit': limit + 1})
+    if projection is not None:
+        items.append({'$project': projection})
+    facets = {'items': items, 'total': [{'$count': 'count'}]}
+    for facet in FACETS:
+        facets[facet] = [{'$sortByCount': '$' + facet}]
+    # The sort runs before $facet so it can use an index; stages inside $facet cannot
+    return [{'$match': query}, {'$sort': dict(sort)}, {'$facet': facets}]
+
+def facet_counts(result):
+    """{facet: [{value, count}], total} from a facet_pipeline result; bands in band order"""
+    counts = {'total': result['total'][0]['count'] if result['total'] else 0}
+    order = {'price_band': PRICE_BANDS, 'duration_band': DURATION_BANDS}
+    for facet in FACETS:
+        values = [{'value': row['_id'], 'count': row['count']} for row in result[facet]]
+        if facet in order:
+            values.sort(key=lambda row: order[facet].index(row['value'])
+                        if row['value'] in order[facet] else len(order[facet]))
+        counts[facet] = values
+    return counts
+
+class FacetCache:
+    """Facet counts per set of filters, kept for a few seconds"""
+
+    def __init__(self, ttl=30, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # filters key -> (expires_at, counts)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['SKILLS_FACET_CACHE_TTL_S']
+        self.max_entries = app.config['SKILLS_FACET_CACHE_MAX_ENTRIES']
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key, counts):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, counts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
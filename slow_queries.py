@@ -0,0 +1,236 @@
+"""
+Slow MongoDB operation log for CampusLink.
+A pymongo CommandListener times every query and write; anything slower than
+SLOW_QUERY_MS is printed and kept with its route, filter shape and sort
+(0 records every command, a negative threshold none).
+With SLOW_QUERY_EXPLAIN on, a background thread re-runs each new slow query
+shape under explain('executionStats'), at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL_S, and flags collection scans, in-memory sorts
+and queries that examine many more documents than they return.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from flask import has_request_context, request
+from pymongo import monitoring
+
+MONITORED = {'find', 'getMore', 'aggregate', 'count', 'distinct', 'findAndModify',
+             'insert', 'update', 'delete'}
+EXPLAINABLE = {'find', 'aggregate', 'count', 'distinct'}
+
+def query_shape(value):
+    """value with every literal replaced by '?', keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and any(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return '?'
+
+def command_query(name, command):
+    """(filter, sort) of a command, as far as it has them"""
+    if name in ('find', 'findAndModify'):
+        return command.get('filter', command.get('query')) or {}, command.get('sort')
+    if name in ('count', 'distinct'):
+        return command.get('query') or {}, None
+    if name == 'aggregate':
+        pipeline = command.get('pipeline') or []
+        match = next((stage['$match'] for stage in pipeline if '$match' in stage), {})
+        sort = next((stage['$sort'] for stage in pipeline if '$sort' in stage), None)
+        return match, sort
+    if name in ('update', 'delete'):
+        statements = command.get(name + 's') or [{}]
+        return statements[0].get('q') or {}, None
+    return None, None
+
+def plan_stages(plan):
+    """Stage names of a query plan tree, root first"""
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if 'stage' in node:
+            stages.append(node['stage'])
+        for key in ('inputStage', 'innerStage', 'outerStage', 'thenStage', 'elseStage', 'queryPlan'):
+            if key in node:
+                pending.append(node[key])
+        pending.extend(node.get('inputStages', []))
+    return stages
+
+def analyze_explain(result, docs_ratio):
+    """Summarize an executionStats explain result and flag common problems"""
+    cursor_stage = result
+    pipeline_stages = []
+    if 'stages' in result:
+        # Aggregation: the query runs in the leading $cursor stage
+        cursor_stage = result['stages'][0].get('$cursor', {})
+        pipeline_stages = [name for stage in result['stages'][1:] for name in stage]
+    stats = cursor_stage.get('executionStats', {})
+    stages = plan_stages(cursor_stage.get('queryPlanner', {}).get('winningPlan', {}))
+    examined = stats.get('totalDocsExamined', 0)
+    returned = stats.get('nReturned', 0)
+
+    flags = []
+    if 'COLLSCAN' in stages:
+        flags.append('COLLSCAN')
+    if 'SORT' in stages or '$sort' in pipeline_stages:
+        flags.append('in-memory SORT')
+    if examined > docs_ratio * max(returned, 1):
+        flags.append(f'docsExamined/nReturned {examined}/{returned}')
+    return {
+        'stages': stages + pipeline_stages,
+        'docs_examined': examined,
+        'keys_examined': stats.get('totalKeysExamined', 0),
+        'returned': returned,
+        'execution_ms': stats.get('executionTimeMillis'),
+        'flags': flags
+    }
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Records commands slower than a threshold; call init_app after the app's MongoConnection exists"""
+
+    def __init__(self, threshold_ms=100, max_entries=200):
+        self.threshold_ms = threshold_ms
+        self.explain = False
+        self.explain_interval = 10.0
+        self.docs_ratio = 10
+        self.connection = None
+        self._entries = deque(maxlen=max_entries)
+        self._plans = OrderedDict()  # shape key -> analysed plan
+        self._queued = set()
+        self._started = {}  # (request_id, connection_id) -> (route, command name, collection, command)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=100)
+        self._thread = None
+        self._pid = None
+        self.slow = 0
+
+    def init_app(self, app):
+        self.threshold_ms = app.config['SLOW_QUERY_MS']
+        self.explain = app.config['SLOW_QUERY_EXPLAIN']
+        self.explain_interval = app.config['SLOW_QUERY_EXPLAIN_INTERVAL_S']
+        self.docs_ratio = app.config['SLOW_QUERY_DOCS_RATIO']
+        self._entries = deque(maxlen=app.config['SLOW_QUERY_MAX_ENTRIES'])
+        self.connection = app.extensions['mongo']
+
+    def started(self, event):
+        if self.threshold_ms < 0 or event.command_name not in MONITORED:
+            return
+        route = request.endpoint if has_request_context() else None
+        collection = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            collection = event.command.get('collection')
+        with self._lock:
+            self._started[(event.request_id, event.connection_id)] = (
+                route, event.command_name, collection, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        if self.threshold_ms < 0:
+            return
+        with self._lock:
+            started = self._started.pop((event.request_id, event.connection_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        route, name, collection, command = started
+        query, sort = command_query(name, command)
+        if sort is not None:
+            # Field order matters, and JSON objects are rendered with sorted keys
+            sort = [[field, direction] for field, direction in sort.items()]
+        entry = {
+            'time': datetime.now(),
+            'route': route,
+            'command': name,
+            'collection': collection,
+            'filter': query_shape(query) if query is not None else None,
+            'sort': sort,
+            'duration_ms': round(duration_ms, 3)
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.slow += 1
+        print(f"🐢 Slow {name} on {collection}: {duration_ms:.1f} ms "
+              f"(route {route or '-'}, filter {json.dumps(entry['filter'])}, sort {json.dumps(sort)})")
+        if self.explain and name in EXPLAINABLE:
+            self._queue_explain(event.database_name, name, collection, command, entry)
+
+    def _shape_key(self, entry):
+        return json.dumps([entry['collection'], entry['command'], entry['filter'], entry['sort']])
+
+    def _queue_explain(self, database_name, name, collection, command, entry):
+        key = self._shape_key(entry)
+        with self._lock:
+            if key in self._plans or key in self._queued:
+                return
+            self._queued.add(key)
+            if self._thread is None or self._pid != os.getpid():
+                # Started lazily so it runs in the worker process
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((key, database_name, name, collection, command, entry))
+        except queue.Full:
+            with self._lock:
+                self._queued.discard(key)
+
+    def _run(self):
+        last = 0.0
+        while True:
+            key, database_name, name, collection, command, entry = self._queue.get()
+            wait = last + self.explain_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            last = time.monotonic()
+            plan = dict(collection=collection, command=name, filter=entry['filter'], sort=entry['sort'])
+            try:
+                plan.update(analyze_explain(self._explain(database_name, name, command), self.docs_ratio))
+            except Exception as e:
+                plan['error'] = str(e)
+            if plan.get('flags'):
+                print(f"⚠️  {name} on {collection} with filter {json.dumps(entry['filter'])}: "
+                      f"{', '.join(plan['flags'])}")
+            with self._lock:
+                self._queued.discard(key)
+                self._plans[key] = plan
+                while len(self._plans) > self._entries.maxlen:
+                    self._plans.popitem(last=False)
+
+    def _explain(self, database_name, name, command):
+        # Re-run the command as it was sent, minus the driver's session and cursor fields
+        keep = {
+            'find': ('find', 'filter', 'sort', 'projection', 'hint', 'skip', 'limit'),
+            'aggregate': ('aggregate', 'pipeline', 'hint'),
+            'count': ('count', 'query', 'hint', 'skip', 'limit'),
+            'distinct': ('distinct', 'key', 'query')
+        }[name]
+        explained = {field: command[field] for field in keep if field in command}
+        if name == 'aggregate':
+            explained['cursor'] = {}
+        database = self.connection.client[database_name]
+        return database.command({'explain': explained, 'verbosity': 'executionStats'})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold_ms,
+                'explain': self.explain,
+                'slow': self.slow,
+                'entries': list(reversed(self._entries)),
+                'plans': list(reversed(self._plans.values()))
+            }
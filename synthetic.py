@@ -0,0 +1,228 @@
+"""
+Synthetic CampusLink data for load testing.
+Documents are generated in fixed-size chunks, each from its own random.Random
+seeded with (seed, collection, chunk), so the same seed and end date always
+produce the same documents and _ids, whichever worker process builds a chunk.
+Each worker inserts its chunk with batched unordered insert_many calls.
+"""
+
+import os
+import random
+import struct
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+from complaint_queue import priority_rank
+from skills_search import skill_bands
+
+CHUNK_SIZE = 20000
+EPOCH = datetime(1970, 1, 1)
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+ROOMS = [f'{block}-{floor}{room:02d}' for block in 'ABCDE' for floor in range(1, 5) for room in range(1, 13)]
+PLACES = ['Main Cafeteria', 'Central Library', 'Computer Lab - Block A', 'Sports Complex',
+          'Auditorium', 'Hostel Block C', 'Parking Lot', 'Main Gate', 'Seminar Hall']
+SUBJECTS = ['Data Structures', 'Operating Systems', 'Computer Networks', 'Linear Algebra',
+            'Digital Electronics', 'Thermodynamics', 'Machine Learning', 'Database Systems',
+            'Signals and Systems', 'Engineering Mechanics', 'Compiler Design', 'Statistics']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Sneha', 'Arjun', 'Kavya',
+               'Alice', 'Bob', 'Sarah', 'Mike', 'Meera', 'Karan', 'Divya', 'Rahul']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Reddy', 'Johnson', 'Smith', 'Wilson', 'Chen',
+              'Nair', 'Gupta', 'Das', 'Khan', 'Menon', 'Rao', 'Singh', 'Joshi']
+WORDS = ('campus student exam schedule library hostel lab project deadline event workshop '
+         'seminar registration semester department faculty notice update meeting club '
+         'sports fest hackathon internship placement result lecture tutorial assignment '
+         'submission room block canteen water wifi power repair request please contact '
+         'office week today tomorrow morning evening new change important reminder').split()
+
+ANNOUNCEMENT_CATEGORIES = ['academic', 'events', 'facilities', 'general', 'sports', 'exams']
+ITEM_CATEGORIES = ['electronics', 'personal', 'academic', 'clothing', 'keys', 'other']
+ITEMS = ['Wallet', 'Phone', 'Backpack', 'Water Bottle', 'Calculator', 'ID Card', 'Laptop Charger',
+         'Umbrella', 'Earphones', 'Notebook', 'Jacket', 'Key Ring', 'Watch', 'Spectacles']
+COLORS = ['Black', 'Blue', 'Red', 'Grey', 'Green', 'White', 'Brown', 'Silver']
+COMPLAINT_CATEGORIES = ['water', 'internet', 'electricity', 'cleanliness', 'furniture', 'mess', 'other']
+COMPLAINT_STATUSES = ['pending'] * 5 + ['in-progress'] * 3 + ['resolved'] * 2
+PRIORITIES = ['low', 'medium', 'medium', 'high']
+SKILL_CATEGORIES = ['programming', 'design', 'music', 'languages', 'mathematics', 'fitness', 'photography']
+NEWS_CATEGORIES = ['internships', 'hackathons', 'scholarships', 'research', 'technology', 'campus']
+POLL_OPTIONS = [['Yes', 'No'], ['Yes', 'No', 'Undecided'],
+                ['Morning', 'Afternoon', 'Evening', 'Night'],
+                ['Strongly agree', 'Agree', 'Neutral', 'Disagree', 'Strongly disagree']]
+
+class Generator:
+    """Builds documents shaped like the ones the app's document builders create"""
+
+    def __init__(self, rng, end, days):
+        self.rng = rng
+        self.end = end
+        self.seconds = days * 24 * 3600
+
+    def date(self):
+        return self.end - timedelta(seconds=self.rng.randrange(self.seconds))
+
+    def object_id(self, date):
+        """ObjectId with date's timestamp, so _id order follows date order as in real data"""
+        return ObjectId(struct.pack('>I', int((date - EPOCH).total_seconds())) + self.rng.getrandbits(64).to_bytes(8, 'big'))
+
+    def words(self, low, high):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def sentence(self, low, high):
+        return self.words(low, high).capitalize() + '.'
+
+    def paragraph(self, sentences=4):
+        return ' '.join(self.sentence(6, 16) for _ in range(self.rng.randint(1, sentences)))
+
+    def name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def email(self, name):
+        return name.lower().replace(' ', '.') + f'{self.rng.randrange(100)}@college.edu'
+
+    def base(self):
+        date = self.date()
+        return {'_id': self.object_id(date), 'date': date}
+
+    def announcements(self, index):
+        return dict(self.base(),
+                    title=self.sentence(3, 8).rstrip('.'),
+                    content=self.paragraph(5),
+                    category=self.rng.choice(ANNOUNCEMENT_CATEGORIES),
+                    author=self.rng.choice(['Admin', 'Academic Office', 'Student Council', 'Library Administration']),
+                    priority=self.rng.choice(PRIORITIES))
+
+    def lost_found(self, index):
+        item = f'{self.rng.choice(COLORS)} {self.rng.choice(ITEMS)}'
+        place = self.rng.choice(PLACES)
+        item_type = self.rng.choice(['lost', 'found'])
+        return dict(self.base(),
+                    title=item,
+                    description=f'{item} {item_type} near {place}. {self.sentence(5, 12)}',
+                    category=self.rng.choice(ITEM_CATEGORIES),
+                    type=item_type,
+                    location=place,
+                    contact=self.email(self.name()),
+                    status='active' if self.rng.random() < 0.7 else 'resolved')
+
+    def complaints(self, index):
+        name = self.name()
+        priority = self.rng.choice(PRIORITIES)
+        return dict(self.base(),
+                    title=self.sentence(3, 7).rstrip('.'),
+                    description=self.paragraph(3),
+                    category=self.rng.choice(COMPLAINT_CATEGORIES),
+                    room_number=self.rng.choice(ROOMS),
+                    priority=priority,
+                    priority_rank=priority_rank(priority),
+                    status=self.rng.choice(COMPLAINT_STATUSES),
+                    student_name=name,
+                    contact=self.email(name))
+
+    def skills(self, index):
+        name = self.name()
+        skill = dict(self.base(),
+                    title=f'{self.rng.choice(SUBJECTS)} {self.rng.choice(["for Beginners", "Crash Course", "Tutoring", "Advanced Topics"])}',
+                    description=self.paragraph(3),
+                    category=self.rng.choice(SKILL_CATEGORIES),
+                    instructor=name,
+                    contact=self.email(name),
+                    duration=f'{self.rng.randint(1, 6)} hours',
+                    price='Free' if self.rng.random() < 0.4 else f'₹{self.rng.randrange(100, 2001, 50)}',
+                    status='available' if self.rng.random() < 0.85 else 'unavailable')
+        skill.update(skill_bands(skill))
+        return skill
+
+    def news(self, index):
+        return dict(self.base(),
+                    title=self.sentence(4, 10).rstrip('.'),
+                    content=self.paragraph(6),
+                    category=self.rng.choice(NEWS_CATEGORIES),
+                    url=f'https://news.example.edu/{self.rng.getrandbits(40):x}',
+                    author=self.rng.choice(['Admin', 'Tech News Team', 'Placement Cell']))
+
+    def polls(self, index):
+        options = self.rng.choice(POLL_OPTIONS)
+        # Heavy-tailed turnout: most polls get a few hundred votes, some get six figures
+        total = min(int(self.rng.paretovariate(1.2) * 200), 2000000)
+        weights = [self.rng.random() for _ in options]
+        votes = {option: int(total * weight / sum(weights)) for option, weight in zip(options, weights)}
+        return dict(self.base(),
+                    question=self.sentence(5, 12).rstrip('.') + '?',
+                    options=options,
+                    votes=votes,
+                    status='active' if self.rng.random() < 0.3 else 'closed',
+                    author=self.rng.choice(['Admin', 'Student Council', 'Library Committee']))
+
+    def timetables(self, index):
+        schedule = []
+        for _ in range(self.rng.randint(10, 30)):
+            created = self.date()
+            schedule.append({
+                'day': self.rng.choice(DAYS),
+                'time': f'{self.rng.randint(8, 17):02d}:{self.rng.choice(["00", "30"])}',
+                'subject': self.rng.choice(SUBJECTS),
+                'room': self.rng.choice(ROOMS),
+                'professor': f'Prof. {self.rng.choice(LAST_NAMES)}',
+                'duration': self.rng.choice(['50', '60', '90', '120']),
+                'notes': '',
+                'slot_id': self.object_id(created),
+                'created_at': created
+            })
+        return {
+            '_id': self.object_id(self.end),
+            # One timetable per user; user ids are what the unique index enforces
+            'user_id': f'user{index:08d}',
+            'schedule': schedule,
+            'updated_at': max(item['created_at'] for item in schedule)
+        }
+
+COLLECTIONS = ['announcements', 'lost_found', 'complaints', 'skills', 'news', 'polls', 'timetables']
+
+# Per-process MongoClient, created after the worker has started
+_db = None
+
+def _init_worker(uri, db_name):
+    global _db
+    _db = MongoClient(uri)[db_name]
+
+def _insert_chunk(task):
+    """Generate and insert one chunk; returns (collection, documents inserted)"""
+    name, chunk, start, count, seed, end, days, batch_size = task
+    generator = Generator(random.Random(f'{seed}:{name}:{chunk}'), end, days)
+    build = getattr(generator, name)
+    inserted = 0
+    batch = []
+    for index in range(start, start + count):
+        batch.append(build(index))
+        if len(batch) == batch_size or index == start + count - 1:
+            try:
+                inserted += len(_db[name].insert_many(batch, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                # Documents from an earlier run with the same seed are already there
+                inserted += e.details['nInserted']
+            batch = []
+    return name, inserted
+
+def generate(uri, db_name, counts, seed=42, end=None, days=365, workers=None,
+             batch_size=1000, chunk_size=CHUNK_SIZE):
+    """Insert counts[name] synthetic documents into each collection.
+
+    Yields (collection, inserted so far, total, elapsed seconds) after every
+    chunk so callers can report progress.
+    """
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    tasks = []
+    for name in COLLECTIONS:
+        total = counts.get(name, 0)
+        for chunk, start in enumerate(range(0, total, chunk_size)):
+            tasks.append((name, chunk, start, min(chunk_size, total - start),
+                          seed, end, days, batch_size))
+    done = {name: 0 for name in counts}
+    started = time.perf_counter()
+    with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(uri, db_name)) as pool:
+        for name, inserted in pool.imap_unordered(_insert_chunk, tasks):
+            done[name] += inserted
+            yield name, done[name], counts[name], time.perf_counter() - started
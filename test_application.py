@@ -61,6 +61,8 @@ def main():
     
     # Test Announcements API
     success, data = test_endpoint('GET', '/api/announcements', description="Get announcements")
+    if success and data.get('next_cursor'):
+        test_endpoint('GET', f"/api/announcements?cursor={data['next_cursor']}", description="Get next announcements page")
     
     # Test adding announcement
     announcement_data = {
@@ -70,6 +72,7 @@ def main():
         'author': 'Test Admin'
     }
     test_endpoint('POST', '/api/announcements', announcement_data, "Add announcement")
+    test_endpoint('POST', '/api/announcements/bulk', [announcement_data] * 3, "Bulk add announcements")
     
     # Test Lost & Found API
     test_endpoint('GET', '/api/lost-found', description="Get lost & found items")
@@ -148,6 +151,12 @@ def main():
     }
     test_endpoint('POST', '/api/polls', poll_data, "Add poll")
     
+    # Test Dashboard API
+    test_endpoint('GET', '/api/dashboard', description="Get dashboard summary")
+    
+    # Test Search API
+    test_endpoint('GET', '/api/search?q=test', description="Search")
+    
     print("\n" + "=" * 50)
     print("🎉 Testing completed!")
     print("Check the results above for any failed tests.")
@@ -0,0 +1,39 @@
+"""
+Shared fixtures for the CampusLink unit tests.
+The tests run without a MongoDB server: modules that take a database get a
+mongomock one, and app.py's routes run against a mongomock-backed app.
+"""
+
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().campuslink_test
+
+@pytest.fixture
+def campuslink(monkeypatch):
+    """The app module, with every MongoClient it builds replaced by a fresh mongomock one"""
+    import app as campuslink
+    monkeypatch.setattr('database.MongoClient', mongomock.MongoClient)
+    # mongomock has no $substrCP, which the list summaries use for snippets
+    monkeypatch.setattr(campuslink, 'SNIPPET_FIELDS', {})
+    return campuslink
+
+@pytest.fixture
+def app(campuslink):
+    return campuslink.create_app('testing')
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def app_db(app):
+    """The mongomock database behind app"""
+    return app.extensions['mongo'].db
@@ -0,0 +1,59 @@
+"""Tests for the complaint priority ranks and counters"""
+
+import pytest
+
+from complaint_queue import (COUNTERS_ID, UNRANKED, backfill_priority_rank, counter_inc, priority_rank,
+                             rebuild_counters, status_change_inc, summarize_counts)
+
+@pytest.mark.parametrize('priority, rank', [
+    ('urgent', 0), ('high', 1), ('medium', 2), ('low', 3), ('whenever', UNRANKED), (None, UNRANKED), (['high'], UNRANKED)
+])
+def test_priority_rank(priority, rank):
+    assert priority_rank(priority) == rank
+
+def test_unknown_values_are_counted_under_other():
+    assert counter_inc('high', 'pending') == {'$inc': {'counts.pending.high': 1}}
+    assert counter_inc('whenever', 'pending') == {'$inc': {'counts.pending.other': 1}}
+    # Field names never come straight from stored data
+    assert counter_inc('a.b', '$status') == {'$inc': {'counts.other.other': 1}}
+
+def test_status_change_moves_one_count():
+    assert status_change_inc('low', 'pending', 'resolved') == \
+        {'$inc': {'counts.pending.low': -1, 'counts.resolved.low': 1}}
+
+def test_summarize_counts():
+    summary = summarize_counts({'counts': {'pending': {'high': 2, 'low': 1}, 'in-progress': {'high': 1},
+                                           'resolved': {'low': 5}}})
+    assert summary['open'] == 4
+    assert summary['by_status'] == {'pending': 3, 'in-progress': 1, 'resolved': 5}
+    assert summary['open_by_priority'] == {'high': 3, 'low': 1}
+    assert summarize_counts(None)['open'] == 0
+
+def test_rebuild_recounts_and_backfills_ranks(db):
+    db.complaints.insert_many([
+        {'priority': 'high', 'status': 'pending'},
+        {'priority': 'high', 'status': 'pending'},
+        {'priority': 'whenever', 'status': 'resolved'},
+        {'priority': 'low', 'status': 'closed', 'priority_rank': 3}
+    ])
+    assert backfill_priority_rank(db) == 3
+    assert sorted(doc['priority_rank'] for doc in db.complaints.find()) == [1, 1, 3, UNRANKED]
+    assert rebuild_counters(db) == {'pending': {'high': 2}, 'resolved': {'other': 1}, 'other': {'low': 1}}
+    assert db.counters.find_one({'_id': COUNTERS_ID})['counts']['pending'] == {'high': 2}
+
+def test_routes_keep_the_counters_in_step(client, app_db):
+    def post(priority):
+        return client.post('/api/complaints', json={'title': 'Leak', 'description': 'Tap', 'category': 'water',
+                                                    'priority': priority}).json['id']
+
+    first, _, other = post('high'), post('low'), post('whenever')
+    assert client.put('/api/complaints', json={'id': first, 'status': 'resolved'}).json['success']
+    # Setting the same status again changes nothing
+    client.put('/api/complaints', json={'id': first, 'status': 'resolved'})
+    assert client.put('/api/complaints', json={'id': other, 'status': 'bogus'}).status_code == 400
+
+    counts = client.get('/api/complaints/counts').json
+    assert counts['counts'] == {'pending': {'high': 0, 'low': 1, 'other': 1}, 'resolved': {'high': 1}}
+    assert counts['open'] == 2
+    # A full recount agrees with the incremental counts
+    assert summarize_counts({'counts': rebuild_counters(app_db)})['by_status'] == counts['by_status']
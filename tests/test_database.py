@@ -0,0 +1,80 @@
+"""Tests for the per-process MongoDB connection and per-app state"""
+
+import mongomock
+import pytest
+
+import database
+from database import MongoConnection, client_options
+
+SETTINGS = {
+    'MONGODB_URI': 'mongodb://db.example.edu:27017/',
+    'MONGODB_DB': 'campuslink_test',
+    'MONGODB_MAX_POOL_SIZE': 50,
+    'MONGODB_MIN_POOL_SIZE': 0,
+    'MONGODB_MAX_IDLE_TIME_MS': 60000,
+    'MONGODB_WAIT_QUEUE_TIMEOUT_MS': None
+}
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Every MongoClient the connection builds, as (client, uri, options)"""
+    built = []
+    def build(uri, **options):
+        client = mongomock.MongoClient()
+        built.append((client, uri, options))
+        return client
+    monkeypatch.setattr(database, 'MongoClient', build)
+    return built
+
+def test_client_options_leave_out_unset_settings():
+    assert client_options(SETTINGS) == {'maxPoolSize': 50, 'minPoolSize': 0, 'maxIdleTimeMS': 60000}
+
+def test_client_is_built_on_first_use_with_the_pool_settings(clients):
+    connection = MongoConnection(SETTINGS)
+    assert clients == []
+
+    assert connection.db.name == 'campuslink_test'
+    assert connection.client is connection.client
+    (_, uri, options), = clients
+    assert uri == SETTINGS['MONGODB_URI']
+    assert options['maxPoolSize'] == 50 and 'waitQueueTimeoutMS' not in options
+    assert options['event_listeners'][0] is connection.pool_stats
+
+def test_a_forked_process_builds_its_own_client(clients, monkeypatch):
+    prepared = []
+    connection = MongoConnection(SETTINGS, on_connect=lambda db: prepared.append(db.name) or len(prepared))
+    parent = connection.client
+    connection.pool_stats.checkouts = 3
+
+    monkeypatch.setattr(database.os, 'getpid', lambda: -1)
+    assert connection.client is not parent
+    assert connection.client is connection.client
+    assert len(clients) == 2
+    assert connection.pool_stats.checkouts == 0
+    assert prepared == ['campuslink_test'] * 2 and connection.setup == 2
+
+def test_failed_setup_is_retried_on_next_use(clients):
+    attempts = []
+    def on_connect(db):
+        attempts.append(db)
+        if len(attempts) == 1:
+            raise RuntimeError('not ready')
+        return {}
+
+    connection = MongoConnection(SETTINGS, on_connect=on_connect)
+    with pytest.raises(RuntimeError):
+        connection.client
+    assert connection.setup == {}
+    assert len(clients) == 2
+
+def test_each_app_has_its_own_state(campuslink):
+    first, second = campuslink.create_app('testing'), campuslink.create_app('testing')
+    for name in ['response_cache', 'metrics', 'slow_queries', 'search_index', 'room_index',
+                 'match_index', 'skills_facets', 'event_broker']:
+        assert first.extensions[name] is not second.extensions[name]
+
+    first.test_client().post('/api/news', json={'title': 'Results', 'content': 'Out now', 'category': 'campus',
+                                                'url': 'https://example.edu', 'author': 'Admin'})
+    assert len(second.test_client().get('/api/news').json['items']) == 0
+    assert first.extensions['mongo'].db.cache_versions.find_one({'_id': 'news'})['version'] == 1
+    assert second.extensions['mongo'].db.cache_versions.find_one({'_id': 'news'})['version'] == 0
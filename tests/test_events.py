@@ -0,0 +1,117 @@
+"""Tests for the server-sent event broker"""
+
+import json
+
+from events import EventBroker
+
+def drain(subscriber):
+    events = []
+    while True:
+        event = subscriber.get(0)
+        if event is None:
+            return events
+        events.append(event)
+
+def test_subscribers_get_the_types_they_asked_for():
+    broker = EventBroker()
+    everything, polls_only = broker.subscribe(), broker.subscribe(types={'poll'})
+    broker.publish('news', {'title': 'Results'})
+    broker.publish('poll', {'question': 'Lunch?'})
+
+    assert [event['type'] for event in drain(everything)] == ['news', 'poll']
+    assert [json.loads(event['data']) for event in drain(polls_only)] == [{'question': 'Lunch?'}]
+
+def test_keyed_events_replace_undelivered_ones():
+    broker = EventBroker()
+    subscriber = broker.subscribe()
+    broker.publish('poll_votes', {'votes': {'a': 1}}, key='poll1')
+    broker.publish('news', {'title': 'Results'})
+    broker.publish('poll_votes', {'votes': {'a': 2}}, key='poll1')
+
+    events = drain(subscriber)
+    assert [event['type'] for event in events] == ['news', 'poll_votes']
+    assert json.loads(events[1]['data']) == {'votes': {'a': 2}}
+
+def test_a_subscriber_that_falls_behind_is_dropped():
+    broker = EventBroker(queue_size=2)
+    slow = broker.subscribe()
+    for n in range(3):
+        broker.publish('news', {'n': n})
+
+    assert slow.closed and slow.get(0) is None
+    assert broker.stats()['overflows'] == 1
+    assert broker.stats()['subscribers'] == 0
+
+def test_reconnecting_with_last_event_id_replays_what_was_missed():
+    broker = EventBroker()
+    first = broker.subscribe()
+    broker.publish('news', {'n': 1})
+    seen = drain(first)[-1]['id']
+    broker.unsubscribe(first)
+    broker.publish('news', {'n': 2})
+    broker.publish('news', {'n': 3})
+
+    replayed = drain(broker.subscribe(last_event_id=seen))
+    assert [json.loads(event['data'])['n'] for event in replayed] == [2, 3]
+
+def test_unknown_or_expired_last_event_id_asks_the_client_to_reload():
+    broker = EventBroker(history=2)
+    broker.subscribe()
+    first_id = None
+    for n in range(5):
+        broker.publish('news', {'n': n})
+        first_id = first_id or broker._history[-1]['id']
+
+    for last_event_id in [first_id, 'otherprocess-3', 'garbage']:
+        assert [event['type'] for event in drain(broker.subscribe(last_event_id=last_event_id))] == ['reset']
+
+def test_missing_more_than_a_queue_holds_asks_the_client_to_reload():
+    broker = EventBroker(queue_size=2)
+    first = broker.subscribe()
+    broker.publish('news', {'n': 0})
+    seen = drain(first)[-1]['id']
+    broker.unsubscribe(first)
+    for n in range(1, 4):
+        broker.publish('news', {'n': n})
+
+    for _ in range(2):
+        subscriber = broker.subscribe(last_event_id=seen)
+        assert not subscriber.closed
+        chunks = broker.stream(subscriber)
+        assert next(chunks) == 'retry: 3000\n\n'
+        assert '\nevent: reset\n' in next(chunks)
+        chunks.close()
+    assert broker.stats()['overflows'] == 2
+    assert broker.stats()['subscribers'] == 0
+
+def test_subscribers_are_capped():
+    broker = EventBroker(max_subscribers=1)
+    subscriber = broker.subscribe()
+    assert broker.subscribe() is None
+    broker.unsubscribe(subscriber)
+    assert broker.subscribe() is not None
+
+def test_stream_formats_events_and_heartbeats():
+    broker = EventBroker(heartbeat=0)
+    subscriber = broker.subscribe()
+    broker.publish('news', {'title': 'Results'})
+    chunks = broker.stream(subscriber)
+
+    assert next(chunks) == 'retry: 3000\n\n'
+    event = next(chunks)
+    assert event.startswith('id: ') and '\nevent: news\ndata: {"title":"Results"}\n\n' in event
+    assert next(chunks) == ': keepalive\n\n'
+    chunks.close()
+    assert broker.stats()['subscribers'] == 0
+
+def test_events_route(client):
+    assert client.get('/api/events?types=news,bogus').status_code == 400
+
+    response = client.get('/api/events?types=news')
+    assert response.mimetype == 'text/event-stream'
+    chunks = response.response
+    assert next(chunks) == b'retry: 3000\n\n'
+    client.post('/api/news', json={'title': 'Results', 'content': 'Out now', 'category': 'campus',
+                                   'url': 'https://example.edu', 'author': 'Admin'})
+    assert b'event: news\n' in next(chunks)
+    response.close()
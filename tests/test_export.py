@@ -0,0 +1,74 @@
+"""Tests for the streaming NDJSON/CSV export"""
+
+import csv
+import json
+
+from bson import ObjectId
+
+import run
+from export import export_query, iter_export, last_exported_id
+
+def insert_reports(db, *docs):
+    ids = [ObjectId() for _ in docs]
+    db.lost_found.insert_many([{'_id': _id, **doc} for _id, doc in zip(ids, docs)])
+    return ids
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+def test_csv_columns_cover_every_document(db):
+    insert_reports(db, {'title': 'Keys'}, {'title': 'Wallet', 'location': 'A-101'})
+    rows = list(csv.DictReader(''.join(iter_export(db.lost_found, 'csv', {})).splitlines()))
+
+    assert list(rows[0]) == ['_id', 'title', 'location']
+    assert rows[0]['location'] == '' and rows[1]['location'] == 'A-101'
+
+def test_csv_with_fields_exports_only_those_columns(db):
+    insert_reports(db, {'title': 'Keys', 'status': 'open', 'tags': ['red']})
+    lines = ''.join(iter_export(db.lost_found, 'csv', {}, fields=['tags', 'title'])).splitlines()
+
+    assert lines[0] == '_id,tags,title'
+    assert lines[1].endswith(',"[""red""]",Keys')
+
+def test_csv_is_written_one_batch_per_chunk(db):
+    insert_reports(db, *({'title': str(n)} for n in range(5)))
+    chunks = list(iter_export(db.lost_found, 'csv', {}, batch_size=2))
+    assert [chunk.count('\n') for chunk in chunks] == [3, 2, 1]
+
+def test_ndjson_export_after_an_id(db):
+    ids = insert_reports(db, {'title': 'Keys'}, {'title': 'Wallet'})
+    lines = ''.join(iter_export(db.lost_found, 'ndjson', export_query(after=str(ids[0])))).splitlines()
+    assert [json.loads(line) for line in lines] == [{'_id': str(ids[1]), 'title': 'Wallet'}]
+
+def test_last_exported_id_truncates_a_half_written_record(tmp_path):
+    first, second = ObjectId(), ObjectId()
+    path = tmp_path / 'export.ndjson'
+    path.write_text(json.dumps({'_id': str(first)}) + '\n' + json.dumps({'_id': str(second)}) + '\n{"_id": "')
+
+    assert last_exported_id(str(path), 'ndjson') == str(second)
+    assert path.read_text().endswith(str(second) + '"}\n')
+    assert last_exported_id(str(tmp_path / 'missing.ndjson'), 'ndjson') is None
+
+def test_last_exported_id_of_a_csv_file(tmp_path):
+    first, second = ObjectId(), ObjectId()
+    path = tmp_path / 'export.csv'
+    path.write_text(f'_id,title\n{first},"Two\nlines"\n{second},Keys\n{ObjectId()},"unterminated', newline='')
+
+    assert last_exported_id(str(path), 'csv') == str(second)
+    assert path.read_text().endswith(f'{second},Keys\n')
+
+def test_resumed_csv_export_keeps_the_files_columns(db, tmp_path):
+    first, = insert_reports(db, {'title': 'Keys', 'location': 'Library', 'status': 'open'})
+    path = str(tmp_path / 'lost_found.csv')
+    run.export_collection(db, ['lost_found', '--format', 'csv', '--output', path])
+    # Later documents have their fields in another order, and one more field
+    insert_reports(db, {'status': 'pending', 'priority': 'high', 'location': 'A-101', 'title': 'Wallet'})
+    run.export_collection(db, ['lost_found', '--format', 'csv', '--output', path, '--resume'])
+
+    rows = read_csv(path)
+    assert list(rows[0]) == ['_id', 'title', 'location', 'status']
+    assert rows[0]['_id'] == str(first)
+    assert [(row['title'], row['location'], row['status']) for row in rows] == [
+        ('Keys', 'Library', 'open'), ('Wallet', 'A-101', 'pending')
+    ]
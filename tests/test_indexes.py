@@ -0,0 +1,47 @@
+"""Tests for the declarative index registry"""
+
+import mongomock
+
+from indexes import INDEXES, REQUIRED_INDEXES, ensure_indexes, ensure_required_indexes
+
+def test_ensure_indexes_creates_every_declared_index(db):
+    assert ensure_indexes(db) == {}
+    for name, models in INDEXES.items():
+        declared = {model.document['name'] for model in models}
+        assert set(db[name].index_information()) - {'_id_'} == declared
+
+def test_ensure_indexes_is_idempotent(db):
+    ensure_indexes(db)
+    assert ensure_indexes(db) == {}
+
+def test_ensure_required_indexes_only_creates_required_indexes(db):
+    assert ensure_required_indexes(db) == {}
+    for name, required in REQUIRED_INDEXES.items():
+        assert set(db[name].index_information()) - {'_id_'} == required
+    assert 'date_id' not in db.announcements.index_information()
+
+def test_ensure_required_indexes_reports_failures(db):
+    db.poll_votes.insert_many([{'poll_id': 1, 'voter_id': 'x'} for _ in range(2)])
+    assert list(ensure_required_indexes(db)) == ['poll_votes']
+
+def test_required_indexes_are_created_on_first_connection(app_db):
+    assert 'poll_voter' in app_db.poll_votes.index_information()
+    assert 'text' in app_db.news.index_information()
+
+def test_duplicate_votes_are_rejected(client):
+    poll_id = client.post('/api/polls', json={'question': 'Lunch?', 'options': ['Yes', 'No']}).json['id']
+    vote = {'poll_id': poll_id, 'option': 'Yes', 'voter_id': 'student1'}
+    assert client.put('/api/polls', json=vote).json['success']
+    assert client.put('/api/polls', json=vote).json == {'success': False, 'message': 'Already voted'}
+
+def test_voting_is_refused_when_the_unique_index_cannot_be_built(campuslink, monkeypatch):
+    def client_with_duplicates(*args, **kwargs):
+        client = mongomock.MongoClient()
+        client.campuslink_test.poll_votes.insert_many([{'poll_id': 1, 'voter_id': 'x'} for _ in range(2)])
+        return client
+
+    monkeypatch.setattr('database.MongoClient', client_with_duplicates)
+    client = campuslink.create_app('testing').test_client()
+    poll_id = client.post('/api/polls', json={'question': 'Lunch?', 'options': ['Yes', 'No']}).json['id']
+    response = client.put('/api/polls', json={'poll_id': poll_id, 'option': 'Yes'})
+    assert response.status_code == 503
@@ -0,0 +1,84 @@
+"""Tests for the streaming bulk ingestion parsers and batch inserts"""
+
+import io
+import json
+
+import pytest
+
+from ingest import MalformedBody, bulk_insert, iter_json_array, iter_ndjson
+
+def parse_array(body, max_record_bytes=1024, chunk_size=7):
+    # A small chunk size makes records straddle chunk boundaries
+    return list(iter_json_array(io.BytesIO(body), max_record_bytes, chunk_size))
+
+def test_json_array_records_are_parsed_across_chunks():
+    records = [{'title': f'Notice {n}', 'tags': ['a', 'b'], 'text': 'é' * n} for n in range(20)]
+    assert parse_array(json.dumps(records).encode()) == list(enumerate(records))
+
+def test_json_array_numbers_at_a_chunk_boundary_are_not_cut():
+    assert parse_array(b'[123456, 7]', chunk_size=4) == [(0, 123456), (1, 7)]
+
+@pytest.mark.parametrize('body', [b'[]', b'  [ \n ]  '])
+def test_empty_json_array(body):
+    assert parse_array(body) == []
+
+@pytest.mark.parametrize('body, message', [
+    (b'{"title": "x"}', 'expected a JSON array'),
+    (b'[{"title": "x"} {"title": "y"}]', 'expected , or ] after record 0'),
+    (b'[{"title": "x"}, {"title": ', 'invalid JSON in record 1'),
+    (b'["\xff\xfe"]', 'body is not UTF-8'),
+])
+def test_malformed_json_array(body, message):
+    with pytest.raises(MalformedBody, match=message):
+        parse_array(body)
+
+def test_oversized_json_array_record_stops_the_parse():
+    body = json.dumps([{'text': 'x' * 100}]).encode()
+    with pytest.raises(MalformedBody, match='record 0 too large'):
+        parse_array(body, max_record_bytes=50)
+
+def test_ndjson_reports_bad_lines_and_keeps_going():
+    body = b'{"a": 1}\n\nnot json\n' + b'{"text": "' + b'x' * 100 + b'"}\n{"a": 2}'
+    records = list(iter_ndjson(io.BytesIO(body), max_record_bytes=50))
+    assert records[0] == (0, {'a': 1})
+    assert isinstance(records[1][1], ValueError) and 'invalid JSON' in str(records[1][1])
+    assert isinstance(records[2][1], ValueError) and str(records[2][1]) == 'record too large'
+    assert records[3] == (3, {'a': 2})
+
+def build(data):
+    return {'title': data['title']}
+
+def test_bulk_insert_batches_and_collects_record_errors(db):
+    records = [(0, {'title': 'a'}), (1, {'name': 'no title'}), (2, ValueError('invalid JSON')),
+               (3, ['not', 'an', 'object']), (4, {'title': 'b'}), (5, {'title': 'c'})]
+    batches = []
+    summary = bulk_insert(db.news, records, build, batch_size=2, max_errors=2, on_insert=batches.append)
+
+    assert summary['inserted'] == 3
+    assert summary['failed'] == 3
+    assert summary['errors'] == [{'index': 1, 'error': 'missing field title'},
+                                 {'index': 2, 'error': 'invalid JSON'}]
+    assert summary['errors_truncated'] and not summary['success']
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert db.news.count_documents({}) == 3
+
+def test_bulk_insert_keeps_the_records_before_a_malformed_body(db):
+    summary = bulk_insert(db.news, iter_json_array(io.BytesIO(b'[{"title": "a"}, oops]'), 1024),
+                          build, batch_size=10, max_errors=10)
+    assert summary['inserted'] == 1
+    assert summary['error'] == 'invalid JSON in record 1'
+    assert not summary['success']
+
+def test_bulk_route_answers_a_malformed_body_with_400(client, app_db):
+    response = client.post('/api/announcements/bulk', data=b'[{"title": "a", "content": "b", "category": "c"}, x',
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert response.json['inserted'] == 1
+    assert response.json['message'] == 'invalid JSON in record 1'
+
+def test_bulk_route_accepts_ndjson(client, app_db):
+    body = b'\n'.join(json.dumps({'title': f't{n}', 'content': 'b', 'category': 'c'}).encode() for n in range(3))
+    response = client.post('/api/announcements/bulk', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.json['inserted'] == 3 and response.json['success']
+    assert app_db.announcements.count_documents({}) == 3
@@ -0,0 +1,127 @@
+"""Tests for lost & found matching"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from lost_found_matcher import MatchIndex, item_tokens, match_updates, rebuild_matches
+
+def report(side, title, category='electronics', location='Central Library', **fields):
+    return dict({'_id': ObjectId(), 'type': side, 'title': title, 'description': f'{title} {side} near {location}',
+                 'category': category, 'location': location, 'status': 'active'}, **fields)
+
+def test_item_tokens_weigh_titles_and_drop_report_boilerplate():
+    tokens = item_tokens({'title': 'Black Phone', 'description': 'Lost my phone near the library'})
+    assert tokens == {'black': 2, 'phone': 2, 'library': 1}
+
+@pytest.fixture
+def index():
+    index = MatchIndex(top_k=2, min_score=0.3)
+    index.built = True
+    return index
+
+def test_reports_match_the_other_side_only_best_first(index):
+    lost = report('lost', 'Black Samsung Phone')
+    same = report('found', 'Black Samsung Phone')
+    close = report('found', 'Samsung Phone', location='Main Gate')
+    unrelated = report('found', 'Blue Umbrella', category='personal', location='Main Gate')
+    other_lost = report('lost', 'Black Samsung Phone')
+    for doc in (lost, same, close, unrelated, other_lost):
+        index.add(doc)
+
+    matches = index.match(lost['_id'])
+    assert [other_id for _, other_id in matches] == [same['_id'], close['_id']]
+    assert matches[0][0] > matches[1][0] >= 0.3
+
+def test_inactive_and_untyped_reports_are_not_indexed(index):
+    assert not index.add(report('lost', 'Wallet', status='resolved'))
+    assert not index.add(report('stolen', 'Wallet'))
+    assert index.item_ids() == []
+
+def test_offer_keeps_the_best_top_k(index):
+    item = report('lost', 'Wallet')
+    index.add(item)
+    assert index.offer(item['_id'], 'a', 0.5)
+    assert index.offer(item['_id'], 'b', 0.9)
+    assert not index.offer(item['_id'], 'a', 0.5)
+    assert not index.offer(item['_id'], 'c', 0.4)
+    assert index.offer(item['_id'], 'd', 0.7)
+    assert index.top(item['_id']) == [(0.9, 'b'), (0.7, 'd')]
+
+def test_match_updates_persist_both_sides(index, db):
+    lost, found = report('lost', 'Black Phone'), report('found', 'Black Phone')
+    # found was matched (to nothing) when it was posted
+    index.add(found)
+    db.lost_found_matches.bulk_write(match_updates(index, found['_id'], []))
+    index.add(lost)
+    db.lost_found_matches.bulk_write(match_updates(index, lost['_id'], index.match(lost['_id'])))
+
+    assert [match['_id'] for match in db.lost_found_matches.find_one({'_id': lost['_id']})['matches']] == [found['_id']]
+    assert [match['_id'] for match in db.lost_found_matches.find_one({'_id': found['_id']})['matches']] == [lost['_id']]
+    assert index.top(found['_id'])[0][1] == lost['_id']
+
+def test_sync_picks_up_reports_inserted_elsewhere(db):
+    db.lost_found.insert_one(report('lost', 'Black Phone'))
+    index = MatchIndex()
+    index.build(db)
+    elsewhere = report('found', 'Black Phone')
+    db.lost_found.insert_one(elsewhere)
+    db.lost_found_matches.insert_one({'_id': elsewhere['_id'], 'matches': []})
+    # Reports too old for the sync window are left to the periodic rebuild
+    old = report('found', 'Black Phone', _id=ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(hours=1)))
+    db.lost_found.insert_one(old)
+
+    assert index.sync(db) == 1
+    assert elsewhere['_id'] in index and old['_id'] not in index
+    assert index.sync(db) == 0
+
+def test_reports_added_during_a_rebuild_survive_the_swap(db, monkeypatch):
+    db.lost_found.insert_one(report('lost', 'Black Phone'))
+    index = MatchIndex()
+    index.build(db)
+    loading, release = threading.Event(), threading.Event()
+    load = MatchIndex._load
+
+    def slow_load(self, db, batch_size):
+        fresh = load(self, db, batch_size)
+        loading.set()
+        release.wait(5)
+        return fresh
+
+    monkeypatch.setattr(MatchIndex, '_load', slow_load)
+    index.built_at -= 1000
+    index.build(db, max_age=1)
+    assert loading.wait(5)
+    added = report('found', 'Black Phone')
+    index.add(added)
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'match-index':
+            thread.join(5)
+    assert added['_id'] in index
+    assert len(index.item_ids()) == 2
+
+def test_rebuild_matches_replaces_stale_lists(db):
+    lost, found = report('lost', 'Black Phone'), report('found', 'Black Phone')
+    db.lost_found.insert_many([lost, found, report('found', 'Umbrella', status='resolved')])
+    db.lost_found_matches.insert_one({'_id': ObjectId(), 'matches': [], 'updated_at': datetime(2020, 1, 1)})
+
+    assert rebuild_matches(db) == 2
+    assert db.lost_found_matches.count_documents({}) == 2
+
+def test_matches_routes(client, app_db):
+    found = client.post('/api/lost-found', json={'title': 'Black Phone', 'description': 'Found near library',
+                                                 'category': 'electronics', 'type': 'found',
+                                                 'location': 'Central Library', 'contact': 'a@college.edu'}).json['id']
+    legacy = report('lost', 'Black Phone')
+    app_db.lost_found.insert_one(legacy)
+    url = f"/api/lost-found/{legacy['_id']}/matches"
+
+    # GET only reads; POST matches the report
+    assert client.get(url).json['matches'] == []
+    assert app_db.lost_found_matches.find_one({'_id': legacy['_id']}) is None
+    assert [match['_id'] for match in client.post(url).json['matches']] == [found]
+    assert [match['_id'] for match in client.get(url).json['matches']] == [found]
+    assert client.get(f'/api/lost-found/{ObjectId()}/matches').status_code == 404
@@ -0,0 +1,49 @@
+"""Tests for the Prometheus metrics"""
+
+from types import SimpleNamespace
+
+from metrics import Histogram
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(('news',), value)
+
+    assert histogram.render() == [
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="news",le="0.1"} 1',
+        'latency_seconds_bucket{route="news",le="1"} 3',
+        'latency_seconds_bucket{route="news",le="+Inf"} 4',
+        'latency_seconds_sum{route="news"} 4.050000',
+        'latency_seconds_count{route="news"} 4'
+    ]
+
+def test_metrics_expose_requests_after_they_are_handled(client):
+    client.get('/api/news')
+    client.get('/api/news/garbage')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    labels = 'endpoint="campuslink.api_news",method="GET",status="200"'
+    assert '# TYPE campuslink_http_request_duration_seconds histogram' in body
+    assert f'campuslink_http_request_duration_seconds_count{{{labels}}} 1' in body
+    assert f'campuslink_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in body
+    assert 'endpoint="campuslink.api_news_detail",method="GET",status="404"' in body
+    assert 'campuslink_mongodb_pool_open_connections 0' in body
+
+def test_mongodb_commands_are_timed_by_collection(app):
+    listener = app.extensions['metrics'].command_listener
+    event = SimpleNamespace(command_name='find', command={'find': 'news'}, request_id=1, connection_id=1,
+                            duration_micros=2000)
+    listener.started(event)
+    listener.succeeded(event)
+    listener.started(SimpleNamespace(**dict(vars(event), request_id=2)))
+    listener.failed(SimpleNamespace(**dict(vars(event), request_id=2)))
+
+    body = app.extensions['metrics'].render()
+    assert 'campuslink_mongodb_command_duration_seconds_count{collection="news",command="find"} 2' in body
+    assert 'campuslink_mongodb_command_failures_total{collection="news",command="find"} 1' in body
+
+def test_metrics_can_be_turned_off(campuslink, monkeypatch):
+    monkeypatch.setattr(campuslink.config['testing'], 'METRICS_ENABLED', False)
+    assert campuslink.create_app('testing').test_client().get('/metrics').status_code == 404
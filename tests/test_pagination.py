@@ -0,0 +1,64 @@
+"""Tests for keyset pagination cursors"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from complaint_queue import QUEUE_SORT, priority_rank
+
+def test_cursor_round_trips_its_sort_key(campuslink):
+    doc = {'_id': ObjectId(), 'date': datetime(2024, 5, 1, 9, 30, 15, 250), 'priority_rank': 2}
+    token = campuslink.encode_cursor(doc)
+    assert '=' not in token
+    assert campuslink.decode_cursor(token) == (doc['date'], doc['_id'])
+    assert campuslink.decode_cursor(campuslink.encode_cursor(doc, QUEUE_SORT), QUEUE_SORT) == \
+        (2, doc['date'], doc['_id'])
+
+@pytest.mark.parametrize('token', ['garbage', '', 'e30', 'eyJkIjogIngifQ'])
+def test_undecodable_cursor_raises_invalid_cursor(campuslink, token):
+    with pytest.raises(campuslink.InvalidCursor):
+        campuslink.decode_cursor(token)
+
+def test_split_page_returns_a_cursor_only_when_more_follow(campuslink):
+    docs = [{'_id': ObjectId(), 'date': datetime(2024, 1, day)} for day in (3, 2, 1)]
+    page, next_cursor = campuslink.split_page(docs, 2)
+    assert page == docs[:2]
+    assert campuslink.decode_cursor(next_cursor) == (docs[1]['date'], docs[1]['_id'])
+    assert campuslink.split_page(docs, 3) == (docs, None)
+
+def test_list_route_pages_through_every_document_once(client, app_db):
+    start = datetime(2024, 1, 1)
+    # Pairs of documents share a date, so pages must break ties on _id
+    app_db.news.insert_many([{'title': f'n{n}', 'date': start + timedelta(hours=n // 2)} for n in range(25)])
+    seen = []
+    cursor = ''
+    while True:
+        body = client.get(f'/api/news?limit=7&cursor={cursor}').json
+        seen += [item['title'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    expected = [doc['title'] for doc in app_db.news.find().sort([('date', -1), ('_id', -1)])]
+    assert seen == expected
+
+def test_list_route_rejects_a_bad_cursor(client):
+    response = client.get('/api/news?cursor=garbage')
+    assert response.status_code == 400
+    assert response.json['message'] == 'Invalid cursor'
+
+def test_complaints_queue_pages_most_urgent_and_oldest_first(client, app_db):
+    start = datetime(2024, 1, 1)
+    priorities = ['low', 'urgent', 'medium', 'high', 'urgent', 'whenever', 'low']
+    app_db.complaints.insert_many([
+        {'title': f'c{n}', 'priority': priority, 'priority_rank': priority_rank(priority),
+         'status': 'pending', 'date': start + timedelta(days=n)}
+        for n, priority in enumerate(priorities)
+    ])
+    titles = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get(f'/api/complaints/queue?limit=3&cursor={cursor}').json
+        titles += [item['title'] for item in body['items']]
+        cursor = body['next_cursor']
+    assert titles == ['c1', 'c4', 'c3', 'c2', 'c0', 'c6', 'c5']
@@ -0,0 +1,41 @@
+"""Tests for list summaries and ?fields= projections"""
+
+import pytest
+
+from app import SNIPPET_LENGTH, InvalidFields, list_projection, summary_projection
+
+NEWS = {'title': 'Results', 'content': 'Out now ' * 100, 'category': 'campus',
+        'url': 'https://example.edu', 'author': 'Admin'}
+
+def test_summary_projection_has_the_summary_fields_a_snippet_and_the_date():
+    projection = summary_projection('lost_found')
+    assert set(projection) == {'title', 'category', 'type', 'location', 'contact', 'status', 'snippet', 'date'}
+    assert projection['snippet'] == {'$substrCP': [{'$ifNull': ['$description', '']}, 0, SNIPPET_LENGTH]}
+    assert 'snippet' not in summary_projection('polls')
+
+def test_list_projection_of_a_fields_value():
+    assert list_projection('news', 'all') is None
+    assert list_projection('news', 'title, votes.yes') == {'title': 1, 'votes.yes': 1, 'date': 1}
+    assert list_projection('news', '') == summary_projection('news')
+
+@pytest.mark.parametrize('fields', ['$where', 'title,a b', 'votes..yes', 'title.$'])
+def test_list_projection_rejects_anything_but_field_names(fields):
+    with pytest.raises(InvalidFields):
+        list_projection('news', fields)
+
+def test_list_routes_return_summaries(client):
+    client.post('/api/news', json=NEWS)
+    item, = client.get('/api/news').json['items']
+    # The fixture turns snippets off: mongomock has no $substrCP
+    assert set(item) == {'_id', 'title', 'category', 'url', 'author', 'date'}
+
+def test_fields_picks_the_returned_fields(client):
+    item_id = client.post('/api/news', json=NEWS).json['id']
+    assert set(client.get('/api/news?fields=title').json['items'][0]) == {'_id', 'title', 'date'}
+    assert client.get('/api/news?fields=all').json['items'][0]['content'] == NEWS['content']
+    assert client.get(f'/api/news/{item_id}').json['content'] == NEWS['content']
+
+def test_invalid_fields_are_answered_400(client):
+    response = client.get('/api/news?fields=title,$where')
+    assert response.status_code == 400
+    assert response.json['success'] is False
@@ -0,0 +1,150 @@
+"""Tests for the GET response cache"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import response_cache as cache_module
+from response_cache import ResponseCache
+
+NEWS = {'title': 'Results', 'content': 'Out now', 'category': 'campus',
+        'url': 'https://example.edu', 'author': 'Admin'}
+
+@pytest.fixture
+def cache(db):
+    cache = ResponseCache(timeout=60, max_entries=3, max_bytes=100)
+    cache.versions = db.cache_versions
+    return cache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time response_cache stamps writes with and compares Last-Modified to"""
+    now = [datetime(2024, 3, 1, 12, 0, 0, 200000, tzinfo=timezone.utc)]
+    monkeypatch.setattr(cache_module, '_now', lambda: now[0])
+    return now
+
+def store(cache, key, body=b'{}', collection='news'):
+    cache.set(key, collection, body, 'application/json', cache.stamp(collection)[0])
+
+def test_least_recently_used_entry_is_evicted_at_max_entries(cache):
+    for key in 'abc':
+        store(cache, key)
+    version = cache.stamp('news')[0]
+    assert cache.get('a', version) is not None  # a is now the most recent
+    store(cache, 'd')
+
+    assert cache.get('b', version) is None
+    assert all(cache.get(key, version) is not None for key in 'acd')
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_are_evicted_to_stay_under_max_bytes(cache):
+    store(cache, 'a', b'x' * 60)
+    store(cache, 'b', b'x' * 30)
+    store(cache, 'c', b'x' * 30)
+
+    version = cache.stamp('news')[0]
+    assert cache.get('a', version) is None
+    assert cache.stats()['bytes'] == 60
+    # A body larger than the whole cache is never stored
+    store(cache, 'd', b'x' * 101)
+    assert cache.get('d', version) is None
+
+def test_entries_expire_after_the_timeout(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    store(cache, 'a')
+    version = cache.stamp('news')[0]
+
+    now[0] += 59
+    assert cache.get('a', version) is not None
+    now[0] += 2
+    assert cache.get('a', version) is None
+    assert cache.stats()['entries'] == 0
+
+def test_invalidate_drops_only_that_collections_entries(cache):
+    store(cache, 'a', collection='news')
+    store(cache, 'b', collection='polls')
+    cache.invalidate('news')
+
+    assert cache.get('a', cache.stamp('news')[0]) is None
+    assert cache.get('b', cache.stamp('polls')[0]) is not None
+
+def test_response_read_before_a_write_is_not_stored(cache):
+    version = cache.stamp('news')[0]
+    cache.invalidate('news')
+    cache.set('a', 'news', b'{}', 'application/json', version)
+    assert cache.stats()['entries'] == 0
+
+def test_routes_answer_repeated_gets_from_the_cache(app, client):
+    assert client.get('/api/news').status_code == 200
+    assert client.get('/api/news').status_code == 200
+    assert client.get('/api/news?category=x').status_code == 200
+    stats = app.extensions['response_cache'].stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+def test_write_through_a_route_invalidates_its_collection(client):
+    assert client.get('/api/news').json['items'] == []
+    client.post('/api/news', json=NEWS)
+    assert [item['title'] for item in client.get('/api/news').json['items']] == ['Results']
+
+def test_get_with_the_current_etag_is_answered_304(client):
+    etag = client.get('/api/news').headers['ETag']
+
+    assert client.get('/api/news', headers={'If-None-Match': etag}).status_code == 304
+    client.post('/api/news', json=NEWS)
+    response = client.get('/api/news', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_head_is_a_read(client):
+    etag = client.get('/api/news').headers['ETag']
+    for _ in range(3):
+        assert client.head('/api/news').headers['ETag'] == etag
+    assert client.get('/api/news', headers={'If-None-Match': etag}).status_code == 304
+
+def test_failed_writes_do_not_invalidate(client):
+    etag = client.get('/api/news').headers['ETag']
+    assert client.post('/api/news/bulk', data='[{', content_type='application/json').status_code == 400
+    assert client.get('/api/news', headers={'If-None-Match': etag}).status_code == 304
+
+def test_if_modified_since_is_answered_304_until_a_write(client, clock):
+    assert 'Last-Modified' not in client.get('/api/news').headers  # Still within the stamp's second
+    clock[0] += timedelta(seconds=1)
+    last_modified = client.get('/api/news').headers['Last-Modified']
+    assert client.get('/api/news', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    client.post('/api/news', json=NEWS)
+    assert client.get('/api/news', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+def test_writes_within_one_second_get_distinct_last_modified_times(client, clock):
+    client.post('/api/news', json=NEWS)
+    clock[0] += timedelta(milliseconds=900)
+    last_modified = client.get('/api/news').headers['Last-Modified']
+    client.post('/api/news', json=NEWS)
+    clock[0] += timedelta(seconds=1)
+    assert client.get('/api/news', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+def test_version_stamps_are_shared_between_processes(db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    worker1, worker2 = ResponseCache(max_entries=10), ResponseCache(max_entries=10)
+    worker1.versions = worker2.versions = db.cache_versions
+    store(worker2, 'a')
+    before = worker2.stamp('news')
+
+    worker1.invalidate('news')
+    # worker2 keeps its stamps for version_ttl seconds, then sees the write
+    assert worker2.stamp('news') == before
+    now[0] += worker2.version_ttl + 0.1
+    after = worker2.stamp('news')
+    assert after[0] == before[0] + 1
+    assert worker1.stamp('news') == after
+    assert worker2.validators('news', after) == worker1.validators('news', worker1.stamp('news'))
+    # The body worker2 cached before the write is no longer served
+    assert worker2.get('a', after[0]) is None
+
+def test_bump_version_marks_a_collection_changed_outside_the_app(db):
+    cache = ResponseCache()
+    cache.versions = db.cache_versions
+    version = cache.stamp('skills')[0]
+    assert cache_module.bump_version(db.cache_versions, 'skills')[0] == version + 1
@@ -0,0 +1,109 @@
+"""Tests for the room occupancy index"""
+
+import threading
+
+import pytest
+from bson import ObjectId
+
+from room_index import RoomDay, RoomIndex, parse_time, slot_interval
+
+@pytest.mark.parametrize('value, minutes', [
+    ('09:30', 570), ('9:05', 545), ('12:00 am', 0), ('12:15 PM', 735), ('1:00 pm', 780),
+    ('24:00', None), ('13:00 pm', None), ('9.30', None), ('', None), (None, None)
+])
+def test_parse_time(value, minutes):
+    assert parse_time(value) == minutes
+
+def test_slot_interval_defaults_the_duration_and_skips_unplaceable_slots():
+    assert slot_interval({'day': 'monday', 'time': '09:00', 'room': ' A-101 '}) == ('Monday', 'A-101', 540, 600)
+    assert slot_interval({'day': 'Monday', 'time': '09:00', 'room': 'A-101', 'duration': '90'})[3] == 630
+    assert slot_interval({'day': 'Funday', 'time': '09:00', 'room': 'A-101'}) is None
+    assert slot_interval({'day': 'Monday', 'time': '09:00', 'room': ''}) is None
+    assert slot_interval({'day': 'Monday', 'time': '09:00', 'room': 'A-101', 'duration': '0'}) is None
+
+def test_room_day_overlap_uses_the_running_maximum_end():
+    day = RoomDay()
+    day.add(480, 720)  # a long block that ends after later-starting short ones
+    day.add(540, 600)
+    assert not day.is_free(700, 730)
+    assert day.is_free(720, 780)
+    assert day.is_free(420, 480)
+    day.add(540, 600)
+    day.remove(540, 600)
+    assert day.counts[(540, 600)] == 1
+    day.remove(480, 720)
+    assert day.is_free(700, 730)
+
+def slot(room, time, day='Monday', duration='60'):
+    return {'slot_id': ObjectId(), 'day': day, 'time': time, 'room': room, 'duration': duration}
+
+@pytest.fixture
+def index(db):
+    db.timetables.insert_many([
+        {'user_id': 'u1', 'schedule': [slot('A-101', '09:00'), slot('B-201', '10:00')]},
+        # The same lecture in another student's timetable
+        {'user_id': 'u2', 'schedule': [slot('A-101', '09:00'), {'day': 'Monday', 'time': '11:00', 'room': 'C-301'}]}
+    ])
+    index = RoomIndex()
+    index.build(db)
+    return index
+
+def test_free_rooms_and_occupancy(index):
+    assert index.free_rooms('Monday', 540, 600) == ['B-201', 'C-301']
+    assert index.free_rooms('Tuesday', 540, 600) == ['A-101', 'B-201', 'C-301']
+    assert index.occupancy('A-101') == {'Monday': [{'start': '09:00', 'end': '10:00', 'slots': 2}]}
+    assert 'D-401' not in index
+
+def test_writes_keep_the_index_current(index):
+    moved = slot('A-101', '14:00')
+    index.set_slot('u3', moved)
+    assert 'A-101' not in index.free_rooms('Monday', 840, 900)
+    index.set_slot('u3', dict(moved, room='D-401'))
+    assert 'A-101' in index.free_rooms('Monday', 840, 900)
+    assert 'D-401' in index
+    index.remove_slot('u3', moved['slot_id'])
+    assert 'D-401' in index.free_rooms('Monday', 840, 900)
+    index.set_user('u1', [])
+    assert index.occupancy('A-101')['Monday'][0]['slots'] == 1
+
+def test_writes_made_during_a_rebuild_survive_the_swap(index, db, monkeypatch):
+    loading, release = threading.Event(), threading.Event()
+    load = RoomIndex._load
+
+    def slow_load(self, db, batch_size):
+        fresh = load(self, db, batch_size)
+        loading.set()
+        release.wait(5)
+        return fresh
+
+    monkeypatch.setattr(RoomIndex, '_load', slow_load)
+    index.built_at -= 1000
+    index.build(db, max_age=1)
+    assert loading.wait(5)
+    new_slot = slot('E-501', '08:00')
+    index.set_slot('u9', new_slot)
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'room-index':
+            thread.join(5)
+    assert 'E-501' in index
+    assert not index._rebuilding
+
+def test_concurrent_stale_builds_start_one_rebuild(index, db, monkeypatch):
+    started = []
+    # The stand-in never finishes, so every later build sees the rebuild in progress
+    monkeypatch.setattr(RoomIndex, '_rebuild_in_background', lambda self, db, batch_size: started.append(1))
+    index.built_at -= 1000
+    threads = [threading.Thread(target=index.build, args=(db, 1)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(started) == 1
+
+def test_free_rooms_route(client, app_db):
+    app_db.timetables.insert_one({'user_id': 'u1', 'schedule': [slot('A-101', '09:00'), slot('B-201', '12:00')]})
+    body = client.get('/api/rooms/free?day=monday&time=9:30am&duration=30').json
+    assert body == {'day': 'Monday', 'time': '09:30', 'duration': 30, 'rooms': ['B-201']}
+    assert client.get('/api/rooms/free?day=Funday').status_code == 400
+    assert client.get('/api/rooms/A-101/occupancy').json['occupancy']['Monday'][0]['start'] == '09:00'
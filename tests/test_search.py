@@ -0,0 +1,131 @@
+"""Tests for ranked full-text search"""
+
+import pytest
+from bson import ObjectId
+
+from search_index import InvertedIndex, tokenize
+
+def ids(hits):
+    return [(collection, doc_id) for _, collection, doc_id in hits]
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize('The Lost iPhone 13, a black case!') == ['lost', 'iphone', '13', 'black', 'case']
+    assert tokenize(None) == []
+
+def test_title_matches_outrank_body_matches():
+    index = InvertedIndex()
+    index.add('news', 1, {'title': 'Library hours', 'content': 'Open late'})
+    index.add('news', 2, {'title': 'Exams', 'content': 'Held in the library'})
+    index.add('announcements', 3, {'title': 'Sports day', 'content': 'On the field'})
+
+    assert ids(index.search('library', {'news', 'announcements'}, 10)) == [('news', 1), ('news', 2)]
+    assert ids(index.search('library', {'news'}, 1)) == [('news', 1)]
+    assert index.search('library', {'announcements'}, 10) == []
+    assert index.search('the', {'news'}, 10) == []
+
+def test_readding_a_document_replaces_its_postings():
+    index = InvertedIndex()
+    index.add('news', 1, {'title': 'Library hours'})
+    index.add('news', 1, {'title': 'Canteen menu'})
+
+    assert index.search('library', {'news'}, 10) == []
+    assert ids(index.search('canteen', {'news'}, 10)) == [('news', 1)]
+    assert index._total_length == 6
+
+def test_removed_documents_are_not_found():
+    index = InvertedIndex()
+    index.add('news', 1, {'title': 'Library hours'})
+    index.add('news', 2, {'title': 'Library closed'})
+    index.remove('news', 1)
+    index.remove('news', 99)
+
+    assert ids(index.search('library', {'news'}, 10)) == [('news', 2)]
+    assert 'hours' not in index._postings
+
+def test_build_loads_every_searchable_collection(db):
+    db.news.insert_one({'title': 'Library hours', 'content': ''})
+    db.skills.insert_one({'title': 'Guitar lessons', 'description': 'Near the library'})
+    index = InvertedIndex()
+    index.build(db)
+
+    assert {collection for collection, _ in ids(index.search('library', {'news', 'skills'}, 10))} == \
+        {'news', 'skills'}
+
+def test_writes_during_a_rebuild_are_replayed_onto_the_new_index(db, monkeypatch):
+    index = InvertedIndex()
+    index.add('news', 1, {'title': 'Library hours'})
+    load = InvertedIndex._load
+
+    def load_while_writing(self, db, batch_size):
+        fresh = load(self, db, batch_size)
+        # Made after the load read the database, before the swap
+        index.add('news', 2, {'title': 'Library closed'})
+        index.remove('news', 1)
+        return fresh
+
+    monkeypatch.setattr(InvertedIndex, '_load', load_while_writing)
+    index._rebuild(db, 100)
+    assert ids(index.search('library', {'news'}, 10)) == [('news', 2)]
+    assert index._journal is None
+
+@pytest.fixture
+def memory_app(app):
+    app.config['SEARCH_BACKEND'] = 'memory'
+    return app
+
+def test_search_route_pages_through_ranked_hits(memory_app, app_db):
+    app_db.news.insert_many([{'title': f'Library news {n}', 'content': 'library ' * n, 'category': 'campus'}
+                             for n in range(5)])
+    app_db.lost_found.insert_one({'title': 'Keys', 'description': 'Left in the library'})
+    client = memory_app.test_client()
+
+    first = client.get('/api/search?q=library&limit=4').json
+    assert first['page'] == 1 and first['next_page'] == 2
+    second = client.get('/api/search?q=library&limit=4&page=2').json
+    assert second['next_page'] is None
+    hits = first['items'] + second['items']
+    assert len(hits) == 6 and len({hit['_id'] for hit in hits}) == 6
+    assert [hit['score'] for hit in hits] == sorted((hit['score'] for hit in hits), reverse=True)
+    assert {hit['collection'] for hit in hits} == {'news', 'lost_found'}
+
+    only_lost = client.get('/api/search?q=library&collections=lost_found').json['items']
+    assert [hit['title'] for hit in only_lost] == ['Keys']
+
+def test_search_route_rejects_bad_requests(client):
+    assert client.get('/api/search').status_code == 400
+    assert client.get('/api/search?q=x&collections=users').status_code == 400
+    assert client.get('/api/search?q=x&limit=100&page=11').status_code == 400
+
+class TextCursor:
+    """What find({'$text': ...}) returns, already ranked, since mongomock has no $text"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key):
+        return self
+
+    def limit(self, limit):
+        return self.docs[:limit]
+
+def test_text_backend_merges_the_collections_by_score(app, campuslink, monkeypatch):
+    ranked = {
+        'news': [{'_id': ObjectId(), 'title': 'n1', 'score': 2.5}, {'_id': ObjectId(), 'title': 'n2', 'score': 0.5}],
+        'skills': [{'_id': ObjectId(), 'title': 's1', 'score': 1.5}]
+    }
+    queries = []
+
+    class TextCollection:
+        def __init__(self, name):
+            self.name = name
+
+        def find(self, query, projection):
+            queries.append((self.name, query, projection['score']))
+            return TextCursor(ranked[self.name])
+
+    monkeypatch.setattr(campuslink, 'get_db', lambda: {name: TextCollection(name) for name in ranked})
+    with app.app_context():
+        hits = campuslink.text_search('guitar', ['news', 'skills'], 2)
+
+    assert [(hit['collection'], hit['title']) for hit in hits] == [('news', 'n1'), ('skills', 's1')]
+    assert queries[0] == ('news', {'$text': {'$search': 'guitar'}}, {'$meta': 'textScore'})
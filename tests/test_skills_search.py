@@ -0,0 +1,81 @@
+"""Tests for faceted skills search"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import skills_search
+from skills_search import FacetCache, duration_band, facet_counts, price_band, skill_bands
+
+@pytest.mark.parametrize('price, band', [
+    ('Free', 'free'), ('₹0', 'free'), ('₹200', 'under-250'), ('Rs. 250', '250-499'), ('₹999.50', '500-999'),
+    ('₹1,500', '1000-plus'), (1200, '1000-plus'), ('negotiable', 'unknown'), (None, 'unknown'), ('', 'unknown')
+])
+def test_price_band(price, band):
+    assert price_band(price) == band
+
+@pytest.mark.parametrize('duration, band', [
+    ('45 minutes', 'under-1h'), ('1 hour', '1-2h'), ('90 min', '1-2h'), ('2 hours', '1-2h'),
+    ('3.5 hrs', '2-4h'), ('1 day', '4h-plus'), ('2 weeks', '4h-plus'), ('flexible', 'unknown'), (None, 'unknown')
+])
+def test_duration_band(duration, band):
+    assert duration_band(duration) == band
+
+def test_facet_counts_orders_bands_by_band_not_count():
+    result = {
+        'total': [{'count': 6}],
+        'category': [{'_id': 'music', 'count': 4}, {'_id': 'design', 'count': 2}],
+        'price_band': [{'_id': 'unknown', 'count': 3}, {'_id': '1000-plus', 'count': 2}, {'_id': 'free', 'count': 1}],
+        'duration_band': [],
+        'status': [{'_id': 'available', 'count': 6}]
+    }
+    counts = facet_counts(result)
+    assert counts['total'] == 6
+    assert [row['value'] for row in counts['price_band']] == ['free', '1000-plus', 'unknown']
+    assert counts['category'][0] == {'value': 'music', 'count': 4}
+    assert facet_counts({'total': [], 'category': [], 'price_band': [], 'duration_band': [], 'status': []})['total'] == 0
+
+def test_facet_cache_expires_and_is_capped(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(skills_search.time, 'monotonic', lambda: now[0])
+    cache = FacetCache(ttl=30, max_entries=2)
+    for key in 'abc':
+        cache.set(key, {'total': key})
+    assert cache.get('a') is None
+    assert cache.get('b') == {'total': 'b'}
+    now[0] += 31
+    assert cache.get('b') is None
+    FacetCache(ttl=0).set('a', {})
+
+def mongomock_pipeline(*args):
+    # mongomock has no $sortByCount; spell it out as $group and $sort
+    pipeline = skills_search.facet_pipeline(*args)
+    facets = pipeline[-1]['$facet']
+    for name, stages in facets.items():
+        facets[name] = [stage for original in stages for stage in (
+            [{'$group': {'_id': original['$sortByCount'], 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}]
+            if '$sortByCount' in original else [original])]
+    return pipeline
+
+def test_search_route_returns_a_page_with_facet_counts(client, app_db, campuslink, monkeypatch):
+    monkeypatch.setattr(campuslink, 'facet_pipeline', mongomock_pipeline)
+    start = datetime(2024, 1, 1)
+    listings = [('music', 'Free', '1 hour'), ('music', '₹300', '3 hours'), ('music', '₹300', '2 hours'),
+                ('design', '₹1500', '1 day'), ('music', '₹100', '30 minutes')]
+    app_db.skills.insert_many([
+        dict({'title': f's{n}', 'category': category, 'price': price, 'duration': duration,
+              'status': 'available', 'date': start + timedelta(days=n)},
+             **skill_bands({'price': price, 'duration': duration}))
+        for n, (category, price, duration) in enumerate(listings)
+    ])
+
+    body = client.get('/api/skills/search?category=music&limit=2').json
+    assert [item['title'] for item in body['items']] == ['s4', 's2']
+    assert body['facets']['total'] == 4
+    assert body['facets']['price_band'] == [{'value': 'free', 'count': 1}, {'value': 'under-250', 'count': 1},
+                                            {'value': '250-499', 'count': 2}]
+    # The next page reuses the cached counts and only finds the page
+    monkeypatch.setattr(campuslink, 'facet_pipeline', None)
+    page2 = client.get(f"/api/skills/search?category=music&limit=2&cursor={body['next_cursor']}").json
+    assert [item['title'] for item in page2['items']] == ['s1', 's0']
+    assert page2['facets'] == body['facets'] and page2['next_cursor'] is None
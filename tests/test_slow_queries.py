@@ -0,0 +1,68 @@
+"""Tests for the slow-query log"""
+
+import time
+from types import SimpleNamespace
+
+from slow_queries import SlowQueryLog, analyze_explain, query_shape
+
+EXPLAIN = {
+    'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}},
+    'executionStats': {'totalDocsExamined': 500, 'totalKeysExamined': 0, 'nReturned': 20,
+                       'executionTimeMillis': 12}
+}
+
+class ExplainingDatabase:
+    def __init__(self):
+        self.commands = []
+
+    def command(self, command):
+        self.commands.append(command)
+        return EXPLAIN
+
+def run_command(log, name, command, duration_ms, request_id=1):
+    event = SimpleNamespace(command_name=name, command=command, request_id=request_id, connection_id=('db', 27017),
+                            duration_micros=int(duration_ms * 1000), database_name='campuslink_test')
+    log.started(event)
+    log.succeeded(event)
+
+def test_query_shape_hides_literals():
+    assert query_shape({'status': 'open', 'date': {'$lt': 5}, '$or': [{'a': 1}, {'b': [1, 2]}]}) == \
+        {'status': '?', 'date': {'$lt': '?'}, '$or': [{'a': '?'}, {'b': '?'}]}
+
+def test_analyze_explain_flags_scans_and_in_memory_sorts():
+    analysis = analyze_explain(EXPLAIN, docs_ratio=10)
+    assert analysis['stages'] == ['SORT', 'COLLSCAN']
+    assert analysis['flags'] == ['COLLSCAN', 'in-memory SORT', 'docsExamined/nReturned 500/20']
+
+def test_commands_under_the_threshold_are_not_recorded():
+    log = SlowQueryLog(threshold_ms=100)
+    run_command(log, 'find', {'find': 'news', 'filter': {}}, 5)
+    run_command(log, 'ping', {'ping': 1}, 500, request_id=2)
+    assert log.stats()['slow'] == 0
+
+    log.threshold_ms = -1
+    run_command(log, 'find', {'find': 'news', 'filter': {}}, 500, request_id=3)
+    assert log.stats()['slow'] == 0
+
+def test_threshold_zero_records_every_command_with_its_route_and_plan(app):
+    log = SlowQueryLog(threshold_ms=0)
+    log.explain, log.explain_interval = True, 0
+    database = ExplainingDatabase()
+    log.connection = SimpleNamespace(client={'campuslink_test': database})
+    command = {'find': 'news', 'filter': {'category': 'campus'}, 'sort': {'date': -1, '_id': -1},
+               'limit': 20, 'lsid': {'id': 'session'}}
+    with app.test_request_context('/api/news'):
+        run_command(log, 'find', command, 0.2)
+
+    entry, = log.stats()['entries']
+    assert entry['route'] == 'campuslink.api_news'
+    assert (entry['collection'], entry['filter'], entry['sort']) == ('news', {'category': '?'},
+                                                                     [['date', -1], ['_id', -1]])
+    deadline = time.monotonic() + 5
+    while not log.stats()['plans'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    plan, = log.stats()['plans']
+    assert plan['flags'] == ['COLLSCAN', 'in-memory SORT', 'docsExamined/nReturned 500/20']
+    explained = database.commands[0]['explain']
+    assert explained == {'find': 'news', 'filter': {'category': 'campus'}, 'sort': {'date': -1, '_id': -1},
+                         'limit': 20}
@@ -0,0 +1,45 @@
+"""Tests for single-pass document serialization and streamed list pages"""
+
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app import encode_cursor, iter_page_json
+
+def make_docs(count):
+    start = datetime(2024, 3, 1, 9, 30)
+    return [{'_id': ObjectId(), 'title': f'n{n}', 'date': start - timedelta(hours=n), 'tags': {'n': [n]}}
+            for n in range(count)]
+
+def test_pages_are_streamed_chunk_size_documents_at_a_time():
+    docs = make_docs(5)
+    chunks = list(iter_page_json(iter(docs), limit=3, chunk_size=2))
+
+    assert len(chunks) == 3  # head, two documents, the third with the tail
+    body = json.loads(''.join(chunks))
+    assert [item['_id'] for item in body['items']] == [str(doc['_id']) for doc in docs[:3]]
+    assert body['items'][0]['date'] == '2024-03-01T09:30:00'
+    assert body['next_cursor'] == encode_cursor(docs[2])
+
+def test_last_page_has_no_next_cursor():
+    assert ''.join(iter_page_json(iter([]), limit=3)) == '{"items":[],"next_cursor":null}'
+    assert json.loads(''.join(iter_page_json(iter(make_docs(3)), limit=3)))['next_cursor'] is None
+
+def test_json_provider_encodes_object_ids_and_dates(app):
+    _id = ObjectId()
+    assert json.loads(app.json.dumps({'_id': _id, 'date': datetime(2024, 3, 1)})) == \
+        {'_id': str(_id), 'date': '2024-03-01T00:00:00'}
+
+def test_streamed_list_matches_the_paginated_one(client, app_db):
+    app_db.news.insert_many(make_docs(7))
+    for args in ['limit=3&fields=all', 'limit=100&fields=all', 'limit=3']:
+        streamed = client.get(f'/api/news?{args}&stream=1')
+        assert streamed.is_streamed
+        paginated = client.get(f'/api/news?{args}').json
+        assert json.loads(streamed.get_data()) == paginated
+
+    cursor = client.get('/api/news?limit=3&fields=all').json['next_cursor']
+    streamed = json.loads(client.get(f'/api/news?limit=3&fields=all&stream=1&cursor={cursor}').get_data())
+    assert streamed == client.get(f'/api/news?limit=3&fields=all&cursor={cursor}').json
+    assert [item['title'] for item in streamed['items']] == ['n3', 'n4', 'n5']
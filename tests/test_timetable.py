@@ -0,0 +1,69 @@
+"""Tests for slot-level timetable edits"""
+
+from bson import ObjectId
+
+import run
+from app import day_projection
+
+SCHEDULE = [
+    {'day': 'Monday', 'time': '09:00', 'subject': 'Maths', 'room': 'A-101'},
+    {'day': 'Tuesday', 'time': '11:00', 'subject': 'Physics', 'room': 'B-201'},
+    {'day': 'Monday', 'time': '14:00', 'subject': 'Chemistry', 'room': 'C-301'}
+]
+
+def save_schedule(client, user_id='u1'):
+    return client.post('/api/timetable', json={'user_id': user_id, 'schedule': SCHEDULE}).json['slot_ids']
+
+def schedule(client, user_id='u1', **args):
+    return client.get('/api/timetable', query_string={'user_id': user_id, **args}).json['schedule']
+
+def test_saved_slots_get_stable_ids(client):
+    slot_ids = save_schedule(client)
+    assert len(set(slot_ids)) == 3
+    assert [slot['slot_id'] for slot in schedule(client)] == slot_ids
+
+def test_day_projection_keeps_only_that_days_slots(db):
+    db.timetables.insert_many([{'user_id': 'u1', 'schedule': SCHEDULE}, {'user_id': 'u2'}])
+    # mongomock only evaluates aggregation expressions like $filter in $project stages
+    def day(name):
+        return {doc['user_id']: [slot['subject'] for slot in doc['schedule']]
+                for doc in db.timetables.aggregate([{'$project': day_projection(name)}])}
+
+    assert day('Monday') == {'u1': ['Maths', 'Chemistry'], 'u2': []}
+    assert day('Sunday') == {'u1': [], 'u2': []}
+
+def test_patch_edits_one_slot_in_place(client):
+    slot_ids = save_schedule(client)
+    # mongomock's find_one_and_update applies $ to the first slot whichever matched
+    response = client.patch(f'/api/timetable/slots/{slot_ids[0]}', json={'user_id': 'u1', 'room': 'A-102'})
+
+    assert response.json == {'success': True}
+    assert [slot['room'] for slot in schedule(client)] == ['A-102', 'B-201', 'C-301']
+    assert [slot['slot_id'] for slot in schedule(client)] == slot_ids
+
+def test_patch_of_an_unknown_slot_or_with_nothing_to_change(client):
+    slot_ids = save_schedule(client)
+    assert client.patch(f'/api/timetable/slots/{ObjectId()}', json={'user_id': 'u1', 'room': 'X'}).status_code == 404
+    assert client.patch('/api/timetable/slots/garbage', json={'user_id': 'u1', 'room': 'X'}).status_code == 404
+    assert client.patch(f'/api/timetable/slots/{slot_ids[0]}', json={'user_id': 'u2', 'room': 'X'}).status_code == 404
+    assert client.patch(f'/api/timetable/slots/{slot_ids[0]}', json={'user_id': 'u1'}).status_code == 400
+
+def test_delete_removes_one_slot(client):
+    slot_ids = save_schedule(client)
+    assert client.delete(f'/api/timetable/slots/{slot_ids[0]}?user_id=u1').json == {'success': True}
+
+    assert [slot['slot_id'] for slot in schedule(client)] == slot_ids[1:]
+    assert client.delete(f'/api/timetable/slots/{slot_ids[0]}?user_id=u1').status_code == 404
+
+def test_migrate_timetable_slots_adds_missing_ids(db):
+    kept = ObjectId()
+    db.timetables.insert_many([
+        {'user_id': 'u1', 'schedule': [dict(SCHEDULE[0], slot_id=kept), SCHEDULE[1]]},
+        {'user_id': 'u2', 'schedule': [SCHEDULE[2]]}
+    ])
+    run.migrate_timetable_slots(db, batch_size=1)
+
+    slots = [slot for timetable in db.timetables.find() for slot in timetable['schedule']]
+    assert all(isinstance(slot['slot_id'], ObjectId) for slot in slots)
+    assert slots[0]['slot_id'] == kept and len({slot['slot_id'] for slot in slots}) == 3
+    assert db.cache_versions.find_one({'_id': 'timetables'})['version'] == 1
@@ -0,0 +1,123 @@
+"""Tests for the poll vote write-behind buffer"""
+
+import json
+import threading
+
+from pymongo.errors import BulkWriteError
+
+from vote_buffer import VoteBuffer
+
+class FakePolls:
+    """Records the bulk writes a buffer makes; fails the next `failures` of them"""
+
+    def __init__(self, failures=0):
+        self.writes = []
+        self.failures = failures
+        self.written = threading.Event()
+
+    def bulk_write(self, operations, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise BulkWriteError({'writeErrors': [], 'nInserted': 0})
+        self.writes.append({op._filter['_id']: op._doc['$inc'] for op in operations})
+        self.written.set()
+
+def test_votes_for_the_same_option_are_merged_into_one_update():
+    polls = FakePolls()
+    buffer = VoteBuffer(polls, flush_size=100)
+    buffer._thread = object()  # keep the background flusher out of this test
+    for option in ['a', 'a', 'b', 'a']:
+        assert buffer.add('poll1', option)
+    buffer.add('poll2', 'x')
+
+    assert buffer.flush() == 5
+    assert polls.writes == [{'poll1': {'votes.a': 3, 'votes.b': 1}, 'poll2': {'votes.x': 1}}]
+    assert buffer.stats()['pending'] == 0
+    assert buffer.flush() == 0
+    assert len(polls.writes) == 1
+
+def test_reaching_flush_size_wakes_the_flusher():
+    polls = FakePolls()
+    buffer = VoteBuffer(polls, flush_interval_ms=60000, flush_size=3)
+    try:
+        for _ in range(3):
+            buffer.add('poll1', 'a')
+        assert polls.written.wait(5)
+        assert polls.writes == [{'poll1': {'votes.a': 3}}]
+    finally:
+        buffer.stop()
+
+def test_votes_beyond_max_pending_are_rejected_for_a_direct_write():
+    buffer = VoteBuffer(FakePolls(), flush_size=100, max_pending=2)
+    buffer._thread = object()
+    assert buffer.add('poll1', 'a')
+    assert buffer.add('poll1', 'a')
+    assert not buffer.add('poll1', 'a')
+    assert buffer.stats()['rejected'] == 1
+
+    buffer.flush()
+    assert buffer.add('poll1', 'a')
+
+def test_stop_flushes_what_is_still_buffered():
+    polls = FakePolls()
+    buffer = VoteBuffer(polls, flush_interval_ms=60000, flush_size=100)
+    buffer.add('poll1', 'a')
+    buffer.add('poll1', 'b')
+    buffer.stop()
+
+    assert polls.writes == [{'poll1': {'votes.a': 1, 'votes.b': 1}}]
+    # Nothing is buffered after shutdown; callers write directly
+    assert not buffer.add('poll1', 'a')
+
+def test_failed_write_is_retried_by_the_next_flush():
+    polls = FakePolls(failures=1)
+    buffer = VoteBuffer(polls, flush_size=100)
+    buffer._thread = object()
+    buffer.add('poll1', 'a')
+
+    assert buffer.flush() == 0
+    assert buffer.stats()['failed_flushes'] == 1
+    assert buffer.stats()['pending'] == 1
+    buffer.add('poll1', 'a')
+    assert buffer.flush() == 2
+    assert polls.writes == [{'poll1': {'votes.a': 2}}]
+
+def test_failing_callback_neither_undoes_the_flush_nor_stops_the_flusher():
+    polls = FakePolls()
+    calls = []
+
+    def on_flush(poll_ids):
+        calls.append(poll_ids)
+        raise RuntimeError('cache unavailable')
+
+    buffer = VoteBuffer(polls, flush_interval_ms=10, flush_size=100, on_flush=on_flush)
+    try:
+        buffer.add('poll1', 'a')
+        assert polls.written.wait(5)
+        polls.written.clear()
+        buffer.add('poll2', 'b')
+        # The flusher thread survived the first callback failure
+        assert polls.written.wait(5)
+    finally:
+        buffer.stop()
+
+    assert polls.writes == [{'poll1': {'votes.a': 1}}, {'poll2': {'votes.b': 1}}]
+    assert calls == [['poll1'], ['poll2']]
+    assert buffer.stats()['failed_callbacks'] == 2
+    assert buffer.stats()['flushed'] == 2
+
+def test_buffered_votes_reach_the_app_when_flushed(campuslink, monkeypatch):
+    monkeypatch.setattr(campuslink.config['testing'], 'VOTE_BUFFER_ENABLED', True)
+    app = campuslink.create_app('testing')
+    client = app.test_client()
+    poll_id = client.post('/api/polls', json={'question': 'Lunch?', 'options': ['Yes', 'No']}).json['id']
+    etag = client.get('/api/polls').headers['ETag']
+    subscriber = app.extensions['event_broker'].subscribe(types={'poll_votes'})
+
+    assert client.put('/api/polls', json={'poll_id': poll_id, 'option': 'Yes'}).json['success']
+    buffer = app.extensions['vote_buffer']
+    buffer.stop()  # flushes outside any request, like the flusher thread
+
+    assert buffer.stats()['failed_callbacks'] == 0
+    assert json.loads(subscriber.get(0)['data']) == {'_id': poll_id, 'votes': {'Yes': 1, 'No': 0}}
+    assert client.get('/api/polls', headers={'If-None-Match': etag}).status_code == 200
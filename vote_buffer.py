@@ -0,0 +1,131 @@
+"""
+Write-behind buffer for poll vote tallies.
+Votes are merged into per-(poll, option) deltas in memory and written to the
+polls collection with one bulk_write per flush, trading a few hundred
+milliseconds of tally freshness for far fewer writes on hot poll documents.
+"""
+
+import atexit
+import threading
+from pymongo import UpdateOne
+
+class VoteBuffer:
+    """Merges vote $inc deltas and flushes them every interval or every flush_size votes"""
+
+    def __init__(self, collection, flush_interval_ms=250, flush_size=500, max_pending=10000,
+                 on_flush=None):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._deltas = {}  # (poll_id, option) -> votes not yet written
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        # Counters
+        self.buffered = 0
+        self.flushed = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.failed_callbacks = 0
+
+    def start(self):
+        """Start the background flusher; called lazily so it runs in the worker process"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and write out whatever is still buffered"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def add(self, poll_id, option):
+        """Buffer one vote. Returns False when the buffer is full and the caller must write directly."""
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            if self._stopped.is_set() or self._pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            key = (poll_id, option)
+            self._deltas[key] = self._deltas.get(key, 0) + 1
+            self._pending += 1
+            self.buffered += 1
+            if self._pending >= self.flush_size:
+                self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write all buffered deltas with a single bulk_write; returns the number of votes written"""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._deltas = self._deltas, {}
+                pending, self._pending = self._pending, 0
+            if not deltas:
+                return 0
+            
+            # One update per poll carrying the $inc for every option that moved
+            increments = {}
+            for (poll_id, option), count in deltas.items():
+                increments.setdefault(poll_id, {})[f'votes.{option}'] = count
+            operations = [UpdateOne({'_id': poll_id}, {'$inc': inc})
+                          for poll_id, inc in increments.items()]
+            
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Put the deltas back so the next flush retries them
+                with self._lock:
+                    for key, count in deltas.items():
+                        self._deltas[key] = self._deltas.get(key, 0) + count
+                    self._pending += pending
+                    self.failed_flushes += 1
+                print(f"Vote buffer flush failed: {e}")
+                return 0
+            
+            with self._lock:
+                self.flushed += pending
+                self.flushes += 1
+            if self.on_flush is not None:
+                # The votes are already written; a failing callback must not undo or stop that
+                try:
+                    self.on_flush(list(increments))
+                except Exception as e:
+                    with self._lock:
+                        self.failed_callbacks += 1
+                    print(f"Vote buffer flush callback failed: {e}")
+            return pending
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'buffered': self.buffered,
+                'flushed': self.flushed,
+                'rejected': self.rejected,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes,
+                'failed_callbacks': self.failed_callbacks
+            }
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            # Nothing may end this loop early, or buffered votes would wait for shutdown
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Vote buffer flush failed: {e}")